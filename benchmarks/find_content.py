@@ -0,0 +1,64 @@
+"""
+Compares gxmd.utils.find_content with the per-div subtree rescans it replaced.
+
+    python -m benchmarks.find_content [page.html ...]
+
+Saved pages (e.g. chapter lists of 1-5 MB) are measured as given, without arguments nested chapter-list pages of
+about 1, 2.5 and 5 MB are generated. Both implementations must elect the same container.
+"""
+import sys
+import time
+from pathlib import Path
+
+from selectolax.parser import HTMLParser, Node
+
+from gxmd.utils import find_content
+
+
+def find_content_rescan(tree: HTMLParser, to_parse_images: bool = False) -> Node:
+    """The previous fallback scoring, walking the subtree of every div"""
+    best_score = 0
+    best_node = tree.body
+    for div in tree.css("div"):
+        text_len = len(div.text(strip=True))
+        child_count = len(div.css('img')) if to_parse_images else len(div.css("li, a"))
+        score = text_len + (child_count * 100)
+        if score > best_score and text_len > 200:
+            best_score = score
+            best_node = div
+    return best_node
+
+
+def create_page(chapters: int, depth: int = 12) -> str:
+    """A chapter list nested in depth divs, with a sidebar, as themes wrap them"""
+    items = ''.join(f'<div class="chapter-item"><div class="chapter-name"><a href="/manga/chapter-{n}/">'
+                    f'Chapter {n}</a></div><div class="chapter-date"><span>2 years ago</span></div></div>\n'
+                    for n in range(chapters, 0, -1))
+    sidebar = ''.join(f'<div class="widget"><a href="/other/{n}">Other manga {n}</a></div>' for n in range(50))
+    return ('<html><body>' + '<div class="wrap">' * depth + f'<div class="listing">{items}</div>'
+            + '</div>' * depth + f'<div class="sidebar">{sidebar}</div></body></html>')
+
+
+def measure(func, html: str) -> tuple[float, Node]:
+    tree = HTMLParser(html)
+    start = time.perf_counter()
+    node = func(tree)
+    return time.perf_counter() - start, node
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = [(path, Path(path).read_text(encoding='utf-8', errors='replace')) for path in sys.argv[1:]]
+    else:
+        pages = [(f"generated, {chapters} chapters", create_page(chapters)) for chapters in (6000, 15000, 30000)]
+
+    for name, html in pages:
+        rescan_time, rescan_node = measure(find_content_rescan, html)
+        time_, node = measure(find_content, html)
+        same = rescan_node.html == node.html
+        print(f"{name} ({len(html) / 1e6:.1f} MB): rescan {rescan_time * 1000:.0f} ms, "
+              f"outermost divs {time_ * 1000:.0f} ms ({rescan_time / time_:.1f}x) {'same' if same else 'DIFFERENT'} node")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures the import time of the gxmd entry points, in a fresh interpreter each.
+
+    python benchmarks/import_time.py [--runs 5] [--top 10]
+
+Exits with 1 when a module exceeds its budget (IMPORT_BUDGETS, in seconds), heavy dependencies (langchain,
+Playwright, cloudscraper) must only be imported by the code using them.
+"""
+import argparse
+import subprocess
+import sys
+
+IMPORT_BUDGETS = {
+    'gxmd.cli': 0.3,
+    'gxmd': 0.3,
+    'gxmd.services.manga_downloader': 0.6,
+}
+
+
+def measure(module: str) -> tuple[float, list[tuple[int, str]]]:
+    """
+    Imports module in a fresh interpreter.
+
+    Returns:
+        tuple: The cumulative import time of module in seconds, and the (microseconds, name) of the imports it
+            triggered.
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True).stderr
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), name.strip()))
+        if name.strip() == module:
+            return int(cumulative) / 1e6, imports
+        if not name.startswith('  '):
+            imports = []  # A top-level import done before module, e.g. site
+    raise RuntimeError(f"{module} was not imported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import time of the gxmd entry points')
+    parser.add_argument('--runs', type=int, default=5, help='Runs per module, the fastest counts (default: 5)')
+    parser.add_argument('--top', type=int, default=10, help='Slowest imports listed per module (default: 10)')
+    args = parser.parse_args()
+
+    res = 0
+    for module, budget in IMPORT_BUDGETS.items():
+        runs = [measure(module) for _ in range(args.runs)]
+        total, imports = min(runs, key=lambda run: run[0])
+        status = 'ok' if total <= budget else 'OVER BUDGET'
+        print(f"{module}: {total * 1000:.1f} ms (budget {budget * 1000:.0f} ms) {status}")
+        for us, name in sorted(imports, reverse=True)[1:args.top + 1]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+        if total > budget:
+            res = 1
+    return res
+
+
+if __name__ == '__main__':
+    sys.exit(main())
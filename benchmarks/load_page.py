@@ -0,0 +1,108 @@
+"""
+Compares the page processing of RequestParser.load_page (render detection, content finder and cleaning) on a parsed
+once Document with the pipeline parsing the page three times it replaced.
+
+    python -m benchmarks.load_page [page.html ...]
+
+Saved pages are measured as given, without arguments a chapter list and a chapter reader are generated. Python
+allocations are traced with tracemalloc, the trees built by selectolax are not counted.
+"""
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from selectolax.lexbor import LexborHTMLParser
+from selectolax.parser import HTMLParser
+
+from gxmd.parsers.document import Document, READER_SELECTOR
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.utils import find_content
+
+JS_FRAMEWORKS = [r'vue\.js', r'react', r'angular', r'next\.js', r'nuxt\.js', r'svelte', r'react-dom', r'@angular',
+                 r'preact', r'solid-js']
+FRAMEWORK_ATTRIBUTES = [r'data-v-[\w-]+', r'data-reactroot', r'data-react-helmet', r'_ngcontent']
+PLACEHOLDERS = ['loading...', 'please wait', 'content loading']
+CLEANED_SELECTORS = ["nav", "footer", "aside", "style", "script[class*='advert']", "[class^='ad-']", ".sp-wrapper",
+                     "[class*='sandpack']"]
+
+
+def load_page_reparsing(content: str, to_parse_images: bool):
+    """The previous pipeline: a Lexbor parse and regex passes to detect rendering, a parse to look for script
+    images, a parse for the content, and a query per cleaned selector"""
+    parser = LexborHTMLParser(content)
+    checks = [
+        re.search('|'.join(JS_FRAMEWORKS), content, re.IGNORECASE) is not None,
+        any(re.search(pattern, content, re.IGNORECASE) for pattern in FRAMEWORK_ATTRIBUTES),
+        len(parser.text().strip()) / len(parser.html) < 0.05,
+        any(phrase in content.lower() for phrase in PLACEHOLDERS),
+    ]
+    if to_parse_images:
+        reader_container = parser.css_first(READER_SELECTOR)
+        checks.append(reader_container is not None and len(reader_container.css('img')) == 0)
+        tree = HTMLParser(content)
+        visible = {node.attributes.get('src') for node in tree.css('img') if node.attributes.get('src')}
+        pattern = re.compile(r'https?://[^\s"\'<>]+?\.(?:jpg|jpeg|png|webp)')
+        scripts = {url for script in tree.css('script') if script.text(strip=True)
+                   for url in pattern.findall(script.text())}
+        checks.append(bool(scripts) and len(scripts - visible) / len(scripts) > 0.5)
+    tree = HTMLParser(content)
+    soup = find_content(tree, to_parse_images)
+    for selector in CLEANED_SELECTORS:
+        for node in tree.css(selector):
+            node.decompose()
+    return any(checks), soup
+
+
+def load_page_once(content: str, to_parse_images: bool):
+    document = Document(content)
+    return RequestParser.looks_script_rendered(document, to_parse_images), document.find_content(to_parse_images)
+
+
+def create_chapter_list(chapters: int) -> str:
+    items = ''.join(f'<li class="wp-manga-chapter"><a href="/manga/chapter-{n}/">Chapter {n}</a>'
+                    f'<span class="chapter-release-date"><i>2 years ago</i></span></li>\n'
+                    for n in range(chapters, 0, -1))
+    return ('<html><head><script>window.dataLayer = [];</script></head><body><nav><a href="/">Home</a></nav>'
+            f'<div class="wrap"><div class="summary">{"Synopsis of the manga. " * 40}</div>'
+            f'<div class="listing"><ul>{items}</ul></div></div><footer>Footer</footer></body></html>')
+
+
+def create_reader(images: int) -> str:
+    pages = ''.join(f'<div class="page-break"><img src="https://cdn.manga.com/1/{i}.jpg" alt="Page {i}"></div>\n'
+                    for i in range(images))
+    comments = ''.join(f'<div class="comment"><p>{"Nice chapter! " * 8}</p></div>' for _ in range(2000))
+    return (f'<html><body><div class="reading-content">{pages}</div><div class="comments">{comments}</div>'
+            '<script>var images = ["https://cdn.manga.com/1/0.jpg"];</script></body></html>')
+
+
+def measure(func, content: str, to_parse_images: bool) -> tuple[float, int, tuple]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    res = func(content, to_parse_images)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, res
+
+
+def main():
+    if len(sys.argv) > 1:
+        pages = [(path, Path(path).read_text(encoding='utf-8', errors='replace'), 'chapter' in path)
+                 for path in sys.argv[1:]]
+    else:
+        pages = [('generated chapter list', create_chapter_list(20000), False),
+                 ('generated reader', create_reader(200), True)]
+
+    for name, content, to_parse_images in pages:
+        old_time, old_peak, (old_render, old_soup) = measure(load_page_reparsing, content, to_parse_images)
+        new_time, new_peak, (new_render, new_soup) = measure(load_page_once, content, to_parse_images)
+        same = (old_render, old_soup.html) == (new_render, new_soup.html)
+        print(f"{name} ({len(content) / 1e6:.1f} MB): reparsing {old_time * 1000:.0f} ms / {old_peak / 1e6:.1f} MB, "
+              f"parsed once {new_time * 1000:.0f} ms / {new_peak / 1e6:.1f} MB, "
+              f"{'same' if same else 'DIFFERENT'} result")
+
+
+if __name__ == '__main__':
+    main()
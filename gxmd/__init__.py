@@ -1,15 +1,41 @@
-from gxmd.entities.manga import Manga
-from gxmd.services.download_manager import DownloadManager
-from gxmd.services.exporter import CBZExporter
-from gxmd.services.manga_downloader import MangaDownloader
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    from gxmd.entities.manga import Manga
+    from gxmd.services.download_manager import DownloadManager
+    from gxmd.services.exporter import CBZExporter
+    from gxmd.services.manga_downloader import MangaDownloader
+
+
+def __getattr__(name: str):
+    # The services are imported on first use, `import gxmd.cli` stays cheap
+    if name == 'Manga':
+        from gxmd.entities.manga import Manga
+        return Manga
+    if name == 'DownloadManager':
+        from gxmd.services.download_manager import DownloadManager
+        return DownloadManager
+    if name == 'CBZExporter':
+        from gxmd.services.exporter import CBZExporter
+        return CBZExporter
+    if name == 'MangaDownloader':
+        from gxmd.services.manga_downloader import MangaDownloader
+        return MangaDownloader
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+async def parse_manga_info(url: str) -> 'Manga':
+    from gxmd.services.manga_downloader import MangaDownloader
 
-async def parse_manga_info(url: str) -> Manga:
     manga = await MangaDownloader.load_manga_info(url)
     return manga
 
 
-async def download_chapters(job: dict, manga: Manga, download_path: str) -> str:
+async def download_chapters(job: dict, manga: 'Manga', download_path: str) -> str:
+    from gxmd.services.download_manager import DownloadManager
+    from gxmd.services.exporter import CBZExporter
+    from gxmd.services.manga_downloader import MangaDownloader
+
     download_manager = DownloadManager(download_path, with_progress=False)
     manga_downloader = await MangaDownloader.load_manga_from_info(manga, download_manager, CBZExporter)
     try:
@@ -23,9 +23,30 @@ def create_argparser():
     parser.add_argument("-d", "--directory", default='Mangas', help="directory path to save the downloaded manga")
     parser.add_argument("-f", "--format", choices=['raw', 'cbz'], default='raw',
                         help="Export format: 'raw' for folders, 'cbz' for compressed archives (default: raw)")
-
-    parser.add_argument("-n", type=int, default=20,
-                        help='The number of concurrent downloads allowed')
+    parser.add_argument("--cbz-group", choices=['manga', 'chapter', 'volume'], default='manga',
+                        help="Write one cbz archive per manga, per chapter or per volume (default: manga)")
+    parser.add_argument("--volume-size", metavar='int', type=int, default=10,
+                        help='The number of chapters per volume archive (default: 10)')
+
+    parser.add_argument("--dedup", action='store_true',
+                        help='Store images once by content and skip image URLs that were already downloaded')
+    parser.add_argument("--browsers", metavar='int', type=int, default=1,
+                        help='The number of browser processes rendering pages (default: 1)')
+    parser.add_argument("--browser-daemon", action='store_true',
+                        help='Render pages with the shared browser started by `gxmd-browser start` when it runs '
+                             '(a single browser, not combinable with --browsers)')
+    parser.add_argument("--no-capture", action='store_true',
+                        help='Download the images of rendered chapters again instead of keeping the ones the browser '
+                             'loaded')
+    parser.add_argument("-n", metavar='int', type=int,
+                        help='The maximum number of concurrent downloads per host (default: learned per host and '
+                             'adapted to the server at runtime, starting at 20)')
+    parser.add_argument("--rate", metavar='float', type=float,
+                        help='Maximum requests per second to a single domain (default: unlimited)')
+    parser.add_argument("--burst", metavar='int', type=int, default=1,
+                        help='Number of requests allowed in a burst above --rate (default: 1)')
+    parser.add_argument("--retries", metavar='int', type=int, default=3,
+                        help='The number of retries of a failed image download (default: 3)')
 
     parser.add_argument('--version', action='version', version='%(prog)s 0.1.4a')
 
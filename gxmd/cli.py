@@ -14,40 +14,89 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 import asyncio
+import os
 import sys
+import threading
 import traceback
+from functools import partial
 
 from gxmd.args import create_argparser
+from gxmd.config import BROWSER_SHARDS, INITIAL_CONNECTIONS_PER_HOST, MAX_CONNECTIONS_PER_HOST
 from gxmd.exceptions import GXMDownloaderError
 from gxmd.log import log_error
-from gxmd.parsers.request_parser import RequestParser
-from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
-from gxmd.services.download_manager import DownloadManager
-from gxmd.services.exporter import CBZExporter, RawExporter
-from gxmd.services.manga_downloader import MangaDownloader
+
+
+async def prompt(message: str) -> str:
+    """
+    input() in a daemon thread: the event loop, and the speculative chapter parse, keep running while the user
+    types, and an interrupted prompt does not keep the process alive.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(callback, value):
+        if not future.done():
+            callback(value)
+
+    def read():
+        try:
+            line = input(message)
+        except Exception as e:
+            loop.call_soon_threadsafe(settle, future.set_exception, e)
+        else:
+            loop.call_soon_threadsafe(settle, future.set_result, line)
+
+    threading.Thread(target=read, daemon=True).start()
+    return await future
 
 
 async def main():
     parser = create_argparser()
     args = parser.parse_args()
+    if args.browser_daemon and args.browsers > 1:
+        parser.error("--browsers cannot be used with --browser-daemon, the daemon is a single browser")
+
+    # Imported once the arguments are valid, `--help` and usage errors stay instant
+    from gxmd.parsers.request_parser import RequestParser
+    from gxmd.services.blob_store import BlobStore
+    from gxmd.services.download_manager import DownloadManager
+    from gxmd.services.exporter import CBZExporter, RawExporter
+    from gxmd.services.manga_downloader import MangaDownloader
+    from gxmd.services.rate_limiter import rate_limiter
+    from gxmd.services.retry import RetryPolicy
+
     res = 0
     download_manager = None
     try:
         # Select exporter based on argument
-        exporter_class = CBZExporter if args.format == 'cbz' else RawExporter
+        if args.format == 'cbz':
+            exporter_class = partial(CBZExporter, group=args.cbz_group, volume_size=args.volume_size)
+        else:
+            exporter_class = RawExporter
+        rate_limiter.configure(args.rate, args.burst)
+        if args.browser_daemon or args.browsers != BROWSER_SHARDS:
+            # Playwright is only imported by the runs rendering pages
+            from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
+            PlaywrightStrategy.use_daemon = args.browser_daemon
+            PlaywrightStrategy.shard_count = args.browsers
 
-        download_manager = DownloadManager(args.directory, args.n, True)
-        manga_downloader = await MangaDownloader.load_manga(args.url, download_manager, exporter_class)
+        blob_store = BlobStore(os.path.join(args.directory, '.gxmd', 'blobs')) if args.dedup else None
+        download_manager = DownloadManager(args.directory, args.n or INITIAL_CONNECTIONS_PER_HOST, True,
+                                           RetryPolicy(max_attempts=args.retries + 1), blob_store=blob_store,
+                                           max_connections=args.n or MAX_CONNECTIONS_PER_HOST)
+        manga_downloader = await MangaDownloader.load_manga(args.url, download_manager, exporter_class,
+                                                            first_chapter=args.chapter or args.start)
+        manga_downloader.capture_images = not args.no_capture
         if args.chapter:
             await manga_downloader.download_chapter(args.chapter)
         elif args.start or args.end:
             await manga_downloader.download_chapters(args.start, args.end)
         else:
             manga_downloader.list_chapters()
-            start = input("Starting index to download (default=1): ").strip()
+            start = (await prompt("Starting index to download (default=1): ")).strip()
             if start != "" and not start.isdigit():
                 raise Exception('A number is required or leave it empty for default value')
-            end = input(f"Ending index to download (default={len(manga_downloader.chapters)}): ").strip()
+            end = (await prompt(f"Ending index to download (default={len(manga_downloader.chapters)}): ")).strip()
             if end != "" and not end.isdigit():
                 raise Exception('A number is required or leave it empty for default value')
             await manga_downloader.download_chapters(
@@ -67,7 +116,6 @@ async def main():
         traceback.print_exc(file=sys.stderr)
 
     await RequestParser.close()
-    await PlaywrightStrategy().close()
     if download_manager:
         await download_manager.close()
     return res
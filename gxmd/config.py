@@ -8,3 +8,34 @@ PARSE_MANGA_INFO_TEMPLATE = BASE_DIR / 'templates' / 'parse_manga_info_template'
 PARSE_CHAPTER_IMAGES_TEMPLATE = BASE_DIR / 'templates' / 'parse_chapter_images_template'
 SCRPERS_DIR = "~/.config/gxmd/scrapers"
 MAX_TABS = 10
+CHUNK_SIZE = 64 * 1024  # Bytes read per chunk when streaming images to the exporter
+LIMITS_FILE = "~/.config/gxmd/limits.json"  # Learned per-host download concurrency
+INITIAL_CONNECTIONS_PER_HOST = 20  # Concurrent downloads to a host without a learned limit
+MAX_CONNECTIONS_PER_HOST = 64
+RATE_LIMITS_FILE = "~/.config/gxmd/rate_limits.json"  # Per-domain requests/sec and burst
+PARSE_AHEAD = 3  # Chapters whose images are resolved ahead of the downloads
+CONCURRENT_CHAPTERS = 2  # Chapters downloaded at the same time
+WRITE_BUFFER_SIZE = 8 * 1024 * 1024  # Bytes queued for the writer thread before downloads wait
+FSYNC_BATCH_SIZE = 0  # Files fsync'ed together, 0 leaves flushing to the OS
+MANIFEST_SAVE_INTERVAL = 2.0  # Seconds between two saves of a chapter manifest, it is always saved at the chapter end
+STRATEGIES_FILE = "~/.config/gxmd/strategies.json"  # Learned per-domain fetch strategy (http or render)
+MAX_CONTEXT_USES = 50  # Navigations served by a browser context before it is recycled
+INTERCEPTION_FILE = "~/.config/gxmd/interception.json"  # Per-site request blocking rules of rendered pages
+READINESS_FILE = "~/.config/gxmd/readiness.json"  # Learned reader selectors and readiness latencies per domain
+READY_TIMEOUT = 10  # Seconds a rendered page may take to settle before it is read as is
+QUIET_WINDOW = 0.5  # Seconds without DOM mutation and request for a rendered page to be settled
+CAPTURE_MAX_BYTES = 64 * 1024 * 1024  # Image bodies held by all the chapter renders, later images are downloaded again
+BROWSER_DAEMON_FILE = "~/.config/gxmd/browser.json"  # State of the shared browser daemon (pid, CDP endpoint)
+BROWSER_DAEMON_PORT = 9333
+BROWSER_SHARDS = 1  # Browser processes rendering pages, each with MAX_TABS pages
+BROWSER_MAX_RENDERS = 500  # Renders after which a browser is recycled
+BROWSER_MAX_MEMORY = 2 * 1024 * 1024 * 1024  # Bytes used by a browser and its renderers before it is recycled
+COOKIES_FILE = "~/.config/gxmd/cookies.json"  # Cookies and clearance tokens shared by the fetchers and downloads
+SESSION_COOKIE_TTL = 12 * 60 * 60  # Seconds a cookie without expiry is kept
+DISTILL_SAMPLES = 2  # Similar siblings kept (plus the last one) in the HTML sent to the LLM
+DISTILL_TEXT_LENGTH = 80  # Characters kept of a text in the HTML sent to the LLM
+DISTILL_ATTRIBUTE_LENGTH = 120  # Characters kept of an attribute value in the HTML sent to the LLM
+SPECULATIVE_SCRAPERS = True  # Generate the chapter_images scraper of a new domain while its manga info is processed
+SCRAPER_WORKERS = 2  # Worker processes running the generated scrapers
+SCRAPER_TIMEOUT = 2.0  # Seconds a scraper may run before its worker is killed
+SCRAPER_CPU_LIMIT = 2  # CPU seconds a scraper may use before its worker is killed (where rlimits are supported)
@@ -11,3 +11,12 @@ class GXMNetworkError(GXMDownloaderError):
     """Raised when a network request fails (404, 500, etc.)."""
     pass
 
+
+class GXMCircuitOpenError(GXMNetworkError):
+    """Raised when requests to a host are short-circuited after repeated failures."""
+    pass
+
+
+class GXMScraperError(GXMDownloaderError):
+    """Raised when a generated scraper fails, times out or exceeds its CPU limit."""
+    pass
@@ -0,0 +1,86 @@
+import re
+from functools import cached_property
+
+from selectolax.parser import HTMLParser, Node
+
+from gxmd.utils import find_and_clean_content
+
+# Framework signatures (react also matches react-dom, preact and data-react*, angular @angular), framework data
+# attributes and loading placeholders, searched as plain substrings: a case-insensitive regex alternation tries every
+# branch at every position of the page
+RENDER_MARKERS = ['vue.js', 'react', 'angular', 'next.js', 'nuxt.js', 'svelte', 'solid-js', '_ngcontent',
+                  'loading...', 'please wait', 'content loading']
+VUE_ATTRIBUTE_PATTERN = re.compile(r'data-v-[\w-]')
+SCRIPT_IMAGE_PATTERN = re.compile(r'https?://[^\s"\'<>]+?\.(?:jpg|jpeg|png|webp)')
+READER_SELECTOR = 'div.py-8.-mx-5, .reader-container, [class*="chapter"], [class*="reader"]'
+MIN_CONTENT_RATIO = 0.05  # Less than 5% meaningful content suggests JS-generated content
+
+
+class Document:
+    """
+    A fetched page, parsed once.
+
+    The render detection, the content finder and the scrapers share its tree, and the indexes they need (images,
+    script image URLs, text length, render markers) are computed on first use and kept, each by a single query.
+
+    Args:
+        html (str): The page.
+    """
+
+    def __init__(self, html: str):
+        self.html = html
+        self.tree = HTMLParser(html)
+
+    @cached_property
+    def images(self) -> list[Node]:
+        return self.tree.css('img')
+
+    @cached_property
+    def image_srcs(self) -> set[str]:
+        return {src for img in self.images if (src := img.attributes.get('src'))}
+
+    @cached_property
+    def script_image_urls(self) -> set[str]:
+        """Image URLs written in the scripts"""
+        return {url for script in self.tree.css('script') for url in SCRIPT_IMAGE_PATTERN.findall(script.text())}
+
+    @cached_property
+    def text_length(self) -> int:
+        return len(self.tree.root.text().strip()) if self.tree.root is not None else 0
+
+    @cached_property
+    def has_render_markers(self) -> bool:
+        html = self.html.lower()
+        return any(marker in html for marker in RENDER_MARKERS) or VUE_ATTRIBUTE_PATTERN.search(html) is not None
+
+    @property
+    def content_ratio(self) -> float:
+        # Count meaningful content vs boilerplate
+        return self.text_length / len(self.html) if self.html else 0
+
+    def needs_rendering(self, to_parse_images: bool = True) -> bool:
+        """Returns True if the page likely needs JS rendering"""
+        if self.has_render_markers or self.content_ratio < MIN_CONTENT_RATIO:
+            return True
+        if to_parse_images:
+            # Manga-specific: a reader container without images
+            reader_container = self.tree.css_first(READER_SELECTOR)
+            return reader_container is not None and reader_container.css_first('img') is None
+        return False
+
+    def has_script_rendered_images(self, threshold: float = 0.5) -> bool:
+        """
+        Detects if the page wraps its images in scripts.
+
+        Args:
+            threshold (float): Ratio of the image URLs of the scripts missing from the img tags to trigger 'True'.
+        """
+        script_images = self.script_image_urls
+        if not script_images:
+            return False
+        hidden_images = script_images - self.image_srcs
+        return len(hidden_images) / len(script_images) > threshold
+
+    def find_content(self, to_parse_images: bool = False) -> Node:
+        """Returns the main content node, the tree is cleaned of obvious noise"""
+        return find_and_clean_content(self.tree, to_parse_images)
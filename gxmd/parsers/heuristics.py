@@ -0,0 +1,216 @@
+import re
+from typing import Callable
+from urllib.parse import urlparse
+
+from selectolax.parser import Node
+
+# Built-in scrapers of the layouts described by the code generation templates (gxmd/templates), tried before asking
+# the LLM for a scraper. A result is only trusted once it passes the sanity checks of its purpose.
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+IMAGE_ATTRIBUTES = ('data-src', 'data-lazy-src', 'data-url', 'srcset', 'src')
+EXCLUDED_IMAGE_KEYWORDS = ('banner', 'logo', 'thumb', 'advert', 'comment')
+PAGE_COUNTER_PATTERN = re.compile(r'\d+\s*/\s*\d+')
+MIN_PAGINATED_IMAGES = 5
+MIN_CHAPTER_IMAGES = 3
+
+CHAPTER_CONTAINERS = ('.listing-chapters_wrap', '.page-content-listing', '.chapter-list', '.manga-chapters',
+                      '#chapterlist', '.row-content-chapter')
+CHAPTER_ITEMS = ('li.wp-manga-chapter', '.row-content-chapter li', 'li', 'a[href]')
+EXCLUDED_CHAPTER_KEYWORDS = ('widget', 'sidebar', 'latest', 'popular', 'top-10', 'recent')
+CHAPTER_NUMBER_PATTERN = re.compile(r'(?:chapter|chap|ch\.?|episode|ep\.?)\s*(\d+(?:\.\d+)?)', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+TITLE_SELECTORS = ('.post-title h1', '.post-title h3', '.manga-title', 'h1')
+MIN_NUMBERED_CHAPTERS = 0.8  # Ratio of chapter names with a number
+
+
+def get_image_url(img: Node) -> str | None:
+    """Returns the URL of a chapter image, None for decorations and non-image URLs"""
+    marks = f"{img.attributes.get('class') or ''} {img.attributes.get('id') or ''}".lower()
+    if any(keyword in marks for keyword in EXCLUDED_IMAGE_KEYWORDS):
+        return None
+    for attribute in IMAGE_ATTRIBUTES:
+        value = (img.attributes.get(attribute) or '').strip()
+        if value and attribute == 'srcset':
+            value = value.split(',')[-1].strip().split(' ')[0]
+        if value and not value.startswith('data:'):
+            return value if urlparse(value).path.lower().endswith(IMAGE_EXTENSIONS) else None
+    return None
+
+
+def get_image_urls(images: list[Node]) -> list[str]:
+    """Returns the deduplicated URLs of images, in document order"""
+    urls = (get_image_url(img) for img in images)
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+def get_subtree_counts(root: Node, is_counted: Callable[[Node], bool]) -> dict[int, tuple[int, int]]:
+    """
+    Counts the descendants of every element under root in a single pass.
+
+    Returns:
+        dict: (element descendants, counted descendants) per element mem_id.
+    """
+    counts = {}
+    stack = [(root, False)]
+    while stack:
+        node, visited = stack.pop()
+        if not visited:
+            stack.append((node, True))
+            stack.extend((child, False) for child in node.iter())
+            continue
+        descendants = counted = 0
+        for child in node.iter():
+            child_descendants, child_counted = counts[child.mem_id]
+            descendants += child_descendants + 1
+            counted += child_counted + is_counted(child)
+        counts[node.mem_id] = (descendants, counted)
+    return counts
+
+
+def find_paginated_images(node: Node) -> list[str]:
+    """Returns the images shown next to a page counter (e.g. '1 / 10'), if enough of them are"""
+    images = []
+    for img in node.css('img'):
+        if img.parent is not None and any(PAGE_COUNTER_PATTERN.search(sibling.text())
+                                          for sibling in img.parent.iter() if sibling.tag != 'img'):
+            images.append(img)
+    urls = get_image_urls(images)
+    return urls if len(urls) >= MIN_PAGINATED_IMAGES else []
+
+
+def find_reader_container(node: Node) -> Node | None:
+    """
+    Returns the densest image container: the most images per descendant, ties go to the container with fewer
+    descendants. Only the containers holding at least half the images of the richest one compete, so the wrapper of
+    a single image does not win.
+    """
+    valid_images = {img.mem_id for img in node.css('img') if get_image_url(img)}
+    if not valid_images:
+        return None
+    counts = get_subtree_counts(node, lambda child: child.mem_id in valid_images)
+    divs = [(div, *counts[div.mem_id]) for div in node.css('div')]
+    most_images = max((images for _, _, images in divs), default=0)
+    best_node, best_key = None, None
+    for div, descendants, images in divs:
+        if not images or images * 2 < most_images:
+            continue
+        key = (images / (1 + descendants), -descendants)
+        if best_key is None or key > best_key:
+            best_node, best_key = div, key
+    return best_node
+
+
+def parse_chapter_images(node: Node) -> list[str]:
+    """
+    Extracts the images of a chapter page: the images next to a page counter, or else the ones of the densest
+    image container.
+    """
+    if urls := find_paginated_images(node):
+        return urls
+    container = find_reader_container(node)
+    return get_image_urls(container.css('img')) if container is not None else []
+
+
+def is_excluded_chapter(item: Node, container: Node) -> bool:
+    """Whether an item belongs to a widget (latest updates, sidebars...) instead of the chapter list"""
+    parent = item
+    while parent is not None and parent.mem_id != container.mem_id:
+        marks = f"{parent.attributes.get('class') or ''} {parent.attributes.get('id') or ''}".lower()
+        if parent.tag == 'aside' or any(keyword in marks for keyword in EXCLUDED_CHAPTER_KEYWORDS):
+            return True
+        parent = parent.parent
+    return False
+
+
+def get_chapter_number(text: str) -> float | None:
+    if match := CHAPTER_NUMBER_PATTERN.search(text):
+        return float(match.group(1))
+    if match := NUMBER_PATTERN.search(text):
+        return float(match.group())
+    return None
+
+
+def get_chapter_items(node: Node) -> list[Node]:
+    """Returns the links of the main chapter list"""
+    containers = [container for selector in CHAPTER_CONTAINERS for container in node.css(selector)] or [node]
+    for selector in CHAPTER_ITEMS:
+        for container in containers:
+            links = [item.css_first('a[href]') if item.tag != 'a' else item
+                     for item in container.css(selector) if not is_excluded_chapter(item, container)]
+            links = [link for link in links if link is not None]
+            if selector in ('li', 'a[href]'):
+                # Generic items only count when they name chapters
+                links = [link for link in links if CHAPTER_NUMBER_PATTERN.search(link.text())]
+            if links:
+                return links
+    return []
+
+
+def get_manga_name(node: Node) -> str | None:
+    documents = [node, node.parser] if node.parser is not None else [node]
+    for document in documents:
+        for selector in TITLE_SELECTORS:
+            title = document.css_first(selector)
+            if title is not None and (text := title.text(strip=True)):
+                return text
+    meta = node.parser.css_first('meta[property="og:title"]') if node.parser is not None else None
+    if meta is not None:
+        return (meta.attributes.get('content') or '').strip() or None
+    return None
+
+
+def parse_manga_info(node: Node) -> dict:
+    """Extracts the name and the chapters (ascending, named 'Chapter n') of a manga page"""
+    chapters, numbers, seen = [], [], set()
+    for link in get_chapter_items(node):
+        url = (link.attributes.get('href') or '').strip()
+        if not url or url.startswith(('#', 'javascript:')) or url in seen:
+            continue
+        seen.add(url)
+        text = link.text(strip=True, separator=' ')
+        number = get_chapter_number(text)
+        chapters.append({'name': f"Chapter {number:g}" if number is not None else text, 'link': url})
+        numbers.append(number)
+
+    if numbers and all(number is not None for number in numbers):
+        chapters = [chapter for _, chapter in sorted(zip(numbers, chapters), key=lambda item: item[0])]
+    elif len(numbers) > 1 and numbers[0] is not None and numbers[-1] is not None and numbers[0] > numbers[-1]:
+        chapters.reverse()  # Listed newest first
+    return {'manga_name': get_manga_name(node), 'manga_chapters': chapters}
+
+
+def is_valid_manga_info(res: dict) -> bool:
+    chapters = res.get('manga_chapters') or []
+    if not res.get('manga_name') or not chapters:
+        return False
+    numbered = sum(1 for chapter in chapters if chapter['name'].startswith('Chapter '))
+    return numbered / len(chapters) >= MIN_NUMBERED_CHAPTERS
+
+
+def is_valid_chapter_images(res: list[str]) -> bool:
+    return len(res) >= MIN_CHAPTER_IMAGES and len(set(res)) == len(res)
+
+
+HEURISTIC_SCRAPERS: dict[str, tuple[Callable, Callable]] = {
+    'manga_info': (parse_manga_info, is_valid_manga_info),
+    'chapter_images': (parse_chapter_images, is_valid_chapter_images),
+}
+
+
+def get_heuristic_scraper(purpose: str, soup: Node) -> Callable | None:
+    """
+    Returns the built-in scraper of purpose if it extracts a sane result from soup.
+
+    Args:
+        purpose (str): 'manga_info' or 'chapter_images'.
+        soup (Node): The content of a page of the domain.
+
+    Returns:
+        Callable | None: The scraper, None when the layout is not recognized and a scraper must be generated.
+    """
+    scraper_func, is_valid = HEURISTIC_SCRAPERS[purpose]
+    try:
+        return scraper_func if is_valid(scraper_func(soup)) else None
+    except Exception:
+        return None  # Unexpected markup, the generated scraper will handle it
@@ -1,87 +1,254 @@
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Callable
 from urllib.parse import urlparse
 
-from selectolax.parser import HTMLParser, Node
+from selectolax.parser import Node
 
+from gxmd.abstracts.fetch_strategy import FetchStrategy
 from gxmd.abstracts.manga_parser import IMangaParser
+from gxmd.config import SPECULATIVE_SCRAPERS, SCRAPER_TIMEOUT
 from gxmd.entities.manga_chapter import MangaChapter
-from gxmd.exceptions import GXMDownloaderError
-from gxmd.parsers.strategies.http_strategy import HttpClientStrategy
-from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
-from gxmd.services.code_compiler import CodeCompiler
-from gxmd.services.code_generator import code_generator
+from gxmd.exceptions import GXMDownloaderError, GXMNetworkError, GXMTimeoutError
+from gxmd.parsers.document import Document
+from gxmd.parsers.heuristics import get_heuristic_scraper
+from gxmd.services.code_compiler import CodeCompiler, CompiledScraper
+from gxmd.services.code_generator import get_code_generator
 from gxmd.services.code_registry import registry
-from gxmd.utils import minify_html, find_and_clean_content, resolve_url
+from gxmd.services.html_distiller import distill_html
+from gxmd.services.image_capture import ImageCapture
+from gxmd.services.scraper_pool import scraper_pool
+from gxmd.services.single_flight import single_flight
+from gxmd.services.strategy_selector import strategy_selector
+from gxmd.utils import resolve_url
+
+
+class LazyFetcher:
+    """
+    Class attribute created on first access: the strategies import cloudscraper and Playwright, which most runs
+    only need one of, and `--help` none.
+    """
+
+    def __init__(self, factory: Callable[[type], FetchStrategy]):
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner: type) -> FetchStrategy:
+        fetcher = self.factory(owner)
+        setattr(owner, self.name, fetcher)  # Replaces the descriptor
+        return fetcher
+
+
+def create_http_fetcher(parser_class: type) -> FetchStrategy:
+    from gxmd.parsers.strategies.http_strategy import HttpClientStrategy
+    return HttpClientStrategy(parser_class._executor)
+
+
+def create_render_fetcher(_: type) -> FetchStrategy:
+    from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
+    return PlaywrightStrategy()
 
 
 class RequestParser(IMangaParser):
     _executor = ThreadPoolExecutor(max_workers=4)  # Minimal threads
-    http_fetcher = HttpClientStrategy(_executor)
-    render_fetcher = PlaywrightStrategy()
+    http_fetcher = LazyFetcher(create_http_fetcher)
+    render_fetcher = LazyFetcher(create_render_fetcher)
+    speculate: bool = SPECULATIVE_SCRAPERS
+    _speculations: set[asyncio.Task] = set()
 
-    async def parse_manga_info(self, manga_url: str):
-        parsed_url = urlparse(manga_url)
-        domain = parsed_url.netloc
-        _, needs_render = registry.get_scraper_file(domain, 'manga_info')
+    async def parse_manga_info(self, manga_url: str, render: bool = None, first_chapter: int = None):
+        """
+        Parse the manga name and chapters
 
-        soup, render = await self.load_page(manga_url, render=True)
-        scraper_func: Callable = await self.get_scraper_func(manga_url, soup, 'manga_info', render)
+        Args:
+            manga_url (str): link to the manga
+            render (bool, optional): Force or skip the browser render, learned per domain by default.
+            first_chapter (int, optional): Index of the first chapter to download when known, the chapter whose
+                scraper is speculated. Defaults to the first chapter.
+
+        Returns:
+            tuple[str, list[MangaChapter]]: The manga name and its chapters.
+        """
+        parsed_url = urlparse(manga_url)
 
-        res: dict = await self.run_scraper_with_timeout(scraper_func, soup)
+        soup, render = await self.load_page(manga_url, render=render, purpose='manga_info')
+        res: dict | None = await self.scrape(manga_url, soup, 'manga_info', render)
+        if not (res and res.get('manga_chapters')) and not render:
+            # The static page lacks the chapter list
+            self.learn_render(parsed_url.netloc, 'manga_info')
+            return await self.parse_manga_info(manga_url, render=True, first_chapter=first_chapter)
 
         manga_name = res.get('manga_name')
 
         manga_chapters = [MangaChapter(**chapter) for chapter in res.get('manga_chapters')]
         for chapter in manga_chapters:
             chapter.link = resolve_url(chapter.link, parsed_url)
+        if manga_chapters and self.speculate:
+            index = first_chapter - 1 if first_chapter and first_chapter <= len(manga_chapters) else 0
+            self.speculate_chapter_scraper(manga_chapters[index].link)
 
         return manga_name, manga_chapters
 
-    async def parse_chapter_images(self, chapter_link: str) -> list[str]:
+    async def parse_chapter_images(self, chapter_link: str, render: bool = None,
+                                   capture: ImageCapture = None) -> list[str]:
         """
         Parse chapter images
 
         Args:
             chapter_link (str): link to the chapter
+            render (bool, optional): Force or skip the browser render, learned per domain by default.
+            capture (ImageCapture, optional): Records the images loaded if the chapter is rendered.
 
         Returns:
             list[str]: A list of image links.
         """
-        domain = urlparse(chapter_link).netloc
-        _, needs_render = registry.get_scraper_file(domain, 'chapter_images')
+        soup, render = await self.load_page(chapter_link, True, render=render, purpose='chapter_images',
+                                            capture=capture)
+        res: list[str] | None = await self.scrape(chapter_link, soup, 'chapter_images', render)
+        if not res and not render:
+            # The static page lacks the images
+            self.learn_render(urlparse(chapter_link).netloc, 'chapter_images')
+            return await self.parse_chapter_images(chapter_link, render=True, capture=capture)
+        return res
+
+    async def scrape(self, url: str, soup: Node, purpose: str, render: bool):
+        """
+        Runs the scraper of the domain on soup.
+
+        A scraper generated (or picked) by this run is only persisted once it returns data. One obtained from a
+        static page lacking the data is dropped, so the rendered page gets its own.
 
-        soup, render = await self.load_page(chapter_link, True, render=True)
-        scraper_func = await self.get_scraper_func(chapter_link, soup, 'chapter_images', render)
-        res: list[str] = scraper_func(soup)
+        Returns:
+            The scraped data, None if no scraper fits the static page.
+        """
+        domain = urlparse(url).netloc
+        scraper_func = await self.get_scraper_func(url, soup, purpose, render)
+        if scraper_func is None:
+            return None
+        res = await self.run_scraper_with_timeout(scraper_func, soup)
+
+        scraper_file, _ = registry.get_scraper_file(domain, purpose)
+        if scraper_file.exists():
+            return res
+        if res.get('manga_chapters') if purpose == 'manga_info' else res:
+            if isinstance(scraper_func, CompiledScraper):
+                registry.set_scraper_file(scraper_file, scraper_func.code, render=render)
+        elif not render and registry.get_scraper_func(domain, purpose) is scraper_func:
+            registry.set_scraper_func(domain, purpose, None)
         return res
 
-    async def load_page(self, url: str, to_parse_images=False, render=True):
-        """cloudscraper → steal cookies → aiohttp"""
-        fetcher = self.render_fetcher if render else self.http_fetcher
-        content = await fetcher.fetch(url)
+    def speculate_chapter_scraper(self, chapter_link: str) -> asyncio.Task | None:
+        """
+        Starts parsing a chapter in the background when its domain has no chapter_images scraper yet.
 
-        tree = HTMLParser(content)
-        soup = find_and_clean_content(tree, to_parse_images)
+        On a new domain the scraper is then fetched and generated while the manga info is processed and the
+        chapters chosen, instead of after it. The first chapter parse joins the generation in flight (or finds it
+        done) instead of starting its own.
+
+        Args:
+            chapter_link (str): A chapter of the manga, the first one to download when known.
+
+        Returns:
+            asyncio.Task | None: The speculative parse, None if the scraper is known.
+        """
+        domain = urlparse(chapter_link).netloc
+        scraper_file, _ = registry.get_scraper_file(domain, 'chapter_images')
+        if registry.get_scraper_func(domain, 'chapter_images') or scraper_file.exists():
+            return None
+        task = asyncio.create_task(self._speculate(chapter_link))
+        self._speculations.add(task)
+        task.add_done_callback(self._speculations.discard)
+        return task
+
+    async def _speculate(self, chapter_link: str):
+        try:
+            await self.parse_chapter_images(chapter_link)
+        except Exception:
+            pass  # The chapter parse runs again and reports the error
+
+    async def load_page(self, url: str, to_parse_images=False, render: bool = None, purpose: str = 'manga_info',
+                        capture: ImageCapture = None):
+        """
+        Fetch and parse a page with the cheapest strategy that works for its domain.
+
+        Unless `render` is given, the learned verdict of the domain is used. Unknown domains are fetched over
+        HTTP first (cloudscraper → steal cookies → aiohttp) and escalated to a browser render when the page
+        looks script-rendered or is a challenge, the verdict is persisted for the next pages. A page failing
+        with a transient error is rendered without learning it. A rendered page records its images in `capture`.
+        """
+        domain = urlparse(url).netloc
+        if render is None:
+            render = bool(strategy_selector.needs_render(domain, purpose))
+
+        if render and capture is not None:
+            # Only the render recording the capture loads the images, it is not shared
+            content = await self.render_fetcher.fetch(url, capture=capture, purpose=purpose)
+        elif render:
+            # A concurrent render of the same URL is shared
+            content = await single_flight.do(('render', url), partial(self.render_fetcher.fetch, url, purpose=purpose))
+        else:
+            try:
+                content = await single_flight.do(('http', url), partial(self.http_fetcher.fetch, url))
+            except (GXMNetworkError, GXMTimeoutError) as e:
+                # Protected pages often only open in a browser, only a challenge is learned, not a transient error
+                return await self._load_rendered_page(url, to_parse_images, purpose, capture,
+                                                      learn=e.args[1] == 403)
+
+        # Parsed once for the render detection, the content finder and the scraper
+        document = Document(content)
+        if not render and self.looks_script_rendered(document, to_parse_images):
+            return await self._load_rendered_page(url, to_parse_images, purpose, capture)
+        soup = document.find_content(to_parse_images)
 
         # Auto-fallback logic
         is_supported: bool = True if to_parse_images else len(soup.text(True, "", True)) > 150
         if not is_supported:
             if not render:
-                print('Website needs rendering, switching strategy...')
-                return await self.load_page(url, to_parse_images, render=True)
+                return await self._load_rendered_page(url, to_parse_images, purpose, capture)
             else:
                 raise GXMDownloaderError("Website not supported", 422)
 
+        if not render:
+            # The render verdicts are learned from the content signals
+            strategy_selector.set_verdict(domain, purpose, False)
         return soup, render
 
+    async def _load_rendered_page(self, url: str, to_parse_images: bool, purpose: str, capture: ImageCapture = None,
+                                  learn: bool = True):
+        if learn:
+            self.learn_render(urlparse(url).netloc, purpose)
+        return await self.load_page(url, to_parse_images, render=True, purpose=purpose, capture=capture)
+
+    @staticmethod
+    def learn_render(domain: str, purpose: str):
+        print('Website needs rendering, switching strategy...')
+        strategy_selector.set_verdict(domain, purpose, True)
+
+    @staticmethod
+    def looks_script_rendered(document: Document, to_parse_images: bool) -> bool:
+        """Whether an HTTP response misses content that only a browser render would produce"""
+        if document.needs_rendering(to_parse_images):
+            return True
+        return to_parse_images and document.has_script_rendered_images()
+
     @staticmethod
     async def run_scraper_with_timeout(
             scraper_func: Callable,
             soup: Node,
-            timeout_s: float = 2.0,
+            timeout_s: float = SCRAPER_TIMEOUT,
     ):
+        """
+        Runs a scraper on soup.
+
+        Generated scrapers run in the scraper worker processes, killed past timeout_s or their CPU limit. The
+        built-in heuristic scrapers are trusted and run in a thread.
+        """
+        if isinstance(scraper_func, CompiledScraper):
+            return await scraper_pool.run(scraper_func, soup, timeout_s)
         try:
             async with asyncio.timeout(timeout_s):
                 return await asyncio.to_thread(scraper_func, soup)
@@ -90,25 +257,39 @@ class RequestParser(IMangaParser):
 
     @staticmethod
     async def get_scraper_func(url: str, soup: Node, purpose: str,
-                               current_render_state: bool = False) -> Callable:
+                               current_render_state: bool = False) -> Callable | None:
         domain = urlparse(url).netloc
 
         compiled_function = registry.get_scraper_func(domain, purpose)
         if compiled_function:
             return compiled_function
 
+        # Concurrent callers share one generation per domain and purpose
+        return await single_flight.do(('scraper', domain, purpose), partial(
+            RequestParser._load_scraper_func, url, soup, purpose, current_render_state))
+
+    @staticmethod
+    async def _load_scraper_func(url: str, soup: Node, purpose: str, current_render_state: bool) -> Callable | None:
+        domain = urlparse(url).netloc
         scraper_file, _ = registry.get_scraper_file(domain, purpose)
         if scraper_file.exists():
             code = scraper_file.read_text()
+        elif heuristic_func := get_heuristic_scraper(purpose, soup):
+            # A common layout, no scraper to generate
+            registry.set_scraper_func(domain, purpose, heuristic_func)
+            return heuristic_func
         else:
-            html_minified = minify_html(soup.html)
-            code = await code_generator.generate_manga_code(purpose, html_minified, url)
+            # Only persisted by scrape() once it returned data
+            distilled = distill_html(soup)
+            print(f'Generating the {purpose} scraper of {domain} ({distilled})...')
+            code = await get_code_generator().generate_manga_code(purpose, distilled.html, url)
 
             if code.lower() == "no":
+                if not current_render_state:
+                    return None  # The static page may lack the data, the rendered one gets its own scraper
                 raise GXMDownloaderError("Website not supported", 422)
 
         scraper_func = CodeCompiler.compile_code(code, purpose)
-        registry.set_scraper_file(scraper_file, code, render=current_render_state)
         registry.set_scraper_func(domain, purpose, scraper_func)
 
         return scraper_func
@@ -116,6 +297,12 @@ class RequestParser(IMangaParser):
     @classmethod
     async def close(cls):
         """Close all sessions on shutdown"""
-        await cls.http_fetcher.close()
-        await cls.render_fetcher.close()
+        for task in cls._speculations:
+            task.cancel()
+        await asyncio.gather(*cls._speculations, return_exceptions=True)
+        scraper_pool.close()
+        for name in ('http_fetcher', 'render_fetcher'):
+            fetcher = vars(cls).get(name)
+            if fetcher is not None and not isinstance(fetcher, LazyFetcher):  # Only the fetchers used
+                await fetcher.close()
         cls._executor.shutdown(wait=True)
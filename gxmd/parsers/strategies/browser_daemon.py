@@ -0,0 +1,174 @@
+"""
+Long-lived Chromium shared by gxmd runs over the Chrome DevTools Protocol.
+
+    gxmd-browser start    # launch the daemon in the background
+    gxmd-browser status
+    gxmd-browser stop
+
+While the daemon runs, `PlaywrightStrategy` attaches to it with `connect_over_cdp` instead of launching Chromium,
+so repeated CLI and library calls skip the browser cold start. The daemon checks the health of its browser and
+restarts it when it crashes or stops answering.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+from gxmd.config import BROWSER_DAEMON_FILE, BROWSER_DAEMON_PORT
+
+HEALTH_INTERVAL = 5  # Seconds between two health checks
+START_TIMEOUT = 30  # Seconds `start` waits for the daemon to be ready
+STOP_TIMEOUT = 10  # Seconds `stop` waits for the daemon to exit before killing it
+
+
+def get_state_path() -> Path:
+    return Path(os.path.expanduser(BROWSER_DAEMON_FILE))
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Running under another user
+    return True
+
+
+def read_state() -> dict | None:
+    """Returns the state of the running daemon ({pid, port, endpoint}), None if it is not running"""
+    try:
+        state = json.loads(get_state_path().read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return state if is_running(state.get('pid', 0)) else None
+
+
+def get_endpoint() -> str | None:
+    """Returns the CDP endpoint of the running daemon"""
+    state = read_state()
+    return state['endpoint'] if state else None
+
+
+async def probe(endpoint: str, timeout: float = 2) -> bool:
+    """Whether the DevTools endpoint answers"""
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+            async with session.get(f"{endpoint}/json/version") as resp:
+                return resp.status == 200
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+
+
+async def serve(port: int = BROWSER_DAEMON_PORT):
+    """Runs the browser until SIGTERM/SIGINT, restarting it whenever the health check fails"""
+    from playwright.async_api import async_playwright, Error
+    from gxmd.parsers.strategies.playwright_strategy import BROWSER_ARGS
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    endpoint = f"http://127.0.0.1:{port}"
+    state_path = get_state_path()
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    async with async_playwright() as playwright:
+        try:
+            while not stop.is_set():
+                browser = await playwright.chromium.launch(
+                    headless=True, args=[*BROWSER_ARGS, f'--remote-debugging-port={port}'])
+                state_path.write_text(json.dumps({'pid': os.getpid(), 'port': port, 'endpoint': endpoint}),
+                                      encoding='utf-8')
+                print(f"Browser listening on {endpoint}", flush=True)
+
+                while not stop.is_set() and browser.is_connected() and await probe(endpoint):
+                    try:
+                        await asyncio.wait_for(stop.wait(), HEALTH_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                if not stop.is_set():
+                    print("Browser is unhealthy, restarting...", flush=True)
+                try:
+                    await browser.close()
+                except Error:
+                    pass
+        finally:
+            state_path.unlink(missing_ok=True)
+
+
+def start(port: int = BROWSER_DAEMON_PORT) -> dict:
+    """Launches the daemon in the background and waits until its browser is ready"""
+    state = read_state()
+    if state is not None:
+        return state
+    log_path = get_state_path().with_suffix('.log')
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'ab') as log:
+        subprocess.Popen([sys.executable, '-m', 'gxmd.parsers.strategies.browser_daemon', 'serve', '--port', str(port)],
+                         stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        state = read_state()
+        if state is not None and asyncio.run(probe(state['endpoint'])):
+            return state
+        time.sleep(0.2)
+    raise TimeoutError(f"The browser daemon did not start, see {log_path}")
+
+
+def stop(timeout: float = STOP_TIMEOUT) -> bool:
+    """
+    Stops the running daemon, returns False if none was running.
+
+    A daemon still running after `timeout` seconds is killed with its browser.
+    """
+    state = read_state()
+    if state is None:
+        return False
+    pid = state['pid']
+    os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + timeout
+    while is_running(pid):
+        if time.monotonic() >= deadline:
+            try:
+                # `start` runs the daemon in its own session, its process group includes the browser
+                os.killpg(pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                os.kill(pid, signal.SIGKILL)
+            get_state_path().unlink(missing_ok=True)  # Left behind by the killed daemon
+            break
+        time.sleep(0.1)
+    return True
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(prog='gxmd-browser', description="Shared browser daemon of gxmd")
+    parser.add_argument('command', choices=['start', 'stop', 'status', 'serve'])
+    parser.add_argument('--port', type=int, default=BROWSER_DAEMON_PORT, help='DevTools port of the browser')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve(args.port))
+    elif args.command == 'start':
+        print(f"Browser daemon running on {start(args.port)['endpoint']}")
+    elif args.command == 'stop':
+        print("Browser daemon stopped" if stop() else "Browser daemon is not running")
+    else:
+        state = read_state()
+        if state is None:
+            print("Browser daemon is not running")
+            sys.exit(1)
+        healthy = asyncio.run(probe(state['endpoint']))
+        print(f"Browser daemon running on {state['endpoint']} (pid {state['pid']}, "
+              f"{'healthy' if healthy else 'unhealthy'})")
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,55 @@
+import os
+
+from playwright.async_api import Browser, Error
+
+from gxmd.parsers.strategies.page_pool import PagePool
+
+
+def get_rss(pid: int) -> int:
+    """Resident memory of a process in bytes, 0 where /proc is not available"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class BrowserShard:
+    """
+    A browser process of the render pool with its own pages (tab budget).
+
+    Attributes:
+        in_flight (int): Renders running on the browser, used for the least-loaded dispatch.
+        renders (int): Renders dispatched to the browser since it was launched.
+        retired (bool): No new renders are dispatched, the browser is closed once the running ones end.
+    """
+
+    def __init__(self, browser: Browser, pool: PagePool):
+        self.browser = browser
+        self.pool = pool
+        self.in_flight = 0
+        self.renders = 0
+        self.retired = False
+
+    @property
+    def is_available(self) -> bool:
+        return not self.retired and self.browser.is_connected()
+
+    async def get_memory(self) -> int:
+        """Resident memory of the browser and its renderer processes in bytes"""
+        try:
+            session = await self.browser.new_browser_cdp_session()
+            try:
+                info = await session.send('SystemInfo.getProcessInfo')
+            finally:
+                await session.detach()
+        except Error:
+            return 0
+        return sum(get_rss(process['id']) for process in info.get('processInfo', []))
+
+    async def close(self):
+        await self.pool.close()
+        try:
+            await self.browser.close()
+        except Error:
+            pass  # Crashed
@@ -1,5 +1,6 @@
 import asyncio
 from functools import partial
+from http.cookies import Morsel
 from urllib.parse import urlparse
 
 import aiohttp
@@ -8,46 +9,107 @@ import cloudscraper
 from gxmd.abstracts.fetch_strategy import FetchStrategy
 from gxmd.config import USER_AGENT
 from gxmd.exceptions import GXMTimeoutError, GXMNetworkError
+from gxmd.services.cookie_store import cookie_store
+from gxmd.services.rate_limiter import rate_limiter
+from gxmd.services.single_flight import single_flight
+
+CHALLENGE_STATUSES = (403, 429, 503)  # Statuses of a rejected clearance
 
 
 class HttpClientStrategy(FetchStrategy):
-    """Handles both standard aiohttp and cloudscraper-bypassed sessions."""
+    """
+    Handles both standard aiohttp and cloudscraper-bypassed sessions.
+
+    The cookies of the cloudscraper challenge are persisted in the cookie store with its User-Agent, later runs
+    reuse them and only solve the challenge again once they expired or got rejected. The cookies the sites set
+    during the run are persisted on close, not the stored ones the sessions were seeded with.
+    """
 
     def __init__(self, executor):
         self.executor = executor
         self.sessions: dict[str, aiohttp.ClientSession] = {}
+        self.session_urls: dict[str, str] = {}
+        self.bootstrapped: set[str] = set()  # Domains whose challenge was solved by this run
+        self.set_cookies: dict[str, dict[tuple[str, str, str], Morsel]] = {}  # Cookies set by the responses, per domain
 
     async def fetch(self, url: str) -> str:
-        domain = urlparse(url).netloc
+        await rate_limiter.acquire(url)
+        return await self._fetch(url)
 
+    async def _fetch(self, url: str) -> str:
+        domain = urlparse(url).netloc
         if domain not in self.sessions:
-            loop = asyncio.get_event_loop()
-            scraper = cloudscraper.create_scraper()
-            resp = await loop.run_in_executor(
-                self.executor, partial(scraper.get, url, timeout=10)
-            )
-            cookies = {k: v for k, v in resp.cookies.items()}
-
-            connector = aiohttp.TCPConnector(limit_per_host=20, ttl_dns_cache=300)
-            self.sessions[domain] = aiohttp.ClientSession(
-                connector=connector,
-                cookies=cookies,
-                headers={'User-Agent': USER_AGENT},
-                timeout=aiohttp.ClientTimeout(total=10)
-            )
-            return resp.text
+            if not cookie_store.get_cookies(url):
+                return await self._bootstrap_once(url)
+            self.sessions[domain] = self._create_session(url)
 
         try:
             async with self.sessions[domain].get(url) as resp:
-                resp.raise_for_status()
-                return await resp.text()
+                self._keep_cookies(domain, resp)
+                rejected = resp.status in CHALLENGE_STATUSES and domain not in self.bootstrapped
+                if not rejected:
+                    resp.raise_for_status()
+                    return await resp.text()
         except asyncio.TimeoutError as e:
             raise GXMTimeoutError(f"HTTP request timed out for: {url}", 504) from e
         except aiohttp.ClientResponseError as e:
-            raise GXMNetworkError(f"HTTP {e.status} error for: {url}, please try again later", 403) from e
+            raise GXMNetworkError(f"HTTP {e.status} error for: {url}, please try again later", e.status) from e
         except aiohttp.ClientError as e:
             raise GXMNetworkError(f"Connection error for: {url}", 500) from e
 
+        # The stored clearance was rejected, solve the challenge again
+        cookie_store.invalidate(url)
+        return await self._bootstrap_once(url)
+
+    async def _bootstrap_once(self, url: str) -> str:
+        """Concurrent fetches of a domain share one challenge, the others then fetch their URL with its session"""
+        content, bootstrap_url = await single_flight.do(('bootstrap', urlparse(url).netloc),
+                                                        partial(self._bootstrap, url))
+        # The followers already took their rate-limit token
+        return content if bootstrap_url == url else await self._fetch(url)
+
+    async def _bootstrap(self, url: str) -> tuple[str, str]:
+        """cloudscraper → steal cookies → aiohttp"""
+        domain = urlparse(url).netloc
+        loop = asyncio.get_event_loop()
+        scraper = cloudscraper.create_scraper()
+        resp = await loop.run_in_executor(
+            self.executor, partial(scraper.get, url, timeout=10)
+        )
+        if not resp.ok:
+            raise GXMNetworkError(f"HTTP {resp.status_code} error for: {url}, please try again later",
+                                  resp.status_code)
+        cookie_store.update_from_jar(url, scraper.cookies, scraper.headers.get('User-Agent'))
+        self.bootstrapped.add(domain)
+        previous_session = self.sessions.get(domain)
+        self.sessions[domain] = self._create_session(url)
+        if previous_session is not None:
+            await previous_session.close()
+        return resp.text, url
+
+    def _create_session(self, url: str) -> aiohttp.ClientSession:
+        self.session_urls[urlparse(url).netloc] = url
+        connector = aiohttp.TCPConnector(limit_per_host=20, ttl_dns_cache=300)
+        return aiohttp.ClientSession(
+            connector=connector,
+            cookies=cookie_store.get_cookies(url),
+            headers={'User-Agent': cookie_store.get_user_agent(url) or USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+
+    def _keep_cookies(self, domain: str, resp: aiohttp.ClientResponse):
+        """Collects the cookies set by a response and the redirects that led to it"""
+        cookies = self.set_cookies.setdefault(domain, {})
+        for response in (*resp.history, resp):
+            for morsel in response.cookies.values():
+                cookies[(morsel.key, morsel['domain'], morsel['path'])] = morsel
+
     async def close(self):
-        for session in self.sessions.values():
+        for domain, session in self.sessions.items():
+            # Keep the cookies set during the run
+            if cookies := self.set_cookies.get(domain):
+                url = self.session_urls[domain]
+                cookie_store.update_from_morsels(url, cookies.values(), session.headers.get('User-Agent'))
             await session.close()
+        self.sessions.clear()
+        self.set_cookies.clear()
@@ -0,0 +1,167 @@
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route, Error
+
+from gxmd.config import INTERCEPTION_FILE
+
+# Resources never needed to read the HTML of a page
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'})
+# Third-party requests blocked unless allowlisted, 'frame' stands for iframe documents
+THIRD_PARTY_BLOCKED_TYPES = frozenset({'frame', 'websocket', 'eventsource'})
+DENYLIST = (
+    'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+    'adservice.google.com', 'facebook.net', 'connect.facebook.net', 'hotjar.com', 'scorecardresearch.com',
+    'quantserve.com', 'amazon-adsystem.com', 'adnxs.com', 'taboola.com', 'outbrain.com', 'popads.net',
+    'propellerads.com', 'disqus.com', 'onesignal.com', 'clarity.ms',
+)
+
+
+def matches_domain(host: str, domains) -> bool:
+    return any(host == domain or host.endswith(f".{domain}") for domain in domains)
+
+
+def get_site(host: str) -> str:
+    """Approximates the registrable domain of a host (a.b.example.com → example.com, x.example.co.uk → example.co.uk)"""
+    labels = host.split('.')
+    if len(labels) > 2 and len(labels[-1]) == 2 and len(labels[-2]) <= 3:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+
+@dataclass
+class InterceptionStats:
+    """Requests allowed and blocked by reason (resource type, 'third-party' or 'denylist')"""
+    allowed: int = 0
+    blocked: Counter = field(default_factory=Counter)
+
+    def merge(self, other: 'InterceptionStats'):
+        self.allowed += other.allowed
+        self.blocked.update(other.blocked)
+
+    def __str__(self):
+        reasons = ', '.join(f"{reason}: {count}" for reason, count in self.blocked.most_common())
+        return f"{self.allowed} allowed, {self.blocked.total()} blocked" + (f" ({reasons})" if reasons else "")
+
+
+@dataclass
+class SiteRules:
+    allow: tuple[str, ...] = ()
+    deny: tuple[str, ...] = ()
+    blocked_types: frozenset[str] = BLOCKED_RESOURCE_TYPES
+    third_party_blocked_types: frozenset[str] = THIRD_PARTY_BLOCKED_TYPES
+
+
+class InterceptionPolicy:
+    """
+    Decides which requests of a rendered page are aborted.
+
+    Requests are blocked by resource type, by third-party domain and by a denylist of ad and analytics domains, the
+    main document is always loaded and scripts, XHR and fetch requests of the site are kept for the SPA hydration.
+    Rules are read from INTERCEPTION_FILE, where ``"*"`` overrides the defaults and a domain overrides them for
+    itself and its subdomains, e.g.
+    ``{"example.com": {"allow": ["cdn.example.net"], "deny": ["ads.example.com"], "block_types": ["image"]}}``.
+    Allowlisted domains are never blocked.
+    """
+
+    def __init__(self, path: str = INTERCEPTION_FILE):
+        self.path = Path(os.path.expanduser(path))
+        self.config: dict[str, dict] = self._load()
+        self._rules: dict[str, SiteRules] = {}
+
+    def get_rules(self, host: str) -> SiteRules:
+        if host not in self._rules:
+            default = self.config.get('*', {})
+            domain = next((domain for domain in self.config if domain != '*' and matches_domain(host, (domain,))),
+                          None)
+            site = self.config.get(domain, {}) if domain else {}
+            self._rules[host] = SiteRules(
+                allow=tuple(default.get('allow', ())) + tuple(site.get('allow', ())),
+                deny=DENYLIST + tuple(default.get('deny', ())) + tuple(site.get('deny', ())),
+                blocked_types=frozenset(
+                    site.get('block_types', default.get('block_types', BLOCKED_RESOURCE_TYPES))),
+                third_party_blocked_types=frozenset(site.get(
+                    'third_party_block_types', default.get('third_party_block_types', THIRD_PARTY_BLOCKED_TYPES))),
+            )
+        return self._rules[host]
+
+    def get_block_reason(self, url: str, resource_type: str, is_frame: bool, page_host: str,
+                         allowed_types: frozenset[str] = frozenset()) -> str | None:
+        """
+        Returns why a request is blocked, None if it is allowed.
+
+        Args:
+            url (str): The requested URL.
+            resource_type (str): The Playwright resource type of the request.
+            is_frame (bool): Whether the request is a document of an iframe.
+            page_host (str): The host of the rendered page.
+            allowed_types (frozenset[str]): Resource types loaded despite the rules, e.g. the images of a capture.
+        """
+        if resource_type == 'document' and not is_frame:
+            return None
+        host = urlparse(url).hostname or ''
+        if not host:
+            return None  # data: and blob: URLs
+        rules = self.get_rules(page_host)
+        if matches_domain(host, rules.allow):
+            return None
+        if matches_domain(host, rules.deny):
+            return 'denylist'
+        if resource_type in rules.blocked_types and resource_type not in allowed_types:
+            return resource_type
+        if get_site(host) != get_site(page_host):
+            if (is_frame and 'frame' in rules.third_party_blocked_types) or \
+                    resource_type in rules.third_party_blocked_types:
+                return 'third-party'
+        return None
+
+    async def attach(self, page: Page, url: str,
+                     allowed_types: frozenset[str] = frozenset()) -> tuple[Callable, InterceptionStats]:
+        """
+        Routes the requests of a page through the policy for the render of url.
+
+        Args:
+            page (Page): The page about to load url.
+            url (str): The rendered URL.
+            allowed_types (frozenset[str]): Resource types loaded despite the rules.
+
+        Returns:
+            The route handler, to remove with `page.unroute('**/*', handler)`, and the counters of the render.
+        """
+        page_host = urlparse(url).hostname or ''
+        stats = InterceptionStats()
+
+        async def handle(route: Route):
+            request = route.request
+            try:
+                is_frame = request.is_navigation_request() and request.frame.parent_frame is not None
+            except Error:
+                is_frame = False  # Service worker requests have no frame
+            reason = self.get_block_reason(request.url, request.resource_type, is_frame, page_host, allowed_types)
+            try:
+                if reason is None:
+                    stats.allowed += 1
+                    await route.continue_()
+                else:
+                    stats.blocked[reason] += 1
+                    await route.abort('blockedbyclient')
+            except Error:
+                pass  # The page navigated away or was closed meanwhile
+
+        await page.route('**/*', handle)
+        return handle, stats
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+
+# Global instance
+interception_policy = InterceptionPolicy()
@@ -0,0 +1,154 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+from urllib.parse import urlparse
+
+from playwright.async_api import Browser, BrowserContext, Page, Error
+
+from gxmd.config import MAX_TABS, MAX_CONTEXT_USES
+
+PAGE_RESET_TIMEOUT = 3000  # ms allowed to navigate a released page back to about:blank
+
+
+class PooledContext:
+    """A browser context of the pool and its usage counters"""
+
+    def __init__(self, context: BrowserContext, key: str):
+        self.context = context
+        self.key = key
+        self.uses = 0
+        self.leased = 0
+        self.retired = False
+
+
+class PagePool:
+    """
+    Pool of warm browser contexts and pages shared by the renders.
+
+    Pages are reset to about:blank and recycled between navigations instead of being created and closed for every
+    URL. At most `max_pages` pages are open at once, idle pages are evicted least recently used first when a new one
+    is needed. A context is retired after `max_context_uses` navigations, so leaked memory and stale state do not
+    accumulate, and closed once its last page is released.
+
+    Args:
+        max_pages (int): Maximum number of open pages, which is also the number of concurrent renders.
+        max_context_uses (int): Navigations served by a context before it is recycled.
+        affinity (bool): Keep one context per domain so cookies and cache survive across chapters of a site.
+        context_options (dict): Keyword arguments of `Browser.new_context`.
+    """
+
+    def __init__(self, max_pages: int = MAX_TABS, max_context_uses: int = MAX_CONTEXT_USES, affinity: bool = True,
+                 context_options: dict | None = None):
+        self.max_pages = max_pages
+        self.max_context_uses = max_context_uses
+        self.affinity = affinity
+        self.context_options = context_options or {}
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+        self._contexts: dict[str, PooledContext] = {}
+        self._idle: list[tuple[PooledContext, Page]] = []  # Least recently used first
+        self._page_count = 0
+
+    @asynccontextmanager
+    async def page(self, browser: Browser, url: str) -> AsyncIterator[Page]:
+        """
+        Leases a page to navigate to url, it is reset and returned to the pool on exit.
+
+        Args:
+            browser (Browser): The browser creating the contexts.
+            url (str): The URL about to be loaded, used for the context affinity.
+        """
+        async with self._semaphore:
+            pooled, page = await self._lease(browser, self.get_key(url))
+            try:
+                yield page
+            finally:
+                await self._release(pooled, page)
+
+    def get_key(self, url: str) -> str:
+        return (urlparse(url).hostname or '') if self.affinity else ''
+
+    async def close(self):
+        """Closes every context of the pool"""
+        contexts = {id(pooled): pooled for pooled, _ in self._idle}
+        contexts.update({id(pooled): pooled for pooled in self._contexts.values()})
+        self._contexts.clear()
+        self._idle.clear()
+        self._page_count = 0
+        for pooled in contexts.values():
+            await self._close_context(pooled)
+
+    async def _lease(self, browser: Browser, key: str) -> tuple[PooledContext, Page]:
+        async with self._lock:
+            pooled = self._contexts.get(key)
+            if pooled is None:
+                pooled = PooledContext(await browser.new_context(**self.context_options), key)
+                self._contexts[key] = pooled
+            pooled.uses += 1
+            if pooled.uses >= self.max_context_uses:
+                # No new leases, closed once its pages are released
+                pooled.retired = True
+                del self._contexts[key]
+
+            page = self._take_idle_page(pooled)
+            if page is None:
+                if self._page_count >= self.max_pages:
+                    await self._evict_idle_page()
+                page = await pooled.context.new_page()
+                self._page_count += 1
+            pooled.leased += 1
+            return pooled, page
+
+    def _take_idle_page(self, pooled: PooledContext) -> Page | None:
+        for i in range(len(self._idle) - 1, -1, -1):
+            idle_context, page = self._idle[i]
+            if idle_context is not pooled:
+                continue
+            del self._idle[i]
+            if not page.is_closed():
+                return page
+            self._page_count -= 1
+        return None
+
+    async def _evict_idle_page(self):
+        # A free semaphore slot guarantees that at least one open page is idle
+        pooled, page = self._idle.pop(0)
+        await self._close_page(page)
+        if pooled.leased == 0 and all(idle_context is not pooled for idle_context, _ in self._idle):
+            if self._contexts.get(pooled.key) is pooled:
+                del self._contexts[pooled.key]
+            await self._close_context(pooled)
+
+    async def _release(self, pooled: PooledContext, page: Page):
+        pooled.leased -= 1
+        if not pooled.retired and await self._reset_page(page):
+            self._idle.append((pooled, page))
+        else:
+            await self._close_page(page)
+        if pooled.retired and pooled.leased == 0:
+            await self._close_context(pooled)
+
+    @staticmethod
+    async def _reset_page(page: Page) -> bool:
+        """Health check of a released page, navigating away stops its scripts and frees the DOM"""
+        if page.is_closed():
+            return False
+        try:
+            await page.goto('about:blank', timeout=PAGE_RESET_TIMEOUT)
+        except Error:
+            return False
+        return True
+
+    async def _close_page(self, page: Page):
+        self._page_count -= 1
+        try:
+            await page.close()
+        except Error:
+            pass  # Already closed with its context or browser
+
+    @staticmethod
+    async def _close_context(pooled: PooledContext):
+        try:
+            await pooled.context.close()
+        except Error:
+            pass
@@ -1,60 +1,114 @@
 import asyncio
 
-from playwright.async_api import Browser, async_playwright, Page, BrowserContext
-from playwright.async_api import TimeoutError
+from playwright.async_api import Browser, async_playwright
+from playwright.async_api import TimeoutError, Error
 
 from gxmd.abstracts.fetch_strategy import FetchStrategy
-from gxmd.config import MAX_TABS
+from gxmd.config import BROWSER_SHARDS, BROWSER_MAX_RENDERS, BROWSER_MAX_MEMORY
 from gxmd.exceptions import GXMTimeoutError
+from gxmd.parsers.strategies.browser_daemon import get_endpoint
+from gxmd.parsers.strategies.browser_shard import BrowserShard
+from gxmd.parsers.strategies.interception import InterceptionStats, interception_policy
+from gxmd.parsers.strategies.page_pool import PagePool
+from gxmd.parsers.strategies.readiness import readiness
+from gxmd.services.image_capture import ImageCapture
+from gxmd.services.rate_limiter import rate_limiter
+
+BROWSER_ARGS = [
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    # Resources are blocked by the interception policy
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+]
+MEMORY_CHECK_INTERVAL = 10  # Renders between two memory measurements of a browser
 
 
 class PlaywrightStrategy(FetchStrategy):
+    """
+    Renders pages with a pool of browser processes (shards).
+
+    Renders are dispatched to the least-loaded shard, a new browser is launched while every running one is busy and
+    fewer than `shard_count` run. Each shard has its own pages (MAX_TABS), so one Chromium process is not the CPU and
+    memory choke point. A browser is recycled after `max_renders` renders or once it uses more than `max_memory`
+    bytes, and a render whose browser crashed is retried once on another shard, so a crash only affects the
+    renders of its own browser.
+
+    With `use_daemon` a single shard is used and never recycled: more connections to the shared browser would
+    not add processes, and the daemon restarts its browser itself.
+    """
     _instance = None
     _playwright = None
-    _browser: Browser
     _initialized = False
 
-    # NEW: global per-strategy concurrency limit (10 "tabs" max)
-    _tab_semaphore: asyncio.Semaphore | None = None
-    _max_tabs: int = MAX_TABS
+    _shards: list[BrowserShard] = []
+    _lock: asyncio.Lock | None = None
+    shard_count: int = BROWSER_SHARDS
+    max_renders: int = BROWSER_MAX_RENDERS
+    max_memory: int = BROWSER_MAX_MEMORY
+    # Attach to the shared browser daemon when it runs (see browser_daemon)
+    use_daemon: bool = False
+    # Requests allowed and blocked by the interception policy over all renders
+    stats = InterceptionStats()
 
     def __new__(cls):
         if cls._instance is None:
             if cls._instance is None:
                 cls._instance = super().__new__(cls)
-                # Initialize semaphore once (when singleton is created)
-                if cls._tab_semaphore is None:
-                    cls._tab_semaphore = asyncio.Semaphore(cls._max_tabs)
+                # Initialize the shards once (when singleton is created)
+                cls._shards = []
+                cls._lock = asyncio.Lock()
         return cls._instance
 
+    @staticmethod
+    def create_pool() -> PagePool:
+        # Minimal context: no viewport, no extras
+        return PagePool(context_options=dict(viewport=None, java_script_enabled=True, ignore_https_errors=True))
+
     @classmethod
     def is_initialized(cls):
         return cls._initialized is True
 
-    async def fetch(self, url: str, timeout: int = 15000) -> str:
-        """Render any URL using the singleton browser"""
-        browser = await self.ensure_browser()
-        page: Page | None = None
-        context: BrowserContext | None = None
-
-        # Acquire a "tab slot" for the entire render lifecycle
-        assert self._tab_semaphore is not None
-        async with self._tab_semaphore:
+    async def fetch(self, url: str, timeout: int = 15000, capture: ImageCapture = None, purpose: str = None) -> str:
+        """
+        Render any URL using the least-loaded browser
+
+        Args:
+            url (str): The URL to render.
+            timeout (int): Navigation timeout in milliseconds.
+            capture (ImageCapture, optional): Load the images of the page and record their responses.
+            purpose (str, optional): What the page is loaded for ('manga_info', 'chapter_images').
+        """
+        for attempt in range(2):
+            shard = await self.acquire_shard()
             try:
-                # Minimal context: no viewport, no extras
-                context = await browser.new_context(
-                    viewport=None,
-                    java_script_enabled=True,
-                    ignore_https_errors=True
-                )
-                page = await context.new_page()
-                # Block all non-HTML/CSS resources upfront
-                # await page.route("**/*.{css,woff,woff2,ttf,eot,svg,png,jpg,jpeg,gif,webp}", lambda route: route.abort())
-
+                return await self._render(shard, url, timeout, capture, purpose)
+            except Error:
+                if attempt or shard.browser.is_connected():
+                    raise
+                print(f"Browser crashed while loading: {url}, retrying on another one")
+            finally:
+                await self.release_shard(shard)
+
+    async def _render(self, shard: BrowserShard, url: str, timeout: int, capture: ImageCapture | None,
+                      purpose: str | None) -> str:
+        # Lease a warm page for the entire render lifecycle
+        async with shard.pool.page(shard.browser, url) as page:
+            # Block images, fonts, ads... upfront
+            handler, render_stats = await interception_policy.attach(
+                page, url, frozenset({'image'}) if capture is not None else frozenset())
+            tracker = readiness.track(page)
+            if capture is not None:
+                capture.attach(page)
+            try:
+                # Tokens are only spent once a page is leased, right before the navigation
+                await rate_limiter.acquire(url)
                 # Ultra-fast navigation for HTML only
                 await page.goto(url, wait_until='commit', timeout=timeout)
-                await page.wait_for_load_state()
-                await asyncio.sleep(0.9)  # SPA hydration
+                await page.wait_for_load_state('domcontentloaded', timeout=timeout)
+                await readiness.wait(page, url, tracker, purpose)  # SPA hydration
 
                 # Get raw HTML
                 html = await page.content()
@@ -66,43 +120,75 @@ class PlaywrightStrategy(FetchStrategy):
             except Exception as e:
                 raise e
             finally:
-                # Only close here (avoid double-close)
-                if page is not None:
-                    await page.close()
-                if context is not None:
-                    await context.close()
-
-    async def ensure_browser(self) -> Browser:
-        """Lazy init - creates browser only once"""
-        if not self._initialized:
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(headless=True, args=['--no-sandbox',
-                                                                                        '--disable-blink-features=AutomationControlled',
-                                                                                        '--disable-dev-shm-usage',
-                                                                                        '--disable-images',
-                                                                                        '--disable-css',
-                                                                                        # Native image blocking
-                                                                                        '--blink-settings=imagesEnabled=false',
-                                                                                        '--disable-background-timer-throttling',
-                                                                                        '--disable-backgrounding-occluded-windows',
-                                                                                        '--disable-renderer-backgrounding'
-                                                                                        ])
-            print("✅ Singleton browser created!")
-            PlaywrightStrategy._initialized = True
-            return self._browser
-        return self._browser
+                tracker.close()
+                if capture is not None:
+                    await capture.detach(page, page.context)
+                self.stats.merge(render_stats)
+                try:
+                    await page.unroute('**/*', handler)
+                except Error:
+                    pass  # The page crashed, the pool replaces it
+
+    async def acquire_shard(self) -> BrowserShard:
+        """Returns the least-loaded browser, launching one while all are busy (lazy init)"""
+        async with self._lock:
+            if not self._initialized:
+                self._playwright = await async_playwright().start()
+                PlaywrightStrategy._initialized = True
+            for shard in [shard for shard in self._shards if not shard.browser.is_connected()]:
+                # Crashed, or restarted by the daemon
+                self._shards.remove(shard)
+                await shard.close()
+
+            available = [shard for shard in self._shards if shard.is_available]
+            shard = min(available, key=lambda s: s.in_flight, default=None)
+            shard_count = 1 if self.use_daemon else self.shard_count
+            if shard is None or (shard.in_flight and len(available) < shard_count):
+                shard = BrowserShard(await self._launch(), self.create_pool())
+                self._shards.append(shard)
+            shard.in_flight += 1
+            shard.renders += 1
+            return shard
+
+    async def release_shard(self, shard: BrowserShard):
+        shard.in_flight -= 1
+        if self.use_daemon:
+            return
+        if not shard.retired and shard.renders >= self.max_renders:
+            shard.retired = True
+        elif not shard.retired and self.max_memory and shard.renders % MEMORY_CHECK_INTERVAL == 0:
+            shard.retired = await shard.get_memory() > self.max_memory
+        if shard.retired and shard.in_flight == 0 and shard in self._shards:
+            self._shards.remove(shard)
+            await shard.close()
+
+    async def _launch(self) -> Browser:
+        """Connects to the browser daemon, falls back to launching a local browser"""
+        endpoint = get_endpoint() if self.use_daemon else None
+        if endpoint is not None:
+            try:
+                browser = await self._playwright.chromium.connect_over_cdp(endpoint, timeout=5000)
+                print(f"✅ Connected to the browser daemon at {endpoint}")
+                return browser
+            except Error as e:
+                print(f"Browser daemon unavailable ({e.message.splitlines()[0]}), launching a local browser")
+        browser = await self._playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+        print("✅ Singleton browser created!")
+        return browser
 
     async def close(self):
         """Close when done"""
         if self._initialized:
-            if self._browser:
-                await self._browser.close()
+            if self.stats.blocked:
+                print(f"🛡️ Render requests: {self.stats}")
+            readiness.save()
+            for shard in self._shards:
+                # Only disconnects from the daemon, its contexts were closed with the pool
+                await shard.close()
             if self._playwright:
                 await self._playwright.stop()
             PlaywrightStrategy._initialized = False
             PlaywrightStrategy._instance = None
-            # optional: keep semaphore, or reset it
-            # PlaywrightStrategy._tab_semaphore = asyncio.Semaphore(self._max_tabs)
 
 
 browser = PlaywrightStrategy()
@@ -0,0 +1,205 @@
+import asyncio
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Request, Error
+
+from gxmd.config import READINESS_FILE, READY_TIMEOUT, QUIET_WINDOW
+
+POLL_INTERVAL = 0.05
+LONG_REQUEST = 2.0  # Requests pending for longer (long polling, streams) do not delay the readiness
+MAX_LATENCIES = 20  # Readiness latencies kept per domain
+
+# Records the time of the last DOM mutation in the page, attributes are ignored since animations keep changing them
+OBSERVE_MUTATIONS_JS = """() => {
+    if (window.__gxmdObserver) return;
+    window.__gxmdMutatedAt = performance.now();
+    window.__gxmdObserver = new MutationObserver(() => { window.__gxmdMutatedAt = performance.now(); });
+    window.__gxmdObserver.observe(document, {childList: true, subtree: true, characterData: true});
+}"""
+DOM_IDLE_JS = "() => window.__gxmdObserver ? (performance.now() - window.__gxmdMutatedAt) / 1000 : null"
+# Finds the container of the reader images, the smallest element holding several images with a real src
+FIND_READER_SELECTOR_JS = """(minImages) => {
+    const isReal = (img) => { const src = img.getAttribute('src') || ''; return src && !src.startsWith('data:'); };
+    const counts = new Map();
+    for (const img of document.querySelectorAll('img')) {
+        if (!isReal(img)) continue;
+        let container = img.parentElement;
+        while (container && container.parentElement && container.querySelectorAll('img').length < 2)
+            container = container.parentElement;
+        if (container) counts.set(container, (counts.get(container) || 0) + 1);
+    }
+    let best = null, bestCount = 0;
+    for (const [container, count] of counts) if (count > bestCount) { best = container; bestCount = count; }
+    if (!best || bestCount < minImages || best === document.body || best === document.documentElement) return null;
+    let selector = best.tagName.toLowerCase();
+    if (best.id) selector = `#${CSS.escape(best.id)}`;
+    else if (best.classList.length) selector += `.${CSS.escape(best.classList[0])}`;
+    else return null;
+    return `${selector} img[src]:not([src^="data:"]):not([src=""])`;
+}"""
+
+
+class NetworkTracker:
+    """Counts the in-flight requests of a page"""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.pending: dict[Request, float] = {}
+        self.last_activity = time.monotonic()
+        page.on('request', self._on_request)
+        page.on('requestfinished', self._on_done)
+        page.on('requestfailed', self._on_done)
+
+    def is_idle(self, now: float) -> bool:
+        return all(now - started > LONG_REQUEST for started in self.pending.values())
+
+    def close(self):
+        self.page.remove_listener('request', self._on_request)
+        self.page.remove_listener('requestfinished', self._on_done)
+        self.page.remove_listener('requestfailed', self._on_done)
+
+    def _on_request(self, request: Request):
+        if request.resource_type not in ('websocket', 'eventsource'):
+            self.pending[request] = self.last_activity = time.monotonic()
+
+    def _on_done(self, request: Request):
+        if self.pending.pop(request, None) is not None:
+            self.last_activity = time.monotonic()
+
+
+class ReadinessDetector:
+    """
+    Waits until a rendered page is ready to be read, instead of a fixed hydration delay.
+
+    A page is ready when its DOM stopped mutating and its network was idle for `quiet_window` seconds, or as soon as
+    the reader selector learned for its domain (the container of the reader images with a real src) matches. The
+    reader selector is learned and used on chapter pages only, the images of the other pages (e.g. covers of related
+    manga) would mark a reader ready before its hydration.
+    The wait never exceeds `timeout`. Learned selectors and the latest readiness latencies of every domain are
+    persisted to READINESS_FILE.
+
+    Args:
+        path (str): The file of the learned selectors and latencies.
+        timeout (float): Ceiling of the wait in seconds, the page is read as is afterwards.
+        quiet_window (float): Seconds without DOM mutation and request for the page to be settled.
+        min_images (int): Images a container needs to be learned as the reader.
+    """
+
+    def __init__(self, path: str = READINESS_FILE, timeout: float = READY_TIMEOUT, quiet_window: float = QUIET_WINDOW,
+                 min_images: int = 3):
+        self.path = Path(os.path.expanduser(path))
+        self.timeout = timeout
+        self.quiet_window = quiet_window
+        self.min_images = min_images
+        self.domains: dict[str, dict] = self._load()
+
+    def track(self, page: Page) -> NetworkTracker:
+        """Starts tracking the requests of a page, call before its navigation"""
+        return NetworkTracker(page)
+
+    async def wait(self, page: Page, url: str, tracker: NetworkTracker, purpose: str = None) -> float:
+        """
+        Waits for the page to be ready and records the latency.
+
+        Args:
+            page (Page): The page, after its navigation was committed.
+            url (str): The loaded URL.
+            tracker (NetworkTracker): The tracker of the page requests.
+            purpose (str, optional): What the page is loaded for, the reader selector applies to 'chapter_images'.
+
+        Returns:
+            float: The seconds waited.
+        """
+        start = time.monotonic()
+        domain = urlparse(url).netloc
+        is_reader = purpose == 'chapter_images'
+        selector = self.domains.get(domain, {}).get('reader_selector') if is_reader else None
+
+        waiters = [asyncio.create_task(self._wait_settled(page, tracker))]
+        if selector:
+            waiters.append(asyncio.create_task(self._wait_selector(page, selector)))
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+            await asyncio.gather(*waiters, return_exceptions=True)
+
+        if is_reader and not selector and waiters[0] in done and waiters[0].exception() is None:
+            await self._learn_selector(page, domain)
+        latency = time.monotonic() - start
+        self.record_latency(domain, latency)
+        return latency
+
+    def record_latency(self, domain: str, latency: float):
+        latencies = self.domains.setdefault(domain, {}).setdefault('latencies', [])
+        latencies.append(round(latency, 3))
+        del latencies[:-MAX_LATENCIES]
+
+    def get_latency(self, domain: str) -> float | None:
+        """Median readiness latency of a domain"""
+        latencies = self.domains.get(domain, {}).get('latencies')
+        return statistics.median(latencies) if latencies else None
+
+    def save(self):
+        if not self.domains:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self.domains, indent=2), encoding='utf-8')
+
+    async def _wait_settled(self, page: Page, tracker: NetworkTracker):
+        await self._observe(page)
+        while True:
+            try:
+                dom_idle = await page.evaluate(DOM_IDLE_JS)
+            except Error:
+                dom_idle = None
+            if dom_idle is None:
+                # The page navigated (redirect), observe the new document
+                await self._observe(page)
+            else:
+                now = time.monotonic()
+                if dom_idle >= self.quiet_window and tracker.is_idle(now) and \
+                        now - tracker.last_activity >= self.quiet_window:
+                    return
+            await asyncio.sleep(POLL_INTERVAL)
+
+    @staticmethod
+    async def _observe(page: Page):
+        """Starts recording the DOM mutations of the current document"""
+        try:
+            await page.wait_for_load_state('domcontentloaded')
+            await page.evaluate(OBSERVE_MUTATIONS_JS)
+        except Error:
+            pass  # The execution context was destroyed by a navigation, the next poll observes the new document
+
+    @staticmethod
+    async def _wait_selector(page: Page, selector: str):
+        while True:
+            try:
+                return await page.wait_for_selector(selector, state='attached', timeout=0)
+            except Error:
+                await asyncio.sleep(POLL_INTERVAL)  # The page navigated, wait in the new document
+
+    async def _learn_selector(self, page: Page, domain: str):
+        try:
+            selector = await page.evaluate(FIND_READER_SELECTOR_JS, self.min_images)
+        except Error:
+            return
+        if selector:
+            self.domains.setdefault(domain, {})['reader_selector'] = selector
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+
+# Global instance
+readiness = ReadinessDetector()
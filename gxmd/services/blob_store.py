@@ -0,0 +1,92 @@
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+FICLONE = 0x40049409  # ioctl request of a copy-on-write clone (Btrfs, XFS...)
+
+
+def link_file(src: str, dst: str):
+    """Creates dst as a hardlink of src, falls back to a reflink then to a copy."""
+    tmp_path = f"{dst}.tmp"
+    Path(tmp_path).unlink(missing_ok=True)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        with open(src, 'rb') as src_file, open(tmp_path, 'wb') as dst_file:
+            try:
+                if fcntl is None:
+                    raise OSError(errno.EOPNOTSUPP, "reflinks are not supported")
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF):
+                    raise
+                shutil.copyfileobj(src_file, dst_file)
+    os.replace(tmp_path, dst)
+
+
+def hash_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """
+    Content-addressed image store shared by every manga downloaded to the same directory.
+
+    Images are stored once under their SHA-256 (``root/ab/cdef...``) and exported by linking, so
+    recurring credit pages and ads only use disk space once. An SQLite index maps image URLs to hashes,
+    a known URL is exported from the store without being downloaded again.
+
+    Args:
+        root (str): The store directory, on the same filesystem as the exports so blobs can be hardlinked.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(os.path.expanduser(root))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()  # Exporters ingest from their writer threads
+        self._db = sqlite3.connect(self.root / 'index.sqlite3', check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+        self._db.commit()
+
+    def get_blob_path(self, digest: str) -> str:
+        return str(self.root / digest[:2] / digest[2:])
+
+    def lookup(self, url: str) -> str | None:
+        """Returns the blob of an already downloaded URL"""
+        with self._lock:
+            row = self._db.execute("SELECT digest FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        blob_path = self.get_blob_path(row[0])
+        return blob_path if os.path.exists(blob_path) else None
+
+    def ingest(self, file_path: str, url: str) -> str:
+        """Moves a downloaded file into the store (or drops it if the content is known) and returns its blob."""
+        digest = hash_file(file_path)
+        blob_path = self.get_blob_path(digest)
+        if os.path.exists(blob_path):
+            os.unlink(file_path)
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            shutil.move(file_path, blob_path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO urls (url, digest) VALUES (?, ?)", (url, digest))
+            self._db.commit()
+        return blob_path
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,11 +1,23 @@
-from typing import Callable
+from dataclasses import dataclass
+from typing import Callable, Any
 
 from selectolax.parser import HTMLParser
 
 
+@dataclass(frozen=True)
+class CompiledScraper:
+    """A generated scraper with its source, which the scraper worker processes compile again"""
+    code: str
+    purpose: str
+    func: Callable
+
+    def __call__(self, node) -> Any:
+        return self.func(node)
+
+
 class CodeCompiler:
     @classmethod
-    def compile_code(cls, code: str, purpose="manga_info") -> Callable:
+    def compile_function(cls, code: str, purpose="manga_info") -> Callable | None:
         # Safely compile and return callable
         func = compile(code, '<scraper>', 'exec')
 
@@ -22,4 +34,9 @@ class CodeCompiler:
         function_name = f"parse_{purpose}"
         scraper_func = local_ns.get(function_name)
 
-        return scraper_func
\ No newline at end of file
+        return scraper_func
+
+    @classmethod
+    def compile_code(cls, code: str, purpose="manga_info") -> CompiledScraper | None:
+        scraper_func = cls.compile_function(code, purpose)
+        return CompiledScraper(code, purpose, scraper_func) if scraper_func is not None else None
@@ -1,6 +1,4 @@
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_core.output_parsers import StrOutputParser
-from langchain_openai import AzureChatOpenAI
+from functools import cache
 
 from gxmd.config import PARSE_MANGA_INFO_TEMPLATE, PARSE_CHAPTER_IMAGES_TEMPLATE
 
@@ -11,6 +9,11 @@ def get_template(purpose: str) -> str:
 
 class CodeGeneratorService:
     def __init__(self):
+        # langchain takes seconds to import, only the runs generating a scraper pay for it
+        from langchain_core.messages import SystemMessage
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_openai import AzureChatOpenAI
+
         llm = AzureChatOpenAI(deployment_name="gpt-5.2-chat")
         self.system_message = SystemMessage(
             "You're an expert Python developer specializing in high-performance web scraping using the `selectolax` library, Produce correct, ready-to-run code in Python directly without further info, if you cannot provide a solution for any reason, respond with 'No'.")
@@ -24,6 +27,8 @@ class CodeGeneratorService:
             return await self._invoke(populated_template)
 
     async def _invoke(self, message: str) -> str:
+        from langchain_core.messages import HumanMessage
+
         messages = [self.system_message,
                     HumanMessage(message)]
         code: str = await self.chain.ainvoke(messages)
@@ -31,5 +36,7 @@ class CodeGeneratorService:
         return code.strip().lstrip('```python').rstrip('```').strip()
 
 
-# Global instance
-code_generator = CodeGeneratorService()
+@cache
+def get_code_generator() -> CodeGeneratorService:
+    """Returns the global instance, created on first use"""
+    return CodeGeneratorService()
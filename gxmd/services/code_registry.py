@@ -12,7 +12,7 @@ class CodeRegistry:
         self._manga_scraper: dict[str, Callable] = {}  # Per-domain
         self._manga_chapter_scraper: dict[str, Callable] = {}  # Per-domain
 
-    def get_scraper_func(self, purpose: str, domain: str) -> Callable | None:
+    def get_scraper_func(self, domain: str, purpose: str) -> Callable | None:
         if purpose == "manga_info":
             if domain in self._manga_scraper:
                 return self._manga_scraper.get(domain)
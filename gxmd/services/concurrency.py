@@ -0,0 +1,145 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from pathlib import Path
+from urllib.parse import urlparse
+
+import aiohttp
+
+from gxmd.services.retry import is_host_failure
+
+
+def is_overload(error: BaseException) -> bool:
+    """Whether the error means the host is overloaded or throttling us (429, 5xx, resets, timeouts)."""
+    if isinstance(error, aiohttp.ClientResponseError) and error.status == 429:
+        return True
+    return is_host_failure(error)
+
+
+class LimiterSlot:
+    """A concurrency slot held for the duration of one request."""
+
+    def __init__(self, limiter: 'AdaptiveLimiter'):
+        self.limiter = limiter
+        self.started_at = time.monotonic()
+        self.latency: float | None = None
+
+    def request_sent(self):
+        """Restarts the latency clock, the slot may be held while waiting for the rate limiter."""
+        self.started_at = time.monotonic()
+
+    def response_received(self):
+        """Records the time to the response headers, which does not depend on the image size."""
+        self.latency = time.monotonic() - self.started_at
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.limiter.release(self.latency, exc_val)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD (additive increase, multiplicative decrease) concurrency limiter for a single host.
+
+    The limit grows by about one slot per round of successful requests while the response latency stays
+    within `latency_tolerance` times the baseline. It is multiplied by `backoff` on 429s, 5xx, resets and
+    timeouts, and slightly decreased on latency spikes. At most one decrease is applied per baseline latency,
+    so a burst of failing in-flight requests only counts once.
+    """
+
+    def __init__(self, limit: float, min_limit: int = 1, max_limit: int = 64,
+                 latency_tolerance: float = 2.0, backoff: float = 0.5, latency_backoff: float = 0.9):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(limit, min_limit), max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.baseline: float | None = None  # Smoothed latency of healthy responses
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> LimiterSlot:
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                self._wake_waiters()
+                raise
+        self.in_flight += 1
+        return LimiterSlot(self)
+
+    def release(self, latency: float | None, error: BaseException | None = None):
+        self.in_flight -= 1
+        if error is not None:
+            if is_overload(error):
+                self._decrease(self.backoff)
+        elif latency is not None:
+            if self.baseline is None or latency <= self.baseline * self.latency_tolerance:
+                self.baseline = latency if self.baseline is None else 0.9 * self.baseline + 0.1 * latency
+                self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+            else:
+                self._decrease(self.latency_backoff)
+        self._wake_waiters()
+
+    def _decrease(self, factor: float):
+        now = time.monotonic()
+        if now - self._last_decrease < (self.baseline or 0.0):
+            return
+        self._last_decrease = now
+        self.limit = max(self.limit * factor, self.min_limit)
+
+    def _wake_waiters(self):
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+
+class HostLimiters:
+    """
+    Per-host adaptive limiters, the learned limits are persisted between runs.
+
+    Args:
+        initial_limit (int): The limit of hosts seen for the first time.
+        max_limit (int): Upper bound of any host limit, including the learned ones. A limit held at it by a
+            lower bound than the usual one (`-n`) is not persisted over a higher learned limit.
+        path (str): The JSON file where learned limits are stored.
+    """
+
+    def __init__(self, initial_limit: int, max_limit: int, path: str):
+        self.initial_limit = initial_limit
+        self.max_limit = max_limit
+        self.path = Path(os.path.expanduser(path))
+        self.limiters: dict[str, AdaptiveLimiter] = {}
+        self._learned: dict[str, float] = self._load()
+
+    def get(self, link: str) -> AdaptiveLimiter:
+        host = urlparse(link).netloc
+        if host not in self.limiters:
+            limit = min(self._learned.get(host, self.initial_limit), self.max_limit)
+            self.limiters[host] = AdaptiveLimiter(limit, max_limit=self.max_limit)
+        return self.limiters[host]
+
+    def _load(self) -> dict[str, float]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        self._learned.update({host: round(limiter.limit, 2) for host, limiter in self.limiters.items()
+                              if limiter.limit < self.max_limit or self._learned.get(host, 0) < limiter.limit})
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._learned), encoding='utf-8')
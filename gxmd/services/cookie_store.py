@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from email.utils import parsedate_to_datetime
+from http.cookiejar import CookieJar
+from http.cookies import Morsel
+from pathlib import Path
+from typing import Iterable, Mapping
+from urllib.parse import urlparse
+
+from gxmd.config import COOKIES_FILE, SESSION_COOKIE_TTL
+
+
+def matches_cookie_domain(host: str, domain: str) -> bool:
+    domain = domain.lstrip('.')
+    return host == domain or host.endswith(f".{domain}")
+
+
+def matches_cookie(cookie: dict, url: str) -> bool:
+    """Whether a cookie is sent to url: by its domain, its path and, for a secure cookie, over HTTPS only"""
+    parsed_url = urlparse(url)
+    return (matches_cookie_domain(parsed_url.hostname or '', cookie['domain'])
+            and (parsed_url.path or '/').startswith(cookie.get('path') or '/')
+            and (not cookie.get('secure') or parsed_url.scheme == 'https'))
+
+
+class CookieStore:
+    """
+    Cookies and clearance tokens persisted across runs, shared by the HTML fetchers and the image downloader.
+
+    Cookies are kept until their expiry (new session cookies for SESSION_COOKIE_TTL seconds) with the User-Agent that
+    obtained them, since clearance cookies (e.g. cf_clearance) are only honoured with the same User-Agent. A domain
+    with valid cookies skips the cloudscraper challenge, and images of protected CDNs are requested with them.
+    """
+
+    def __init__(self, path: str = COOKIES_FILE):
+        self.path = Path(os.path.expanduser(path))
+        data = self._load()
+        self.cookies: list[dict] = data.get('cookies', [])
+        self.user_agents: dict[str, str] = data.get('user_agents', {})
+
+    def get_cookies(self, url: str) -> dict[str, str]:
+        """Returns the valid cookies sent to url"""
+        now = time.time()
+        return {cookie['name']: cookie['value'] for cookie in self.cookies
+                if cookie['expires'] > now and matches_cookie(cookie, url)}
+
+    def get_user_agent(self, url: str) -> str | None:
+        """Returns the User-Agent that obtained the cookies of url"""
+        host = urlparse(url).hostname or ''
+        return next((user_agent for domain, user_agent in self.user_agents.items()
+                     if matches_cookie_domain(host, domain)), None)
+
+    def get_headers(self, url: str, cookies: Mapping[str, str] = None) -> dict[str, str]:
+        """
+        Returns the Cookie and User-Agent headers of a request to url.
+
+        Args:
+            url (str): The requested URL.
+            cookies (Mapping[str, str], optional): Cookies sent along with the stored ones (e.g. those of a
+                browser render), they take precedence.
+
+        Returns:
+            dict[str, str]: The headers, the User-Agent is only set when stored cookies are sent.
+        """
+        headers = {}
+        stored = self.get_cookies(url)
+        if stored and (user_agent := self.get_user_agent(url)):
+            headers['User-Agent'] = user_agent
+        if cookies := {**stored, **(cookies or {})}:
+            headers['Cookie'] = '; '.join(f"{name}={value}" for name, value in cookies.items())
+        return headers
+
+    def update(self, url: str, cookies: Iterable[dict], user_agent: str = None):
+        """
+        Stores cookies obtained while requesting url.
+
+        Args:
+            url (str): The requested URL, its host is the default domain of the cookies.
+            cookies (Iterable[dict]): Cookies with a name and a value, optionally a domain, a path,
+                an expires timestamp (None or -1 for session cookies) and a secure flag.
+            user_agent (str, optional): The User-Agent that obtained the cookies.
+        """
+        host, now = urlparse(url).hostname or '', time.time()
+        for cookie in cookies:
+            expires = cookie.get('expires')
+            key = (cookie['name'], (cookie.get('domain') or host).lstrip('.'), cookie.get('path') or '/')
+            stored = next((c for c in self.cookies if (c['name'], c['domain'], c['path']) == key), None)
+            if expires is None or expires < 0:
+                # A session cookie keeps the expiry of the one it replaces, it never extends it
+                expires = stored['expires'] if stored is not None else now + SESSION_COOKIE_TTL
+            cookie = {
+                'name': key[0],
+                'value': cookie['value'],
+                'domain': key[1],
+                'path': key[2],
+                'expires': float(expires),
+                'secure': bool(cookie.get('secure')),
+            }
+            if stored is not None:
+                self.cookies.remove(stored)
+            self.cookies.append(cookie)
+        if user_agent:
+            self.user_agents[host] = user_agent
+        self.save()
+
+    def update_from_jar(self, url: str, jar: CookieJar, user_agent: str = None):
+        """Stores the cookies of a requests/cloudscraper session"""
+        self.update(url, ({'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+                           'expires': c.expires, 'secure': c.secure} for c in jar), user_agent)
+
+    def update_from_morsels(self, url: str, morsels: Iterable[Morsel], user_agent: str = None):
+        """Stores the cookies of an aiohttp cookie jar"""
+        self.update(url, ({'name': m.key, 'value': m.value, 'domain': m['domain'], 'path': m['path'],
+                           'expires': get_morsel_expiry(m), 'secure': bool(m['secure'])} for m in morsels),
+                    user_agent)
+
+    def invalidate(self, url: str):
+        """Forgets the cookies of a host, e.g. once its clearance was rejected"""
+        host = urlparse(url).hostname or ''
+        self.cookies = [cookie for cookie in self.cookies if not matches_cookie_domain(host, cookie['domain'])]
+        self.save()
+
+    def save(self):
+        now = time.time()
+        self.cookies = [cookie for cookie in self.cookies if cookie['expires'] > now]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps({'cookies': self.cookies, 'user_agents': self.user_agents}, indent=2),
+                            encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+
+def get_morsel_expiry(morsel: Morsel) -> float | None:
+    if morsel['max-age'] and str(morsel['max-age']).lstrip('-').isdigit():
+        return time.time() + max(int(morsel['max-age']), 0)
+    if morsel['expires']:
+        try:
+            return parsedate_to_datetime(morsel['expires']).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+# Global instance
+cookie_store = CookieStore()
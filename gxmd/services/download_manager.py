@@ -1,32 +1,64 @@
 import asyncio
+import os
 import posixpath
+import re
 from collections.abc import Mapping
+from urllib.parse import urlparse
 
 import aiohttp
 
 from gxmd.abstracts.download_interface import IDownloadManager
+from gxmd.config import CHUNK_SIZE, LIMITS_FILE, INITIAL_CONNECTIONS_PER_HOST, MAX_CONNECTIONS_PER_HOST
+from gxmd.exceptions import GXMNetworkError, GXMCircuitOpenError
 from gxmd.progressbar import ProgressBar
+from gxmd.services.blob_store import BlobStore
+from gxmd.services.concurrency import HostLimiters, LimiterSlot
+from gxmd.services.cookie_store import cookie_store
+from gxmd.services.download_manifest import ChapterManifest
 from gxmd.services.exporter import ExporterBase
+from gxmd.services.image_capture import ImageCapture, CapturedImage
+from gxmd.services.rate_limiter import rate_limiter
+from gxmd.services.retry import RetryPolicy, CircuitBreaker, is_host_failure
 from gxmd.utils import extract_file_extension_url
 
+CONTENT_RANGE_PATTERN = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+def is_range_at(resp: aiohttp.ClientResponse, offset: int) -> bool:
+    """Whether a 206 response starts at offset, as requested by the Range header."""
+    match = CONTENT_RANGE_PATTERN.match(resp.headers.get('Content-Range', ''))
+    return match is not None and int(match.group(1)) == offset
+
 
 class DownloadManager(IDownloadManager):
-    def __init__(self, downloads_directory: str, number_of_connections=20, with_progress=False):
+    def __init__(self, downloads_directory: str, number_of_connections=INITIAL_CONNECTIONS_PER_HOST,
+                 with_progress=False, retry_policy: RetryPolicy = None, limits_file: str = LIMITS_FILE,
+                 blob_store: BlobStore = None, max_connections: int = MAX_CONNECTIONS_PER_HOST):
         """
         Initializes the DownloadManager with a specified number of connections and an option to display progress.
 
         Args:
             downloads_directory (str): The base directory where all downloaded files will be stored.
-            number_of_connections (int): The number of concurrent downloads allowed.
+            number_of_connections (int): The initial number of concurrent downloads per host, it is adapted
+                at runtime to the host's latency and error rate.
             with_progress (bool): Whether to display a progress bar for the downloads.
+            retry_policy (RetryPolicy, optional): The retry policy of failed downloads.
+            limits_file (str, optional): The file where the learned per-host limits are persisted.
+            blob_store (BlobStore, optional): Deduplicate images through a content-addressed store.
+            max_connections (int, optional): The maximum number of concurrent downloads per host, the limits
+                learned by previous runs are capped to it.
         """
         self.downloads_directory = downloads_directory
         self.with_progress = with_progress
-        self.semaphore = asyncio.Semaphore(number_of_connections)  # Rate limiting (prevents bans)
+        # Adaptive per-host concurrency (prevents bans)
+        self.limiters = HostLimiters(number_of_connections, max_connections, limits_file)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers: dict[str, CircuitBreaker] = {}  # Per-host
+        self.blob_store = blob_store
 
         self.connector = aiohttp.TCPConnector(
             limit=100,
-            limit_per_host=20,
+            limit_per_host=0,  # Enforced by the adaptive limiters
             ttl_dns_cache=300,  # Cache DNS 5min (default 10s often too short)
             enable_cleanup_closed=True  # Default, cleans stale connections
         )
@@ -35,7 +67,7 @@ class DownloadManager(IDownloadManager):
 
     async def download_files_async(self, exporter: ExporterBase,
                                    links: list[str], headers: Mapping[str, str | bytes] = None, path: str = None,
-                                   start_message: str = None):
+                                   start_message: str = None, capture: ImageCapture = None) -> list[str]:
         """
         Downloads multiple files from a list of URLs using multiple threads.
 
@@ -45,31 +77,49 @@ class DownloadManager(IDownloadManager):
             headers (Mapping[str, str | bytes], optional): The headers of the HTTP requests.
             path (str, optional): The local directory path to save the downloaded files.
             start_message (str, optional): Message to print when download starts.
+            capture (ImageCapture, optional): Images captured while rendering the chapter, exported without
+                being downloaded again. The others are downloaded with the cookies of the render.
+
+        Returns:
+            list[str]: The filenames of the images that failed to download.
 
         Creates the directory if it does not exist and initializes a progress bar if required.
+        The state of every image is recorded in the chapter manifest, so a re-run only fetches
+        missing or partial images.
         """
         progress = None
         if self.with_progress:
             progress = ProgressBar(max_val=len(links), start_message=start_message)
 
+        manifest = ChapterManifest.load(exporter.get_manifest_path(path or ''))
         tasks = [self.download_file_async(url, headers, exporter,
                                           path,
                                           "{index}{extension}".format(index=i + 1,
                                                                       extension=extract_file_extension_url(url)),
-                                          progress)
+                                          progress,
+                                          manifest,
+                                          capture)
                  for i, url in enumerate(links)]
 
-        img_results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            img_results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            manifest.flush()
+        failed = []
         for filename, exception in img_results:
             if isinstance(exception, Exception):
                 print(f"Failed downloading image {filename}: {exception}")
+                failed.append(filename)
+        return failed
 
     async def download_file_async(self, link: str,
                                   headers: Mapping[str, str | bytes],
                                   exporter: ExporterBase,
                                   path: str = None,
                                   filename: str = None,
-                                  progress: ProgressBar = None):
+                                  progress: ProgressBar = None,
+                                  manifest: ChapterManifest = None,
+                                  capture: ImageCapture = None):
         """
         Downloads a single file and saves it to a specified path.
 
@@ -80,23 +130,164 @@ class DownloadManager(IDownloadManager):
             path (str, optional): path where to save the downloaded file.
             filename (str, optional): filename to save the downloaded file.
             progress (tqdm, optional): The progress bar instance to update after the download.
+            manifest (ChapterManifest, optional): The chapter manifest used to skip or resume the download.
+            capture (ImageCapture, optional): Images captured while rendering the chapter.
+
+        Streams the file to the exporter in chunks of CHUNK_SIZE bytes, so memory usage does not depend
+        on the image size. Updates the progress bar if provided.
 
-        Retrieves the file and writes it to the local filesystem. Updates the progress bar if provided.
+        Transient errors are retried according to the retry policy, the connection slot is released while
+        waiting. Requests to a host whose circuit breaker is open fail fast, while it probes the host they wait
+        for the outcome of the probe. Images that need no request (already exported, captured or in the blob
+        store) are exported whatever the state of the circuit breaker.
         """
-        async with self.semaphore:
+        link = link.strip()
+        filename = filename or posixpath.basename(link)
+        circuit_breaker = self.get_circuit_breaker(link)
+        attempt = 0
+        while True:
+            attempt += 1
+            requested = False  # Only the attempts that contact the host count for its circuit breaker
             try:
-                async with self.session.get(link.strip(), headers=headers) as resp:
-                    resp.raise_for_status()
-                    img_data = await resp.read()
-                    filename = filename or posixpath.basename(link)
-                    if progress is not None:
-                        # Update the progress bar
-                        progress.update()
-
-                    exporter.add_image(img_data, path, filename)
-                    return None, None
+                entry = manifest.get(filename, link) if manifest is not None else None
+                if not (entry and entry.completed and exporter.has_image(path, filename, entry.size)):
+                    captured = capture.get(link) if capture is not None else None
+                    blob_path = self.blob_store.lookup(link) if self.blob_store is not None else None
+                    if captured is not None:
+                        # Already downloaded by the browser
+                        await self._export_captured(captured, exporter, path, filename, manifest)
+                        capture.discard(link)
+                    elif blob_path is not None:
+                        # Already downloaded, by this manga or another one
+                        await self._export_blob(blob_path, link, exporter, path, filename, manifest)
+                    else:
+                        if not await circuit_breaker.wait_allowed():
+                            raise GXMCircuitOpenError(f"Too many failures, skipping host of: {link}", 503)
+                        requested = True
+                        async with await self.limiters.get(link).acquire() as slot:
+                            # Tokens are only spent by the requests about to be sent
+                            await rate_limiter.acquire(link)
+                            slot.request_sent()
+                            await self._fetch_file(link, self.get_request_headers(link, headers, capture), exporter,
+                                                   path, filename, manifest, slot)
+                        circuit_breaker.record_success()
+                if progress is not None:
+                    # Update the progress bar
+                    progress.update()
+                return None, None
             except Exception as e:
-                return filename, e
+                if requested:
+                    if is_host_failure(e):
+                        circuit_breaker.record_failure()
+                    else:
+                        circuit_breaker.record_success()
+
+                if attempt >= self.retry_policy.max_attempts or not self.retry_policy.is_retryable(e):
+                    if manifest is not None:
+                        manifest.update(filename, link, completed=False, error=str(e) or type(e).__name__)
+                    return filename, e
+                await asyncio.sleep(self.retry_policy.get_delay(attempt, e))
+
+    @staticmethod
+    def get_request_headers(link: str, headers: Mapping[str, str | bytes] | None,
+                            capture: ImageCapture = None) -> dict[str, str | bytes]:
+        """Adds the stored cookies (with the User-Agent that obtained them) and the cookies of the render"""
+        request_headers = dict(headers or {})
+        request_headers.update(cookie_store.get_headers(link, capture.get_cookies(link) if capture is not None
+                                                        else None))
+        return request_headers
+
+    def get_circuit_breaker(self, link: str) -> CircuitBreaker:
+        host = urlparse(link).netloc
+        if host not in self.circuit_breakers:
+            self.circuit_breakers[host] = CircuitBreaker()
+        return self.circuit_breakers[host]
+
+    @staticmethod
+    async def _export_blob(blob_path: str, link: str, exporter: ExporterBase, path: str, filename: str,
+                           manifest: ChapterManifest | None):
+        await exporter.add_blob_async(blob_path, path, filename)
+        if manifest is not None:
+            manifest.update(filename, link, size=os.path.getsize(blob_path), completed=True, error=None)
+
+    async def _export_captured(self, captured: CapturedImage, exporter: ExporterBase, path: str, filename: str,
+                               manifest: ChapterManifest | None):
+        async with exporter.open_image(path, filename, blob_store=self.blob_store, url=captured.url) as sink:
+            await sink.write(captured.body)
+        if manifest is not None:
+            manifest.update(filename, captured.url, size=len(captured.body), etag=captured.headers.get('etag'),
+                            completed=True, error=None)
+
+    async def _fetch_file(self, link: str,
+                          headers: Mapping[str, str | bytes] | None,
+                          exporter: ExporterBase,
+                          path: str,
+                          filename: str,
+                          manifest: ChapterManifest | None,
+                          slot: LimiterSlot = None):
+        """
+        Streams a file to the exporter, resuming a partial download with an HTTP Range request.
+
+        The partial file is only resumed when the manifest knows it was downloaded from the same URL, and
+        with a strong ETag or a Last-Modified date sent as If-Range, so the server sends the whole file again
+        when it changed. A 416 or a range that does not match the partial file restarts the download from 0.
+        """
+        entry = manifest.get(filename, link) if manifest is not None else None
+        part_path = exporter.get_part_path(path, filename)
+        offset = os.path.getsize(part_path) if entry is not None and os.path.exists(part_path) else 0
+        validator = entry.range_validator if offset else None
+
+        request_headers = dict(headers or {})
+        if validator is not None:
+            request_headers['Range'] = f'bytes={offset}-'
+            request_headers['If-Range'] = validator
+        else:
+            offset = 0
+
+        async with self.session.get(link, headers=request_headers) as resp:
+            if slot is not None:
+                slot.response_received()
+            if resp.status == 416 and offset and offset == entry.size:
+                # The partial file was already complete
+                await exporter.add_image_file_async(part_path, path, filename)
+                manifest.update(filename, link, completed=True, error=None)
+                return
+
+            restart = offset > 0 and (resp.status == 416 or resp.status == 206 and not is_range_at(resp, offset))
+            if not restart:
+                resp.raise_for_status()
+                if resp.status != 206:
+                    offset = 0
+                await self._stream_file(resp, link, exporter, path, filename, manifest, offset)
+
+        if restart:
+            # The file changed on the server, the partial file can not be resumed
+            os.unlink(part_path)
+            manifest.update(filename, link, size=None, etag=None, last_modified=None, completed=False)
+            await rate_limiter.acquire(link)
+            if slot is not None:
+                slot.request_sent()
+            await self._fetch_file(link, headers, exporter, path, filename, manifest, slot)
+
+    async def _stream_file(self, resp: aiohttp.ClientResponse, link: str, exporter: ExporterBase, path: str,
+                           filename: str, manifest: ChapterManifest | None, offset: int):
+        """Streams a response body to the exporter, after the offset bytes of the partial file."""
+        size = offset + resp.content_length if resp.content_length is not None else None
+        if manifest is not None:
+            manifest.update(filename, link, size=size, etag=resp.headers.get('ETag'),
+                            last_modified=resp.headers.get('Last-Modified'), completed=False)
+        async with exporter.open_image(path, filename, offset, keep_partial=manifest is not None,
+                                       blob_store=self.blob_store, url=link) as sink:
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                await sink.write(chunk)
+            if size is not None and sink.size != size:
+                raise GXMNetworkError(f"Truncated download ({sink.size}/{size} bytes) for: {link}", 500)
+
+        if manifest is not None:
+            manifest.update(filename, link, completed=True, error=None)
 
     async def close(self):
+        self.limiters.save()
+        if self.blob_store is not None:
+            self.blob_store.close()
         await self.session.close()
@@ -0,0 +1,88 @@
+import json
+import os
+import time
+from dataclasses import dataclass, asdict, field
+
+from gxmd.config import MANIFEST_SAVE_INTERVAL
+
+
+@dataclass
+class ManifestEntry:
+    """Download state of a single chapter image"""
+    url: str
+    size: int | None = None
+    etag: str | None = None
+    completed: bool = False
+    error: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def range_validator(self) -> str | None:
+        """The If-Range value that makes resuming safe: a strong ETag, else the Last-Modified date"""
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+
+
+@dataclass
+class ChapterManifest:
+    """
+    Persistent record of a chapter's images, stored as JSON next to the partial downloads.
+
+    It lets a re-run skip completed images and resume partial ones with HTTP Range requests.
+    Updates are saved at most every `save_interval` seconds, `flush` saves the pending ones.
+
+    Attributes:
+        path (str): The location of the manifest file.
+        entries (dict[str, ManifestEntry]): Image states keyed by filename.
+        save_interval (float): Minimum seconds between two saves.
+    """
+    path: str
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+    save_interval: float = MANIFEST_SAVE_INTERVAL
+    _dirty: bool = field(default=False, init=False, repr=False, compare=False)
+    _saved_at: float = field(default=float('-inf'), init=False, repr=False, compare=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'ChapterManifest':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data: dict = json.load(f)
+        except (OSError, ValueError):
+            return cls(path)
+        return cls(path, {filename: ManifestEntry(**entry) for filename, entry in data.items()})
+
+    def get(self, filename: str, url: str) -> ManifestEntry | None:
+        """Returns the entry of filename, unless it was recorded for another URL"""
+        entry = self.entries.get(filename)
+        if entry is None or entry.url != url:
+            return None
+        return entry
+
+    def update(self, filename: str, url: str, **kwargs) -> ManifestEntry:
+        entry = self.get(filename, url) or ManifestEntry(url)
+        for key, value in kwargs.items():
+            setattr(entry, key, value)
+        self.entries[filename] = entry
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= self.save_interval:
+            self.save()
+        return entry
+
+    def flush(self):
+        """Saves the updates made since the last save"""
+        if self._dirty:
+            self.save()
+
+    @property
+    def failed(self) -> list[str]:
+        return [filename for filename, entry in self.entries.items() if not entry.completed]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({filename: asdict(entry) for filename, entry in self.entries.items()}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
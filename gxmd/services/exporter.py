@@ -1,21 +1,211 @@
+import asyncio
+import multiprocessing
 import os
 import posixpath
 import zipfile
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterable, Callable
+from concurrent.futures import ProcessPoolExecutor, Future
 from pathlib import Path
+from typing import BinaryIO
+
+from gxmd.services.blob_store import BlobStore, link_file
+from gxmd.services.file_writer import FileWriter
+
+# Formats that are already compressed, DEFLATE would only save about 1%
+STORED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif', '.jxl')
+
+
+class ImageSink:
+    """
+    Writable staging file for a single image.
+
+    Chunks are appended to a ``.part`` file inside the exporter's staging directory, the
+    complete file is handed over to the exporter on commit, so an image is never held whole
+    in memory. All file operations run on the exporter's writer thread, the first error is
+    kept and raised on commit.
+
+    Args:
+        exporter (ExporterBase): The exporter receiving the image.
+        path (str): The chapter path inside the export.
+        filename (str): The image filename.
+        offset (int): Number of bytes already in the ``.part`` file, writing resumes after them.
+        keep_partial (bool): Keep the ``.part`` file on failure so the download can be resumed.
+        blob_store (BlobStore, optional): Store the complete image in the blob store and export it from there.
+        url (str, optional): The image URL, indexed by the blob store.
+    """
+
+    def __init__(self, exporter: 'ExporterBase', path: str, filename: str, offset: int = 0,
+                 keep_partial: bool = False, blob_store: BlobStore = None, url: str = None):
+        self.exporter = exporter
+        self.path = path
+        self.filename = filename
+        self.offset = offset
+        self.keep_partial = keep_partial
+        self.blob_store = blob_store
+        self.url = url
+        self.part_path = exporter.get_part_path(path, filename)
+        self.size = offset
+        self._file: BinaryIO | None = None
+        self._error: Exception | None = None
+
+    async def write(self, chunk: bytes):
+        self.size += len(chunk)
+        await self.exporter.writer.submit(self._write, chunk, size=len(chunk))
+
+    async def commit(self):
+        """Close the staging file and move it into the export."""
+        await self.exporter.writer.call(self._commit)
+        self.exporter.image_exported(self.path, self.filename, self.size)
+
+    async def discard(self):
+        """Close the staging file, and remove it unless it is kept for resuming."""
+        await self.exporter.writer.call(self._discard)
+
+    def _open(self):
+        try:
+            self.exporter.writer.makedirs(os.path.dirname(self.part_path))
+            self._file = open(self.part_path, 'ab' if self.offset else 'wb')
+            self._file.truncate(self.offset)
+        except OSError as e:
+            self._error = e
+
+    def _write(self, chunk: bytes):
+        if self._error is None:
+            try:
+                self._file.write(chunk)
+            except OSError as e:
+                self._error = e
+
+    def _commit(self):
+        self._close()
+        if self._error is not None:
+            raise self._error
+        if self.blob_store is not None:
+            blob_path = self.blob_store.ingest(self.part_path, self.url)
+            self.exporter.add_blob(blob_path, self.path, self.filename)
+        else:
+            self.exporter.add_image_file(self.part_path, self.path, self.filename)
+
+    def _discard(self):
+        self._close()
+        if not self.keep_partial:
+            Path(self.part_path).unlink(missing_ok=True)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    async def __aenter__(self):
+        await self.exporter.writer.submit(self._open)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            await self.commit()
+        else:
+            await self.discard()
 
 
 class ExporterBase(ABC):
+    """
+    Base class of exporters.
+
+    The blocking methods (`add_image`, `add_image_file`) are meant to run on the exporter's writer
+    thread, use `add_image_async`, `add_image_file_async` or an image sink from the event loop.
+    Likewise, `close_async` closes the exporter without blocking the event loop.
+    """
+
     def __init__(self, path: str):
         self.path = path
+        # Partially downloaded images live here until they are complete
+        self.staging_dir = os.path.join(os.path.dirname(path), '.gxmd', os.path.basename(path))
+        self.writer = FileWriter()
 
     @abstractmethod
     def add_image(self, file_data: bytes, path: str, filename: str):
         pass
 
+    @abstractmethod
+    def add_image_file(self, file_path: str, path: str, filename: str):
+        """Move a complete image file from the staging directory into the export."""
+        pass
+
+    @abstractmethod
+    def has_image(self, path: str, filename: str, size: int | None = None) -> bool:
+        """Whether the image is already exported, with the expected size if given."""
+        pass
+
+    async def finish_chapter(self, path: str, index: int):
+        """Optional hook called once every image of a chapter is exported"""
+        pass
+
+    def image_exported(self, path: str, filename: str, size: int):
+        """Optional hook called on the event loop once the writer thread has exported an image"""
+        pass
+
+    def get_part_path(self, path: str, filename: str) -> str:
+        return os.path.join(self.staging_dir, path, f"{filename}.part")
+
+    def get_manifest_path(self, path: str) -> str:
+        return os.path.join(self.staging_dir, path, "manifest.json")
+
+    def add_blob(self, blob_path: str, path: str, filename: str):
+        """Export an image of the blob store, the blob is linked rather than copied when possible."""
+        part_path = self.get_part_path(path, filename)
+        self.writer.makedirs(os.path.dirname(part_path))
+        link_file(blob_path, part_path)
+        self.add_image_file(part_path, path, filename)
+
+    def open_image(self, path: str, filename: str, offset: int = 0, keep_partial: bool = False,
+                   blob_store: BlobStore = None, url: str = None) -> ImageSink:
+        """Open a writable sink, the image is exported once the sink is committed."""
+        return ImageSink(self, path, filename, offset, keep_partial, blob_store, url)
+
+    async def add_image_async(self, file_data: bytes, path: str, filename: str):
+        await self.writer.call(self.add_image, file_data, path, filename, size=len(file_data))
+        self.image_exported(path, filename, len(file_data))
+
+    async def add_image_file_async(self, file_path: str, path: str, filename: str):
+        size = await self.writer.call(self._add_sized, self.add_image_file, file_path, path, filename)
+        self.image_exported(path, filename, size)
+
+    async def add_blob_async(self, blob_path: str, path: str, filename: str):
+        size = await self.writer.call(self._add_sized, self.add_blob, blob_path, path, filename)
+        self.image_exported(path, filename, size)
+
+    @staticmethod
+    def _add_sized(add: Callable, file_path: str, path: str, filename: str) -> int:
+        """Runs add(file_path, path, filename) on the writer thread, returns the size of the file."""
+        size = os.path.getsize(file_path)
+        add(file_path, path, filename)
+        return size
+
+    async def add_image_stream(self, chunks: AsyncIterable[bytes], path: str, filename: str):
+        """Export an image from an async iterator of chunks without buffering the whole file."""
+        async with self.open_image(path, filename) as sink:
+            async for chunk in chunks:
+                await sink.write(chunk)
+
     def close(self):
         """Optional hook for post-processing (like closing a zip)"""
-        pass
+        self.writer.close()
+        self._prune_staging_dir()
+
+    async def close_async(self):
+        """Closes the exporter in a thread, joining the writer thread never blocks the event loop."""
+        await asyncio.to_thread(self.close)
+
+    def _prune_staging_dir(self):
+        """Remove empty staging directories left behind by completed downloads."""
+        if not os.path.isdir(self.staging_dir):
+            return
+        for root, _, _ in os.walk(self.staging_dir, topdown=False):
+            try:
+                os.rmdir(root)
+            except OSError:
+                pass
 
 
 class RawExporter(ExporterBase):
@@ -25,25 +215,193 @@ class RawExporter(ExporterBase):
 
     def add_image(self, file_data: bytes, path: str, filename: str):
         output_dir = os.path.join(self.path, path)
-        os.makedirs(output_dir, exist_ok=True)
+        self.writer.makedirs(output_dir)
         save_path = posixpath.join(output_dir, filename)
         with open(save_path, 'wb') as f:
             f.write(file_data)
+        self.writer.mark_dirty(save_path)
+
+    def add_image_file(self, file_path: str, path: str, filename: str):
+        output_dir = os.path.join(self.path, path)
+        self.writer.makedirs(output_dir)
+        save_path = posixpath.join(output_dir, filename)
+        os.replace(file_path, save_path)
+        self.writer.mark_dirty(save_path)
+
+    def has_image(self, path: str, filename: str, size: int | None = None) -> bool:
+        try:
+            file_size = os.path.getsize(os.path.join(self.path, path, filename))
+        except OSError:
+            return False
+        return size is None or file_size == size
+
+
+def get_compress_type(filename: str) -> int:
+    """Already compressed images are stored, DEFLATE barely shrinks them and costs a lot of CPU."""
+    _, extension = posixpath.splitext(filename)
+    return zipfile.ZIP_STORED if extension.lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def build_archive(archive_path: str, entries: list[tuple[str, str]]) -> str:
+    """
+    Writes staged image files into a zip archive and removes them, runs in a worker process.
+
+    A new archive is written to a temporary file first, so a killed build never leaves a corrupt archive.
+
+    Args:
+        archive_path (str): The archive to create or append to.
+        entries (list[tuple[str, str]]): (file path, name in the archive) pairs.
+    """
+    exists = os.path.exists(archive_path)
+    target = archive_path if exists else f"{archive_path}.tmp"
+    with zipfile.ZipFile(target, mode="a" if exists else "w") as archive:
+        for file_path, arcname in entries:
+            if arcname not in archive.NameToInfo:
+                archive.write(file_path, arcname, compress_type=get_compress_type(arcname))
+    if not exists:
+        os.replace(target, archive_path)
+    for file_path, _ in entries:
+        os.unlink(file_path)
+    return archive_path
 
 
 class CBZExporter(ExporterBase):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        self.path = str(Path(self.path).with_suffix(".cbz")) # Note: .cbz is just a renamed .zip
-        self.archive = zipfile.ZipFile(
-            self.path,
-            mode="a",
-            compression=zipfile.ZIP_DEFLATED
-        )
+    """
+    Exports images to CBZ archives, already compressed images are stored without DEFLATE.
+
+    Args:
+        path (str): The manga path.
+        group (str): 'manga' writes a single archive, 'chapter' one archive per chapter and 'volume'
+            one archive per `volume_size` chapters.
+        volume_size (int): Chapters per volume archive.
+        workers (int, optional): Worker processes building the chapter and volume archives,
+            defaults to the number of CPUs.
+
+    With the 'chapter' and 'volume' groups, images are kept in the staging directory until their
+    chapter is finished, then archives are built in parallel by a pool of worker processes.
+    """
+    GROUPS = ('manga', 'chapter', 'volume')
+
+    def __init__(self, path: str, group: str = 'manga', volume_size: int = 10, workers: int | None = None):
+        super().__init__(path)
+        self.group = group
+        self.volume_size = volume_size
+        self.workers = workers
+        self.archive: zipfile.ZipFile | None = None
+        self._pool: ProcessPoolExecutor | None = None
+        self._builds: list[Future] = []
+        self._volumes: dict[int, list[str]] = {}  # Finished chapters waiting for their volume archive
+        self._archived: dict[str, int] | None = None  # Sizes of archived images by "chapter/filename"
+        # Sizes of the images in the manga archive, only touched on the event loop: the writer thread
+        # mutates the archive's own index while it writes
+        self._exported: dict[str, int] = {}
+
+        if group == 'manga':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self.path = str(Path(self.path).with_suffix(".cbz")) # Note: .cbz is just a renamed .zip
+            self.archive = zipfile.ZipFile(
+                self.path,
+                mode="a",
+                compression=zipfile.ZIP_DEFLATED
+            )
+            self._exported = {name: info.file_size for name, info in self.archive.NameToInfo.items()}
+        else:
+            os.makedirs(self.path, exist_ok=True)
 
     def add_image(self, file_data: bytes, path: str, filename: str):
-        self.archive.writestr(posixpath.join(path, filename), file_data)
+        if self.archive is None:
+            self.writer.makedirs(os.path.join(self.staging_dir, path))
+            with open(self._get_staged_path(path, filename), 'wb') as f:
+                f.write(file_data)
+            return
+        arcname = posixpath.join(path, filename)
+        self.archive.writestr(arcname, file_data, compress_type=get_compress_type(arcname))
+        self._mark_dirty()
+
+    def add_image_file(self, file_path: str, path: str, filename: str):
+        if self.archive is None:
+            os.replace(file_path, self._get_staged_path(path, filename))
+            return
+        # ZipFile.write streams the file into the entry in small blocks
+        arcname = posixpath.join(path, filename)
+        self.archive.write(file_path, arcname, compress_type=get_compress_type(arcname))
+        os.unlink(file_path)
+        self._mark_dirty()
+
+    def has_image(self, path: str, filename: str, size: int | None = None) -> bool:
+        if self.archive is not None:
+            file_size = self._exported.get(posixpath.join(path, filename))
+            return file_size is not None and (size is None or file_size == size)
+
+        try:
+            file_size = os.path.getsize(self._get_staged_path(path, filename))
+        except OSError:
+            file_size = self._get_archived().get(posixpath.join(path, filename))
+        return file_size is not None and (size is None or file_size == size)
+
+    def image_exported(self, path: str, filename: str, size: int):
+        if self.archive is not None:
+            self._exported[posixpath.join(path, filename)] = size
+
+    async def finish_chapter(self, path: str, index: int):
+        await self.writer.call(self._finish_chapter, path, index)
+
+    def _finish_chapter(self, path: str, index: int):
+        if self.group == 'chapter':
+            self._submit_build(os.path.join(self.path, f"{path}.cbz"), self._get_staged_entries(path, ''))
+        elif self.group == 'volume':
+            self._volumes.setdefault(index // self.volume_size + 1, []).append(path)
+
+    def _get_staged_path(self, path: str, filename: str) -> str:
+        return os.path.join(self.staging_dir, path, filename)
+
+    def _get_staged_entries(self, path: str, prefix: str) -> list[tuple[str, str]]:
+        """Returns the complete images staged for a chapter, with their name in the archive"""
+        chapter_dir = os.path.join(self.staging_dir, path)
+        if not os.path.isdir(chapter_dir):
+            return []
+        return [(os.path.join(chapter_dir, name), posixpath.join(prefix, name))
+                for name in sorted(os.listdir(chapter_dir))
+                if name != 'manifest.json' and not name.endswith(('.part', '.tmp'))]
+
+    def _get_archived(self) -> dict[str, int]:
+        """Indexes the images of the existing chapter or volume archives"""
+        if self._archived is None:
+            self._archived = {}
+            for archive_path in Path(self.path).glob('*.cbz'):
+                with zipfile.ZipFile(archive_path) as archive:
+                    for info in archive.infolist():
+                        name = info.filename if self.group == 'volume' else posixpath.join(archive_path.stem,
+                                                                                           info.filename)
+                        self._archived[name] = info.file_size
+        return self._archived
+
+    def _submit_build(self, archive_path: str, entries: list[tuple[str, str]]):
+        if not entries:
+            return
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        self._builds.append(self._pool.submit(build_archive, archive_path, entries))
+
+    def _mark_dirty(self):
+        if self.writer.fsync_batch_size:
+            self.archive.fp.flush()
+            self.writer.mark_dirty(self.path)
 
     def close(self):
-        self.archive.close()
+        self.writer.close()
+        try:
+            if self.archive is not None:
+                self.archive.close()
+            for volume, chapters in sorted(self._volumes.items()):
+                entries = [entry for chapter in chapters for entry in self._get_staged_entries(chapter, chapter)]
+                self._submit_build(os.path.join(self.path, f"Volume {volume}.cbz"), entries)
+            self._volumes.clear()
+            for build in self._builds:
+                build.result()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            super().close()
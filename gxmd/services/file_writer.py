@@ -0,0 +1,120 @@
+import asyncio
+import os
+import queue
+import threading
+from collections import deque
+from typing import Any, Callable
+
+from gxmd.config import WRITE_BUFFER_SIZE, FSYNC_BATCH_SIZE
+
+
+class FileWriter:
+    """
+    Write-behind stage that runs exporter disk and zip I/O on a dedicated thread.
+
+    Operations run in submission order on a single writer thread, so writes to a file or an archive never
+    interleave and the event loop never blocks on the disk. The queue is bounded by the number of pending
+    bytes: `submit` waits while more than `max_pending_bytes` are queued, which slows the downloaders down
+    to the disk speed instead of buffering in memory.
+
+    Args:
+        max_pending_bytes (int): Bytes that may be queued before submitters wait.
+        fsync_batch_size (int): Number of written files after which they are fsync'ed together,
+            0 leaves flushing to the OS.
+    """
+
+    def __init__(self, max_pending_bytes: int = WRITE_BUFFER_SIZE, fsync_batch_size: int = FSYNC_BATCH_SIZE):
+        self.max_pending_bytes = max_pending_bytes
+        self.fsync_batch_size = fsync_batch_size
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: threading.Thread | None = None
+        self._pending_bytes = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # Only accessed from the writer thread
+        self._created_dirs: set[str] = set()
+        self._dirty_paths: list[str] = []
+
+    async def submit(self, func: Callable, *args, size: int = 0) -> asyncio.Future:
+        """
+        Queues func(*args) on the writer thread and returns a future of its result.
+
+        Args:
+            func (Callable): The blocking function.
+            size (int): Bytes held by the operation, accounted for the backpressure.
+        """
+        loop = asyncio.get_running_loop()
+        while self._pending_bytes and self._pending_bytes + size > self.max_pending_bytes:
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='gxmd-writer', daemon=True)
+            self._thread.start()
+
+        self._pending_bytes += size
+        future = loop.create_future()
+        self._queue.put((func, args, size, future, loop))
+        return future
+
+    async def call(self, func: Callable, *args, size: int = 0) -> Any:
+        """Runs func(*args) on the writer thread and waits for its result."""
+        return await (await self.submit(func, *args, size=size))
+
+    def makedirs(self, path: str):
+        """os.makedirs with a cache of the directories already created, writer thread only."""
+        if path not in self._created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._created_dirs.add(path)
+
+    def mark_dirty(self, path: str):
+        """Registers a written file to be fsync'ed with the next batch, writer thread only."""
+        if not self.fsync_batch_size:
+            return
+        self._dirty_paths.append(path)
+        if len(self._dirty_paths) >= self.fsync_batch_size:
+            self._sync()
+
+    def close(self):
+        """Waits for the queued operations and stops the writer thread."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._sync()
+
+    def _run(self):
+        while (item := self._queue.get()) is not None:
+            func, args, size, future, loop = item
+            try:
+                result, error = func(*args), None
+            except Exception as e:
+                result, error = None, e
+            try:
+                loop.call_soon_threadsafe(self._done, future, size, result, error)
+            except RuntimeError:
+                pass  # The event loop is closed, nobody is waiting anymore
+
+    def _done(self, future: asyncio.Future, size: int, result: Any, error: Exception | None):
+        self._pending_bytes -= size
+        if not future.done():
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        while self._waiters and self._pending_bytes < self.max_pending_bytes:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _sync(self):
+        paths, self._dirty_paths = self._dirty_paths, []
+        for path in dict.fromkeys(paths):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
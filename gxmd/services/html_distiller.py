@@ -0,0 +1,127 @@
+import html
+import re
+from dataclasses import dataclass
+from functools import cache
+
+from selectolax.parser import Node
+
+from gxmd.config import DISTILL_SAMPLES, DISTILL_TEXT_LENGTH, DISTILL_ATTRIBUTE_LENGTH
+
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'svg', 'template', 'iframe', 'link', 'meta', '_comment', '-comment'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'source', 'track', 'wbr'}
+KEPT_ATTRIBUTES = {'id', 'class', 'href', 'src', 'srcset', 'alt', 'title', 'role'}  # And data-*
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+@dataclass
+class DistilledHtml:
+    html: str
+    tokens_before: int
+    tokens_after: int
+
+    def __str__(self):
+        return f"{self.tokens_before:,} → {self.tokens_after:,} tokens"
+
+
+@cache
+def get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding('o200k_base')
+    except Exception:
+        return None  # Not installed or not downloadable, counts are estimated
+
+
+def count_tokens(text: str) -> int:
+    """Counts the tokens of text for the LLM, estimated as 4 characters per token without tiktoken"""
+    encoding = get_encoding()
+    return len(encoding.encode(text, disallowed_special=())) if encoding is not None else (len(text) + 3) // 4
+
+
+def get_signature(node: Node) -> tuple[str, str]:
+    return node.tag, node.attributes.get('class') or ''
+
+
+def truncate(value: str, length: int) -> str:
+    return value if len(value) <= length else f"{value[:length]}…"
+
+
+def serialize_attributes(node: Node) -> str:
+    attributes = []
+    for name, value in node.attributes.items():
+        if name not in KEPT_ATTRIBUTES and not name.startswith('data-'):
+            continue  # Styles, events, aria, sizes... no scraper selects on them
+        if value is None:
+            attributes.append(f" {name}")
+            continue
+        value = 'data:…' if value.startswith('data:') else truncate(WHITESPACE_PATTERN.sub(' ', value).strip(),
+                                                                     DISTILL_ATTRIBUTE_LENGTH)
+        attributes.append(f' {name}="{html.escape(value)}"')
+    return ''.join(attributes)
+
+
+def get_children(node: Node) -> list[Node]:
+    """Returns the elements and non-blank text nodes under node"""
+    return [child for child in node.iter(include_text=True)
+            if child.tag not in SKIPPED_TAGS and (child.tag != '-text' or child.text_content.strip())]
+
+
+def collapse_runs(children: list[Node]) -> list[Node | int]:
+    """
+    Keeps a few samples of each run of similar siblings (same tag and classes): the first ones and the last one,
+    which shows the order of the list. The omitted siblings are replaced by their count.
+    """
+    res, start = [], 0
+    while start < len(children):
+        end = start + 1
+        if children[start].tag != '-text':
+            signature = get_signature(children[start])
+            while end < len(children) and children[end].tag != '-text' and get_signature(children[end]) == signature:
+                end += 1
+        run = children[start:end]
+        if len(run) > DISTILL_SAMPLES + 1:
+            res.extend([*run[:DISTILL_SAMPLES], len(run) - DISTILL_SAMPLES - 1, run[-1]])
+        else:
+            res.extend(run)
+        start = end
+    return res
+
+
+def serialize(node: Node, parts: list[str]):
+    if node.tag == '-text':
+        text = WHITESPACE_PATTERN.sub(' ', node.text_content).strip()
+        parts.append(html.escape(truncate(text, DISTILL_TEXT_LENGTH), quote=False))
+        return
+    parts.append(f"<{node.tag}{serialize_attributes(node)}>")
+    if node.tag in VOID_TAGS:
+        return
+    previous = None
+    for child in collapse_runs(get_children(node)):
+        if isinstance(child, int):
+            tag, classes = get_signature(previous)
+            parts.append(f"<!-- {child} more <{tag}{f' class={classes!r}' if classes else ''}> -->")
+        else:
+            serialize(child, parts)
+            previous = child
+    parts.append(f"</{node.tag}>")
+
+
+def distill_html(node: Node) -> DistilledHtml:
+    """
+    Shrinks the HTML of a page before it is sent to the LLM, keeping what the scrapers select on.
+
+    Scripts, styles and comments are dropped, and only the attributes selectors use are kept (id, class, href,
+    src, srcset, alt, title, role and data-*), with long values truncated. Runs of similar siblings, e.g. a 2,000
+    chapters list, keep DISTILL_SAMPLES samples and their last item, and long texts are truncated. The tags and
+    classes are left as they are, so a scraper written for the distilled HTML works on the full page.
+
+    Args:
+        node (Node): The content of the page.
+
+    Returns:
+        DistilledHtml: The distilled HTML with the token counts before and after.
+    """
+    parts = []
+    serialize(node, parts)
+    distilled = ''.join(parts)
+    return DistilledHtml(distilled, count_tokens(node.html), count_tokens(distilled))
@@ -0,0 +1,126 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from gxmd.config import CAPTURE_MAX_BYTES
+from gxmd.services.cookie_store import matches_cookie
+
+if TYPE_CHECKING:
+    from playwright.async_api import BrowserContext, Page, Response
+
+
+@dataclass
+class CapturedImage:
+    url: str
+    headers: dict[str, str] = field(default_factory=dict)  # Response headers
+    body: bytes | None = None
+
+
+class CaptureBudget:
+    """
+    Bytes of captured image bodies held in memory, shared by the captures of every chapter in flight so parsing
+    ahead does not multiply it.
+
+    Args:
+        max_bytes (int): Bytes of bodies kept at once, later images are only recorded.
+    """
+
+    def __init__(self, max_bytes: int = CAPTURE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def fits(self, size: int) -> bool:
+        return self.size + size <= self.max_bytes
+
+    def reserve(self, size: int) -> bool:
+        if not self.fits(size):
+            return False
+        self.size += size
+        return True
+
+    def release(self, size: int):
+        self.size -= size
+
+
+class ImageCapture:
+    """
+    Records the image responses of a rendered page, so they are not downloaded a second time.
+
+    The browser already resolved the real image URLs (with their signed tokens) and downloaded them while rendering
+    a reader. Their bodies are kept within the shared `budget` and exported as is, then released. The browser
+    cookies are kept to download the images the render missed (lazy-loaded pages) with the same session.
+
+    Args:
+        keep_bodies (bool): Keep the image bodies, otherwise only their URLs and headers are recorded.
+        budget (CaptureBudget): Bytes of bodies kept by all the captures, later images are only recorded.
+    """
+
+    def __init__(self, keep_bodies: bool = True, budget: CaptureBudget = None):
+        self.keep_bodies = keep_bodies
+        self.budget = budget or capture_budget
+        self.images: dict[str, CapturedImage] = {}
+        self.cookies: list[dict] = []
+        self.size = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def attach(self, page: 'Page'):
+        """Starts recording the image responses of a page"""
+        page.on('response', self._on_response)
+
+    async def detach(self, page: 'Page', context: 'BrowserContext'):
+        """Stops recording, waits for the bodies being read and keeps the cookies of the context"""
+        page.remove_listener('response', self._on_response)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        try:
+            self.cookies = await context.cookies()
+        except Exception:
+            self.cookies = []
+
+    def get(self, url: str) -> CapturedImage | None:
+        """Returns the captured image of url if its body was kept"""
+        image = self.images.get(url)
+        return image if image is not None and image.body is not None else None
+
+    def discard(self, url: str):
+        """Releases the body of url, e.g. once exported"""
+        image = self.images.get(url)
+        if image is not None and image.body is not None:
+            self.size -= len(image.body)
+            self.budget.release(len(image.body))
+            image.body = None
+
+    def close(self):
+        """Releases the bodies left, call once the chapter is downloaded"""
+        for url in self.images:
+            self.discard(url)
+
+    def get_cookies(self, url: str) -> dict[str, str]:
+        """Returns the cookies the browser would send to url"""
+        return {cookie['name']: cookie['value'] for cookie in self.cookies if matches_cookie(cookie, url)}
+
+    def _on_response(self, response: 'Response'):
+        if response.request.resource_type != 'image' or not response.ok or response.url.startswith('data:'):
+            return
+        image = CapturedImage(response.url, dict(response.headers))
+        self.images[response.url] = image
+        if self.keep_bodies:
+            task = asyncio.create_task(self._read_body(response, image))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _read_body(self, response: 'Response', image: CapturedImage):
+        length = response.headers.get('content-length')
+        if length is not None and length.isdigit() and not self.budget.fits(int(length)):
+            return
+        try:
+            body = await response.body()
+        except Exception:
+            return  # The page navigated away before the body was read
+        if self.budget.reserve(len(body)):
+            self.size += len(body)
+            image.body = body
+
+
+# Global instance
+capture_budget = CaptureBudget()
@@ -1,10 +1,12 @@
+import asyncio
 import os
 
-from gxmd.config import USER_AGENT
+from gxmd.config import USER_AGENT, PARSE_AHEAD, CONCURRENT_CHAPTERS
 from gxmd.entities.manga import Manga
 from gxmd.parsers.request_parser import RequestParser
 from gxmd.services.download_manager import DownloadManager
 from gxmd.services.exporter import RawExporter, ExporterBase
+from gxmd.services.image_capture import ImageCapture
 
 
 class MangaDownloader:
@@ -14,10 +16,12 @@ class MangaDownloader:
     Attributes:
         manga (Manga): manga dataclass object.
         download_manager (DownloadManager): Manages the downloading of files.
+        capture_images (bool): Whether the images loaded while rendering a chapter are exported as is.
     """
     manga: Manga = None
 
-    def __init__(self, manga: Manga, download_manager: DownloadManager, exporter_class=RawExporter):
+    def __init__(self, manga: Manga, download_manager: DownloadManager, exporter_class=RawExporter,
+                 capture_images: bool = True):
         """
         Initializes the MangaDownloader object with manga link, selector, and download manager.
 
@@ -25,10 +29,13 @@ class MangaDownloader:
             manga (Manga): manga instance.
             download_manager (DownloadManager): The download manager instance for handling downloads.
             exporter_class (Class): The exporter class.
+            capture_images (bool): Export the images loaded while rendering a chapter instead of downloading
+                them again, only the images the render missed go through the download manager.
         """
         self.manga = manga
         self.download_manager = download_manager
         self.exporter_class = exporter_class
+        self.capture_images = capture_images
 
     @property
     def chapters(self):
@@ -82,11 +89,11 @@ class MangaDownloader:
         )
         start = start - 1 if start else 0
         end = end or len(self.chapters)
-        for i in range(start, end):
-            await self._download_chapter(i, exporter)
-            if job:
-                job['progress'] += 1
-        exporter.close()
+        try:
+            await self._download_chapters_pipeline(range(start, end), exporter, job)
+        finally:
+            # Flushes the queued writes and finishes the archives of the completed chapters
+            await exporter.close_async()
         await self.download_manager.close()
         print("\nDownload completed ^^")
         return exporter.path
@@ -101,10 +108,62 @@ class MangaDownloader:
         exporter = self.exporter_class(
             os.path.join(self.download_manager.downloads_directory, self.manga.title)
         )
-        await self._download_chapter(index - 1, exporter)
-        exporter.close()
+        try:
+            await self._download_chapter(index - 1, exporter)
+        finally:
+            await exporter.close_async()
         await self.download_manager.close()
 
+    async def _download_chapters_pipeline(self, indexes: range, exporter: ExporterBase, job: dict = None):
+        """
+        Private method to download chapters with parse-ahead.
+
+        A producer resolves the image lists of the next PARSE_AHEAD chapters while CONCURRENT_CHAPTERS
+        consumers download chapters in order. All chapters share the download manager's per-host limits,
+        so the image budget stays global. Any failure cancels the whole pipeline, and frees the captures of
+        the chapters parsed ahead.
+
+        Args:
+            indexes (range): Indexes of the chapters to download.
+            exporter (ExporterBase): The exporter.
+            job (dict, optional): Job details, its progress is incremented for every downloaded chapter.
+        """
+        parsed: asyncio.Queue[tuple[int, asyncio.Task] | None] = asyncio.Queue(maxsize=PARSE_AHEAD)
+        unconsumed: set[asyncio.Task] = set()  # Parse tasks whose chapter is not being downloaded yet
+
+        async def produce(tg: asyncio.TaskGroup):
+            for index in indexes:
+                parse_task = tg.create_task(self._parse_chapter(index))
+                unconsumed.add(parse_task)
+                await parsed.put((index, parse_task))
+            for _ in range(CONCURRENT_CHAPTERS):
+                await parsed.put(None)
+
+        async def consume():
+            while (item := await parsed.get()) is not None:
+                index, parse_task = item
+                images_to_download, capture = await parse_task
+                unconsumed.discard(parse_task)
+                await self._download_chapter_images(index, images_to_download, capture, exporter)
+                if job:
+                    job['progress'] += 1
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                task_group.create_task(produce(task_group))
+                for _ in range(CONCURRENT_CHAPTERS):
+                    task_group.create_task(consume())
+        except ExceptionGroup as e:
+            # Surface the first failure as it would be raised by a sequential download
+            raise e.exceptions[0]
+        finally:
+            # The task group is done, the chapters parsed ahead of a failure still hold their captures
+            for parse_task in unconsumed:
+                if parse_task.done() and not parse_task.cancelled() and parse_task.exception() is None:
+                    _, capture = parse_task.result()
+                    if capture is not None:
+                        capture.close()
+
     async def _download_chapter(self, index: int, exporter: ExporterBase):
         """
         Private method to download a specific chapter by index.
@@ -112,20 +171,43 @@ class MangaDownloader:
         Args:
             index (int): Index of the chapter in the list.
         """
-        chapter = self.chapters[index]
-        images_to_download = await RequestParser().parse_chapter_images(chapter.link)
+        images_to_download, capture = await self._parse_chapter(index)
+        await self._download_chapter_images(index, images_to_download, capture, exporter)
+
+    async def _parse_chapter(self, index: int) -> tuple[list[str], ImageCapture | None]:
+        capture = ImageCapture() if self.capture_images else None
+        try:
+            links = await RequestParser().parse_chapter_images(self.chapters[index].link, capture=capture)
+        except BaseException:
+            if capture is not None:
+                capture.close()
+            raise
+        return links, capture
 
+    async def _download_chapter_images(self, index: int, images_to_download: list[str], capture: ImageCapture | None,
+                                       exporter: ExporterBase):
+        chapter = self.chapters[index]
         start_message = f"Downloading {chapter.name.capitalize()}"
-        await self.download_manager.download_files_async(
-            exporter,
-            links=images_to_download,
-            headers={'Referer': chapter.link, 'User-Agent': USER_AGENT, 'Accept-Encoding': 'identity'},
-            path=chapter.name,
-            start_message=start_message,
-        )
+        try:
+            failed = await self.download_manager.download_files_async(
+                exporter,
+                links=images_to_download,
+                headers={'Referer': chapter.link, 'User-Agent': USER_AGENT, 'Accept-Encoding': 'identity'},
+                path=chapter.name,
+                start_message=start_message,
+                capture=capture,
+            )
+        finally:
+            if capture is not None:
+                capture.close()  # Frees the capture budget for the next chapters
+        if failed:
+            print(f"{len(failed)} image(s) of {chapter.name} failed, run again to resume the download")
+        else:
+            await exporter.finish_chapter(chapter.name, index)
 
     @classmethod
-    async def load_manga(cls, manga_link: str, download_manager: DownloadManager, exporter_class=RawExporter):
+    async def load_manga(cls, manga_link: str, download_manager: DownloadManager, exporter_class=RawExporter,
+                         first_chapter: int = None):
         """
         Class method to load manga configuration and return an instance of MangaDownloader.
 
@@ -133,6 +215,7 @@ class MangaDownloader:
             manga_link (str): URL to the manga's main page.
             download_manager (DownloadManager): The download manager instance.
             exporter_class (Class): the exporter class.
+            first_chapter (int, optional): Index of the first chapter to download when known.
 
         Returns:
             MangaDownloader: An instance of MangaDownloader.
@@ -140,7 +223,7 @@ class MangaDownloader:
         Raises:
             Exception: If the website is not supported.
         """
-        manga = await cls.load_manga_info(manga_link)
+        manga = await cls.load_manga_info(manga_link, first_chapter)
         return cls(manga, download_manager, exporter_class)
 
     @classmethod
@@ -163,7 +246,7 @@ class MangaDownloader:
         return cls(manga, download_manager, exporter_class)
 
     @staticmethod
-    async def load_manga_info(manga_link: str):
+    async def load_manga_info(manga_link: str, first_chapter: int = None):
         """
         Static method to load manga information from a given link.
 
@@ -173,6 +256,8 @@ class MangaDownloader:
 
         Args:
             manga_link (str): The URL of the manga to load information from.
+            first_chapter (int, optional): Index of the first chapter to download when known, its images are
+                parsed ahead on a new domain.
 
         Returns:
             Manga: An object containing the title, URL, and list of chapters.
@@ -180,5 +265,5 @@ class MangaDownloader:
         Raises:
             Exception: If the parser fails to retrieve or process the manga information.
         """
-        title, chapters = await RequestParser().parse_manga_info(manga_link)
+        title, chapters = await RequestParser().parse_manga_info(manga_link, first_chapter=first_chapter)
         return Manga(title=title, url=manga_link, chapters=chapters)
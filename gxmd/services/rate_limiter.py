@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from gxmd.config import RATE_LIMITS_FILE
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` requests per second with bursts of up to `burst` requests.
+
+    Callers reserve a token even when the bucket is empty and sleep until it is refilled,
+    so waiters are served in order without polling.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long to wait before using it."""
+        now = time.monotonic()
+        self.tokens = min(self.tokens + (now - self.updated_at) * self.rate, self.burst)
+        self.updated_at = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """
+    Per-domain request rate limits shared by image downloads, HTML fetches and page renders.
+
+    Limits are read from RATE_LIMITS_FILE, e.g. ``{"example.com": {"rate": 2, "burst": 5}}``, a domain
+    also covers its subdomains and they share one bucket. Other domains use the default limit, which is
+    unlimited unless set with `configure`.
+    """
+
+    def __init__(self, path: str = RATE_LIMITS_FILE):
+        self.path = Path(os.path.expanduser(path))
+        self.limits: dict[str, dict] = self._load()
+        self.default_rate: float | None = None
+        self.default_burst: int = 1
+        self.buckets: dict[str, TokenBucket] = {}
+
+    def configure(self, rate: float | None, burst: int | None = None):
+        """Sets the default limit of domains missing from the limits file"""
+        self.default_rate = rate
+        self.default_burst = burst or 1
+        self.buckets.clear()
+
+    def get_bucket(self, url: str) -> TokenBucket | None:
+        host = urlparse(url).hostname or ''
+        domain = next((domain for domain in self.limits if host == domain or host.endswith(f".{domain}")), None)
+        key = domain or host
+        if key not in self.buckets:
+            limit = self.limits.get(domain) if domain else None
+            rate = limit.get('rate') if limit else self.default_rate
+            if not rate:
+                return None
+            burst = limit.get('burst', 1) if limit else self.default_burst
+            self.buckets[key] = TokenBucket(rate, burst)
+        return self.buckets[key]
+
+    async def acquire(self, url: str):
+        """Waits until a request to url is allowed"""
+        bucket = self.get_bucket(url)
+        if bucket is not None:
+            await bucket.acquire()
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+
+# Global instance
+rate_limiter = RateLimiter()
@@ -0,0 +1,132 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from gxmd.exceptions import GXMNetworkError, GXMCircuitOpenError
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Exponential backoff policy for image downloads.
+
+    Attributes:
+        max_attempts (int): Total number of attempts, including the first one.
+        base_delay (float): Delay in seconds before the first retry, doubled on every attempt.
+        max_delay (float): Upper bound of a single delay, also caps Retry-After.
+        jitter (float): Fraction of the delay that is randomized, 1.0 is "full jitter".
+        retry_statuses (frozenset[int]): HTTP statuses worth retrying.
+    """
+    max_attempts: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    jitter: float = 1.0
+    retry_statuses: frozenset[int] = field(default_factory=lambda: frozenset({408, 425, 429, 500, 502, 503, 504}))
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """Transient network errors are retryable, client errors (404, 403...) and local errors are fatal."""
+        if isinstance(error, GXMCircuitOpenError):
+            return False
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in self.retry_statuses
+        return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                                  GXMNetworkError))
+
+    def get_delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """Returns the delay before the next attempt, `attempt` being the number of failed attempts so far."""
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+
+        delay = min(self.base_delay * 2 ** (attempt - 1), self.max_delay)
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+
+def get_retry_after(error: BaseException | None) -> float | None:
+    """Reads the Retry-After header (seconds or HTTP date) of a 429/503 response error."""
+    if not isinstance(error, aiohttp.ClientResponseError) or error.status not in (429, 503) or not error.headers:
+        return None
+    value = error.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Whether the error says something about the health of the host (timeouts, resets, 5xx)."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After `failure_threshold` consecutive host failures the circuit opens and requests fail fast.
+    Once `reset_timeout` seconds have passed, a single probe request is let through (half-open),
+    its outcome closes or re-opens the circuit. The other requests wait for that outcome (see wait_allowed),
+    a probe that did not report within `probe_timeout` seconds is replaced by another one.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, probe_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at = 0.0
+        self._probe_done = asyncio.Event()
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == self.OPEN and now - self.opened_at >= self.reset_timeout or \
+                self.state == self.HALF_OPEN and now - self.probe_started_at >= self.probe_timeout:
+            self.state = self.HALF_OPEN
+            self.probe_started_at = now
+            self._probe_done.clear()
+            return True
+        return False
+
+    async def wait_allowed(self) -> bool:
+        """Like allow(), but while the probe is in flight the caller waits for its outcome instead of failing."""
+        while not self.allow():
+            if self.state != self.HALF_OPEN:
+                return False
+            remaining = self.probe_started_at + self.probe_timeout - time.monotonic()
+            try:
+                await asyncio.wait_for(self._probe_done.wait(), max(remaining, 0.0))
+            except asyncio.TimeoutError:
+                pass  # The probe never reported, the next allow() lets another one through
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_done.set()
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._probe_done.set()
@@ -0,0 +1,188 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+from multiprocessing.connection import Connection
+from typing import Any
+
+from selectolax.parser import HTMLParser, Node
+
+from gxmd.config import SCRAPER_WORKERS, SCRAPER_TIMEOUT, SCRAPER_CPU_LIMIT
+from gxmd.exceptions import GXMScraperError
+from gxmd.services.code_compiler import CodeCompiler, CompiledScraper
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows, only the wall-clock limit applies
+
+MAX_CACHED_SCRAPERS = 64  # Compiled scrapers kept by a worker
+
+
+def get_root(tree: HTMLParser, tag: str) -> Node:
+    """Returns the node of a serialized soup, the parser wraps it in html and body"""
+    if tag == 'html':
+        return tree.root
+    if tag == 'body' or tree.body is None:
+        return tree.body
+    return next((child for child in tree.body.iter() if child.tag == tag), tree.body)
+
+
+def set_cpu_limit(cpu_limit: int):
+    """Lets the worker use cpu_limit more CPU seconds, the kernel kills it past them (SIGXCPU)"""
+    if resource is None or not cpu_limit:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime) + 1 + cpu_limit
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft if hard == resource.RLIM_INFINITY else min(soft, hard), hard))
+
+
+def work(connection: Connection, cpu_limit: int):
+    """Worker process loop: runs (code, purpose, html, tag) requests until the connection closes"""
+    scrapers = {}
+    while True:
+        try:
+            code, purpose, html, tag = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            set_cpu_limit(cpu_limit)
+            scraper_func = scrapers.get((code, purpose))
+            if scraper_func is None:
+                if len(scrapers) >= MAX_CACHED_SCRAPERS:
+                    scrapers.clear()
+                scraper_func = scrapers[(code, purpose)] = CodeCompiler.compile_function(code, purpose)
+            res = scraper_func(get_root(HTMLParser(html), tag))
+            connection.send((True, res))
+        except Exception as e:
+            # The exception itself may not be picklable
+            connection.send((False, f"{type(e).__name__}: {e}"))
+
+
+class ScraperWorker:
+    """A worker process and the parent end of its pipe"""
+
+    def __init__(self, context, cpu_limit: int):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=work, args=(child_connection, cpu_limit), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.generation = 0
+
+    def run(self, request: tuple, timeout: float) -> tuple[bool, Any]:
+        self.connection.send(request)
+        if not self.connection.poll(timeout):
+            raise TimeoutError
+        return self.connection.recv()  # EOFError once the worker was killed
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.connection.close()
+
+
+class ScraperPool:
+    """
+    Warm worker processes running the generated scrapers on the serialized soup.
+
+    A scraper running in a thread could not be stopped: past its timeout it kept holding the GIL and froze the
+    downloads. A worker past the wall-clock timeout is killed, the kernel kills one past its CPU limit, and either
+    is replaced by a new one. Workers are started on demand and kept with their compiled scrapers, so the pool also
+    spreads the scraping of many chapters over the cores.
+
+    Args:
+        workers (int): Worker processes.
+        timeout (float): Default seconds a scraper may run.
+        cpu_limit (int): CPU seconds a scraper may use, 0 for none.
+    """
+
+    def __init__(self, workers: int = SCRAPER_WORKERS, timeout: float = SCRAPER_TIMEOUT,
+                 cpu_limit: int = SCRAPER_CPU_LIMIT):
+        self.workers = workers
+        self.timeout = timeout
+        self.cpu_limit = cpu_limit
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: queue.SimpleQueue[ScraperWorker | None] = queue.SimpleQueue()  # None is a free slot
+        self._running: set[ScraperWorker] = set()
+        self._started = 0
+        self._generation = 0  # Incremented by close(), the workers of an older one are not reused
+        self._lock = threading.Lock()
+
+    async def run(self, scraper: CompiledScraper, node: Node, timeout: float = None) -> Any:
+        """
+        Runs a scraper on node in a worker process.
+
+        Raises:
+            GXMScraperError: If the scraper raised, timed out or exceeded its CPU limit.
+        """
+        request = (scraper.code, scraper.purpose, node.html, node.tag)
+        return await asyncio.to_thread(self._run, request, timeout or self.timeout)
+
+    def _run(self, request: tuple, timeout: float) -> Any:
+        worker = self._acquire()
+        try:
+            ok, res = worker.run(request, timeout)
+        except TimeoutError:
+            self._discard(worker)
+            raise GXMScraperError(f"Scraper timed out after {timeout}s", 504)
+        except (EOFError, OSError):
+            self._discard(worker)
+            raise GXMScraperError("Scraper exceeded its CPU limit", 504)
+        self._release(worker)
+        if not ok:
+            raise GXMScraperError(f"Scraper failed: {res}", 500)
+        return res
+
+    def _acquire(self) -> ScraperWorker:
+        with self._lock:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                worker = False
+                if self._started < self.workers:
+                    self._started += 1
+                    worker = None
+        if worker is False:
+            worker = self._idle.get()  # Every worker is busy
+        if worker is None:
+            worker = ScraperWorker(self._context, self.cpu_limit)
+            worker.generation = self._generation
+        with self._lock:
+            self._running.add(worker)
+        return worker
+
+    def _release(self, worker: ScraperWorker):
+        with self._lock:
+            self._running.discard(worker)
+            if worker.generation != self._generation:
+                return  # Started before close()
+        self._idle.put(worker)
+
+    def _discard(self, worker: ScraperWorker):
+        worker.kill()
+        with self._lock:
+            self._running.discard(worker)
+            if worker.generation != self._generation:
+                return
+        self._idle.put(None)  # Its slot starts a new worker
+
+    def close(self):
+        """Kills the workers, their slots start new ones on the next runs"""
+        with self._lock:
+            slots = list(self._running)
+            while True:
+                try:
+                    slots.append(self._idle.get_nowait())
+                except queue.Empty:
+                    break
+            self._running.clear()
+            self._generation += 1
+        for worker in slots:
+            if worker is not None:
+                worker.kill()
+            self._idle.put(None)
+
+
+# Global instance
+scraper_pool = ScraperPool()
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: while a call for a key runs, later callers wait for its result instead of
+    running it again. Errors are shared the same way, and the key is forgotten once the call ends so later calls
+    run again.
+
+    The work runs in its own task, a cancelled waiter does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs factory() unless a call for key is already running, and returns its result.
+
+        Args:
+            key (Hashable): Identifies the work, e.g. ('bootstrap', domain) or ('page', url).
+            factory (Callable[[], Awaitable]): Starts the work.
+        """
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def is_running(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved, even when every waiter was cancelled
+
+
+# Global instance
+single_flight = SingleFlight()
@@ -0,0 +1,41 @@
+import json
+import os
+from pathlib import Path
+
+from gxmd.config import STRATEGIES_FILE
+
+
+class StrategySelector:
+    """
+    Learns per domain whether pages need a browser render or a plain HTTP fetch is enough.
+
+    Verdicts are kept per purpose ('manga_info', 'chapter_images') since list pages are often static
+    while readers are script-rendered, and persisted so later runs go straight to the right fetcher.
+    """
+
+    def __init__(self, path: str = STRATEGIES_FILE):
+        self.path = Path(os.path.expanduser(path))
+        self._verdicts: dict[str, str] = self._load()
+
+    def needs_render(self, domain: str, purpose: str) -> bool | None:
+        """Returns the learned verdict, None if the domain was never seen"""
+        verdict = self._verdicts.get(f"{domain}/{purpose}")
+        return None if verdict is None else verdict == 'render'
+
+    def set_verdict(self, domain: str, purpose: str, render: bool):
+        verdict = 'render' if render else 'http'
+        if self._verdicts.get(f"{domain}/{purpose}") == verdict:
+            return
+        self._verdicts[f"{domain}/{purpose}"] = verdict
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(self._verdicts, indent=2), encoding='utf-8')
+
+    def _load(self) -> dict[str, str]:
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+
+# Global instance
+strategy_selector = StrategySelector()
@@ -1,8 +1,6 @@
 import posixpath
-import re
 from urllib.parse import urlparse, ParseResult, urljoin
 
-from selectolax.lexbor import LexborHTMLParser
 from selectolax.parser import HTMLParser, Node
 
 
@@ -17,9 +15,21 @@ def clean_html(tree: HTMLParser):
         ".sp-wrapper", "[class*='sandpack']"
     ]
     # Clean AFTER finding content to avoid breaking structure
-    for sel in selectors:
-        for node in tree.css(sel):
-            node.decompose()
+    # One query for every selector, only the outermost matches are decomposed (with the ones they contain)
+    nodes = tree.css(", ".join(selectors))
+    matched = {node.mem_id for node in nodes}
+    outermost = [node for node in nodes if not has_ancestor(node, matched)]
+    for node in outermost:
+        node.decompose()
+
+
+def has_ancestor(node: Node, mem_ids: set[int]) -> bool:
+    parent = node.parent
+    while parent is not None:
+        if parent.mem_id in mem_ids:
+            return True
+        parent = parent.parent
+    return False
 
 def find_and_clean_content(tree: HTMLParser, to_parse_images: bool = False):
     soup = find_content(tree, to_parse_images)
@@ -44,7 +54,9 @@ def find_content(tree: HTMLParser, to_parse_images: bool = False) -> Node:
     best_score = 0
     best_node = tree.body
 
-    for div in tree.css("div"):
+    # A div scores at least as much as the divs inside it (its text and children include theirs) and comes before
+    # them, so only the outermost divs can win: every subtree is walked once instead of once per enclosing div.
+    for div in get_outermost_divs(tree.root):
         text_len = len(div.text(strip=True))
         if to_parse_images:
             child_count = len(div.css('img'))  # Boost images
@@ -59,6 +71,18 @@ def find_content(tree: HTMLParser, to_parse_images: bool = False) -> Node:
     return best_node
 
 
+def get_outermost_divs(root: Node) -> list[Node]:
+    """Returns the divs without a div ancestor, in document order"""
+    divs = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.tag == 'div':
+            divs.append(node)
+        elif node.css_first('div') is not None:
+            stack.extend(reversed(list(node.iter())))
+    return divs
+
 def resolve_url(url: str, parsed_url: ParseResult):
     if not (url.startswith('http') or url.startswith('ftp')):
         if url.strip().startswith("/"):
@@ -75,113 +99,3 @@ def extract_file_extension_url(url: str) -> str:
     path = urlparse(url).path
     _, file_extension = posixpath.splitext(path)
     return file_extension
-
-def is_script_rendered_images(tree: HTMLParser, threshold=0.5) -> bool:
-    """
-    Detects if a website wraps images in scripts.
-
-    Args:
-        tree (HTMLParser): Raw HTML string.
-        threshold (float): Ratio of hidden images to visible images to trigger 'True'.
-                           If 50% of detected URLs are only in scripts, return True.
-    """
-
-    # 1. Get all standard <img> src attributes
-    # Using a set for O(1) lookups
-    visible_imgs = {
-        node.attributes.get('src')
-        for node in tree.css('img')
-        if node.attributes.get('src')
-    }
-
-    # 2. Extract potential image URLs from <script> tags
-    # Regex for common image extensions (add more if needed)
-    img_pattern = re.compile(r'https?://[^\s"\'<>]+?\.(?:jpg|jpeg|png|webp)')
-
-    script_img_candidates = set()
-    for script in tree.css('script'):
-        if script.text(strip=True):
-            matches = img_pattern.findall(script.text())
-            script_img_candidates.update(matches)
-
-    # 3. Analyze the difference
-    if not script_img_candidates:
-        return False
-
-    # Identify images that are IN SCRIPTS but NOT IN TAGS
-    hidden_images = script_img_candidates - visible_imgs
-
-    total_images_found = len(script_img_candidates) + len(visible_imgs)
-    if total_images_found == 0:
-        return False
-
-    # Calculate "Hidden Ratio"
-    # If we found 100 images in scripts and 0 in tags, ratio is 1.0 (100% hidden)
-    hidden_ratio = len(hidden_images) / len(script_img_candidates) if script_img_candidates else 0
-
-    is_hidden = len(hidden_images) > 0 and hidden_ratio > threshold
-
-    return is_hidden
-
-
-def needs_rendering(html_content: str):
-    js_frameworks = [
-        r'vue\.js', r'react', r'angular', r'next\.js', r'nuxt\.js',
-        r'svelte', r'react-dom', r'@angular', r'preact', r'solid-js'
-    ]
-
-    # Check script tags for framework signatures
-    framework_match = re.search('|'.join(js_frameworks), html_content, re.IGNORECASE)
-    if framework_match:
-        return True
-
-    # Check for common data attributes
-    data_attrs = [
-        r'data-v-[\w-]+',  # Vue
-        r'data-reactroot', r'data-react-helmet',  # React
-        r'_ngcontent',  # Angular
-    ]
-    if any(re.search(pattern, html_content, re.IGNORECASE) for pattern in data_attrs):
-        return True
-    return False
-
-
-def content_ratio(parser: LexborHTMLParser):
-    # Count meaningful content vs boilerplate
-    text_content = len(parser.text().strip())
-    total_chars = len(parser.html)
-
-    # Very low text ratio suggests JS-generated content
-    return text_content / total_chars if total_chars > 0 else 0
-
-
-def likely_js_rendered(parser: LexborHTMLParser):
-    ratio = content_ratio(parser)
-    return ratio < 0.05  # Less than 5% meaningful content
-
-
-def detect_js_rendering(html_content, to_parse_images: bool = True):
-    """
-    Returns True if site likely needs JS rendering
-    """
-    checks: list[bool] = []
-    parser = LexborHTMLParser(html_content)
-
-    # 1. Framework detection
-    checks.append(needs_rendering(html_content))
-
-    # 2. Content ratio
-    checks.append(likely_js_rendered(parser))
-
-    # 3. Common placeholders
-    placeholders = ['loading...', 'please wait', 'content loading']
-    checks.append(any(phrase in html_content.lower() for phrase in placeholders))
-
-
-    # 4. Manga-specific: check for reader containers without images
-    if to_parse_images:
-        reader_container = parser.css_first('div.py-8.-mx-5, .reader-container, [class*="chapter"], [class*="reader"]')
-        if reader_container and len(reader_container.css('img')) == 0:
-            checks.append(True)
-
-    return any(checks)
@@ -33,6 +33,7 @@ setup(
     entry_points={
         'console_scripts': [
             'gxmd = gxmd.cli:main_cli',
+            'gxmd-browser = gxmd.parsers.strategies.browser_daemon:main_cli',
         ],
     },
     install_requires=requirements,
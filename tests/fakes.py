@@ -0,0 +1,48 @@
+"""Playwright fakes shared by the browser tests"""
+
+
+class FakePage:
+    def __init__(self, context):
+        self.context = context
+        self.closed = False
+        self.url = None
+
+    def is_closed(self):
+        return self.closed or self.context.closed
+
+    async def goto(self, url, **kwargs):
+        self.url = url
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.pages: list[FakePage] = []
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts: list[FakeContext] = []
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    async def close(self):
+        self.connected = False
+
+    async def new_context(self, **kwargs):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
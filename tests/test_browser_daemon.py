@@ -0,0 +1,96 @@
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch, AsyncMock, Mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from playwright.async_api import Error
+
+from gxmd.parsers.strategies import browser_daemon
+from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
+
+
+class TestBrowserDaemon(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.state_path = Path(self.directory.name, 'browser.json')
+        patcher = patch.object(browser_daemon, 'get_state_path', return_value=self.state_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_state(self, pid: int):
+        self.state_path.write_text(json.dumps({'pid': pid, 'port': 9333, 'endpoint': 'http://127.0.0.1:9333'}))
+
+    def test_get_endpoint(self):
+        self.assertIsNone(browser_daemon.get_endpoint())
+        self.write_state(os.getpid())
+        self.assertEqual(browser_daemon.get_endpoint(), 'http://127.0.0.1:9333')
+
+    def test_stale_state_is_ignored(self):
+        process = os.fork()
+        if process == 0:
+            os._exit(0)
+        os.waitpid(process, 0)
+        self.write_state(process)
+        self.assertIsNone(browser_daemon.get_endpoint())
+
+    def test_stop_kills_a_stuck_daemon(self):
+        process = subprocess.Popen([sys.executable, '-c', 'import signal, time; '
+                                    'signal.signal(signal.SIGTERM, signal.SIG_IGN); print(flush=True); time.sleep(60)'],
+                                   stdout=subprocess.PIPE, start_new_session=True)
+        self.addCleanup(process.stdout.close)
+        self.addCleanup(process.kill)
+        process.stdout.readline()  # Ignores SIGTERM
+        self.write_state(process.pid)
+
+        self.assertTrue(browser_daemon.stop(timeout=0.3))
+        self.assertEqual(process.wait(timeout=5), -signal.SIGKILL)
+        self.assertFalse(self.state_path.exists())
+
+    async def test_probe(self):
+        async def version(request):
+            return web.json_response({'Browser': 'Chrome'})
+
+        app = web.Application()
+        app.router.add_get('/json/version', version)
+        server = TestServer(app)
+        await server.start_server()
+        endpoint = str(server.make_url('')).rstrip('/')
+
+        self.assertTrue(await browser_daemon.probe(endpoint))
+        await server.close()
+        self.assertFalse(await browser_daemon.probe(endpoint))
+
+
+class TestPlaywrightStrategyLaunch(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.strategy = PlaywrightStrategy()
+        self.strategy._playwright = Mock()
+        self.strategy._playwright.chromium.connect_over_cdp = AsyncMock(return_value='daemon')
+        self.strategy._playwright.chromium.launch = AsyncMock(return_value='local')
+        self.addCleanup(setattr, PlaywrightStrategy, 'use_daemon', False)
+        self.addCleanup(vars(self.strategy).pop, '_playwright', None)
+
+    async def test_connect_to_daemon(self):
+        PlaywrightStrategy.use_daemon = True
+        with patch('gxmd.parsers.strategies.playwright_strategy.get_endpoint', return_value='http://127.0.0.1:9333'):
+            self.assertEqual(await self.strategy._launch(), 'daemon')
+
+    async def test_fallback_to_local_browser(self):
+        PlaywrightStrategy.use_daemon = True
+        self.strategy._playwright.chromium.connect_over_cdp.side_effect = Error('connect ECONNREFUSED')
+        with patch('gxmd.parsers.strategies.playwright_strategy.get_endpoint', return_value='http://127.0.0.1:9333'):
+            self.assertEqual(await self.strategy._launch(), 'local')
+        with patch('gxmd.parsers.strategies.playwright_strategy.get_endpoint', return_value=None):
+            self.assertEqual(await self.strategy._launch(), 'local')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from playwright.async_api import Error
+
+from gxmd.parsers.strategies.playwright_strategy import PlaywrightStrategy
+from tests.fakes import FakeBrowser
+
+
+class TestBrowserShards(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.strategy = PlaywrightStrategy()
+        self.browsers: list[FakeBrowser] = []
+
+        async def launch():
+            self.browsers.append(FakeBrowser())
+            return self.browsers[-1]
+
+        patch.object(self.strategy, '_launch', side_effect=launch).start()
+        patch.object(PlaywrightStrategy, '_initialized', True).start()
+        patch.object(PlaywrightStrategy, 'shard_count', 2).start()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(PlaywrightStrategy._shards.clear)
+
+    async def test_least_loaded_dispatch(self):
+        shards = [await self.strategy.acquire_shard() for _ in range(3)]
+        self.assertEqual(len(self.browsers), 2)
+        self.assertIs(shards[0], shards[2])
+        self.assertEqual([shard.in_flight for shard in self.strategy._shards], [2, 1])
+
+        # An idle browser is reused before launching
+        await self.strategy.release_shard(shards[1])
+        self.assertIs(await self.strategy.acquire_shard(), shards[1])
+
+    async def test_recycle_after_max_renders(self):
+        with patch.object(PlaywrightStrategy, 'max_renders', 2):
+            for _ in range(3):
+                await self.strategy.release_shard(await self.strategy.acquire_shard())
+        self.assertEqual(len(self.browsers), 2)
+        self.assertFalse(self.browsers[0].is_connected())
+        self.assertTrue(self.browsers[1].is_connected())
+
+    async def test_recycle_after_max_memory(self):
+        with patch.object(PlaywrightStrategy, 'max_memory', 100), \
+                patch('gxmd.parsers.strategies.browser_shard.BrowserShard.get_memory', AsyncMock(return_value=200)), \
+                patch('gxmd.parsers.strategies.playwright_strategy.MEMORY_CHECK_INTERVAL', 1):
+            await self.strategy.release_shard(await self.strategy.acquire_shard())
+        self.assertFalse(self.browsers[0].is_connected())
+
+    async def test_daemon_is_a_single_shard(self):
+        with patch.object(PlaywrightStrategy, 'use_daemon', True), patch.object(PlaywrightStrategy, 'max_renders', 1):
+            shards = [await self.strategy.acquire_shard() for _ in range(3)]
+            for shard in shards:
+                await self.strategy.release_shard(shard)
+        self.assertEqual(len(self.browsers), 1)
+        # Not recycled, a new connection would reach the same browser
+        self.assertTrue(self.browsers[0].is_connected())
+
+    async def test_crashed_browser_is_isolated(self):
+        async def render(shard, url, timeout, capture, purpose):
+            if shard.browser is self.browsers[0]:
+                shard.browser.connected = False
+                raise Error('Target page, context or browser has been closed')
+            return '<html></html>'
+
+        with patch.object(self.strategy, '_render', side_effect=render):
+            self.assertEqual(await self.strategy.fetch('https://manga.com/1'), '<html></html>')
+        self.assertEqual(len(self.browsers), 2)
+        self.assertEqual([shard.browser for shard in self.strategy._shards], [self.browsers[1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
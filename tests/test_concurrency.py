@@ -0,0 +1,88 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+
+import aiohttp
+from multidict import CIMultiDict
+
+from gxmd.services.concurrency import AdaptiveLimiter, HostLimiters
+
+
+class TestAdaptiveLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_limits_concurrency(self):
+        limiter = AdaptiveLimiter(2)
+        await limiter.acquire()
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        limiter.release(None)
+        await asyncio.wait_for(waiter, 1)
+        self.assertEqual(limiter.in_flight, 2)
+
+    async def test_additive_increase(self):
+        limiter = AdaptiveLimiter(4)
+        for _ in range(4):
+            await limiter.acquire()
+            limiter.release(0.1)
+        self.assertGreaterEqual(limiter.limit, 4.9)
+
+    async def test_multiplicative_decrease(self):
+        limiter = AdaptiveLimiter(8)
+        await limiter.acquire()
+        limiter.release(None, aiohttp.ClientResponseError(None, (), status=429, headers=CIMultiDict()))
+        self.assertEqual(limiter.limit, 4)
+
+        # A 404 says nothing about the load of the host
+        await limiter.acquire()
+        limiter.release(None, aiohttp.ClientResponseError(None, (), status=404, headers=CIMultiDict()))
+        self.assertEqual(limiter.limit, 4)
+
+    async def test_latency_spike(self):
+        limiter = AdaptiveLimiter(10)
+        await limiter.acquire()
+        limiter.release(0.0)
+        await limiter.acquire()
+        limiter.release(5.0)
+        self.assertLess(limiter.limit, 10)
+
+
+class TestHostLimiters(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'limits.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_persist_learned_limits(self):
+        limiters = HostLimiters(4, 64, self.path)
+        limiters.get('https://cdn.example.com/1.jpg').limit = 12
+        limiters.save()
+
+        limiters = HostLimiters(4, 64, self.path)
+        self.assertEqual(limiters.get('https://cdn.example.com/2.jpg').limit, 12)
+        self.assertEqual(limiters.get('https://other.example.com/1.jpg').limit, 4)
+
+    def test_learned_limits_are_capped(self):
+        limiters = HostLimiters(4, 64, self.path)
+        limiters.get('https://cdn.example.com/1.jpg').limit = 40
+        limiters.get('https://slow.example.com/1.jpg').limit = 30
+        limiters.save()
+
+        # An explicit -n caps the learned limits, without forgetting them
+        limiters = HostLimiters(8, 8, self.path)
+        self.assertEqual(limiters.get('https://cdn.example.com/1.jpg').limit, 8)
+        limiters.get('https://slow.example.com/1.jpg').limit = 3
+        limiters.save()
+
+        limiters = HostLimiters(4, 64, self.path)
+        self.assertEqual(limiters.get('https://cdn.example.com/1.jpg').limit, 40)
+        self.assertEqual(limiters.get('https://slow.example.com/1.jpg').limit, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
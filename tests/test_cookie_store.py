@@ -0,0 +1,148 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from unittest.mock import patch, Mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from requests.cookies import RequestsCookieJar
+
+from gxmd.exceptions import GXMNetworkError
+from gxmd.parsers.strategies.http_strategy import HttpClientStrategy
+from gxmd.services.cookie_store import CookieStore
+from gxmd.services.download_manager import DownloadManager
+
+
+class TestCookieStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'cookies.json')
+        self.store = CookieStore(self.path)
+
+    def test_cookies_are_persisted_with_expiry(self):
+        jar = RequestsCookieJar()
+        jar.set('cf_clearance', 'token', domain='.manga.com', path='/', expires=int(time.time()) + 3600)
+        jar.set('expired', '1', domain='.manga.com', path='/', expires=int(time.time()) - 1)
+        jar.set('session', 'abc', domain='manga.com', path='/')
+        self.store.update_from_jar('https://manga.com/', jar, 'Mozilla/5.0 (X11)')
+
+        store = CookieStore(self.path)
+        self.assertEqual(store.get_cookies('https://cdn.manga.com/1.jpg'), {'cf_clearance': 'token', 'session': 'abc'})
+        self.assertEqual(store.get_cookies('https://other.com/'), {})
+        self.assertEqual(store.get_headers('https://cdn.manga.com/1.jpg'),
+                         {'Cookie': 'cf_clearance=token; session=abc', 'User-Agent': 'Mozilla/5.0 (X11)'})
+
+        store.invalidate('https://manga.com/')
+        self.assertEqual(CookieStore(self.path).get_cookies('https://manga.com/'), {})
+
+    def test_update_from_morsels(self):
+        cookie = SimpleCookie()
+        cookie.load('token=1; Max-Age=60; Path=/reader')
+        cookie.load('gone=2; Max-Age=0')
+        self.store.update_from_morsels('https://manga.com/', cookie.values())
+        self.assertEqual(self.store.get_cookies('https://manga.com/reader/1'), {'token': '1'})
+        self.assertEqual(self.store.get_cookies('https://manga.com/'), {})
+
+    def test_session_cookie_keeps_stored_expiry(self):
+        expires = time.time() + 60
+        self.store.update('https://manga.com/', [{'name': 'cf_clearance', 'value': 'token', 'expires': expires}])
+        self.store.update('https://manga.com/', [{'name': 'cf_clearance', 'value': 'token'}])
+        self.assertEqual([cookie['expires'] for cookie in self.store.cookies], [expires])
+
+    def test_secure_cookies_and_extra_cookies(self):
+        self.store.update('https://manga.com/', [{'name': 'cf_clearance', 'value': 'token', 'secure': True},
+                                                 {'name': 'lang', 'value': 'en'}], 'Mozilla/5.0 (X11)')
+        self.assertEqual(self.store.get_cookies('http://manga.com/'), {'lang': 'en'})
+        self.assertEqual(self.store.get_cookies('wss://manga.com/'), {'lang': 'en'})
+        # The cookies of a render are merged over the stored ones
+        self.assertEqual(self.store.get_headers('https://manga.com/1.jpg', {'lang': 'fr', 'render': '1'}),
+                         {'Cookie': 'cf_clearance=token; lang=fr; render=1', 'User-Agent': 'Mozilla/5.0 (X11)'})
+        self.assertEqual(self.store.get_headers('https://other.com/1.jpg', {'render': '1'}), {'Cookie': 'render=1'})
+
+    def test_download_request_headers(self):
+        self.store.update('https://manga.com/', [{'name': 'cf_clearance', 'value': 'token'}], 'Mozilla/5.0 (X11)')
+        with patch('gxmd.services.download_manager.cookie_store', self.store):
+            headers = DownloadManager.get_request_headers('https://manga.com/1.jpg', {'Referer': 'https://manga.com/',
+                                                                                      'User-Agent': 'Mozilla/5.0'})
+        self.assertEqual(headers, {'Referer': 'https://manga.com/', 'User-Agent': 'Mozilla/5.0 (X11)',
+                                   'Cookie': 'cf_clearance=token'})
+
+
+class TestHttpClientStrategyCookies(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = CookieStore(os.path.join(self.directory.name, 'cookies.json'))
+        patcher = patch('gxmd.parsers.strategies.http_strategy.cookie_store', self.store)
+        patcher.start()
+
+        async def handler(request):
+            if request.cookies.get('cf_clearance') != 'valid':
+                return web.Response(status=403)
+            return web.Response(text='<html>chapter</html>')
+
+        async def login(request):
+            response = web.Response(text='<html>logged in</html>')
+            response.set_cookie('session', 'abc', path='/')
+            return response
+
+        app = web.Application()
+        app.router.add_get('/chapter', handler)
+        app.router.add_get('/login', login)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url('/chapter'))
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.strategy = HttpClientStrategy(self.executor)
+
+    async def asyncTearDown(self):
+        await self.strategy.close()
+        await self.server.close()
+        self.executor.shutdown()
+        patch.stopall()
+        self.directory.cleanup()
+
+    def create_scraper(self, token: str):
+        scraper = Mock()
+        scraper.headers = {'User-Agent': 'Mozilla/5.0 (X11)'}
+        scraper.cookies = RequestsCookieJar()
+        scraper.cookies.set('cf_clearance', token, domain=self.server.host, path='/')
+        scraper.get.return_value = Mock(text='<html>bootstrap</html>')
+        return scraper
+
+    async def test_stored_clearance_skips_challenge(self):
+        self.store.update(self.url, [{'name': 'cf_clearance', 'value': 'valid'}], 'Mozilla/5.0 (X11)')
+        with patch('cloudscraper.create_scraper') as create_scraper:
+            self.assertEqual(await self.strategy.fetch(self.url), '<html>chapter</html>')
+        create_scraper.assert_not_called()
+
+    async def test_rejected_clearance_is_renewed(self):
+        self.store.update(self.url, [{'name': 'cf_clearance', 'value': 'stale'}])
+        with patch('cloudscraper.create_scraper', return_value=self.create_scraper('valid')):
+            self.assertEqual(await self.strategy.fetch(self.url), '<html>bootstrap</html>')
+            self.assertEqual(await self.strategy.fetch(self.url), '<html>chapter</html>')
+        self.assertEqual(self.store.get_cookies(self.url), {'cf_clearance': 'valid'})
+
+    async def test_only_cookies_set_during_the_run_are_persisted(self):
+        expires = time.time() + 60
+        self.store.update(self.url, [{'name': 'cf_clearance', 'value': 'valid', 'expires': expires}])
+        self.assertEqual(await self.strategy.fetch(str(self.server.make_url('/login'))), '<html>logged in</html>')
+        await self.strategy.close()
+
+        cookies = {cookie['name']: cookie['expires'] for cookie in self.store.cookies}
+        self.assertEqual(cookies['cf_clearance'], expires)
+        self.assertIn('session', cookies)
+
+    async def test_failed_challenge_is_not_stored(self):
+        scraper = self.create_scraper('valid')
+        scraper.get.return_value = Mock(ok=False, status_code=503)
+        with patch('cloudscraper.create_scraper', return_value=scraper), self.assertRaises(GXMNetworkError):
+            await self.strategy.fetch(self.url)
+        self.assertEqual(self.store.get_cookies(self.url), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from selectolax.parser import HTMLParser
+
+from gxmd.parsers.document import Document
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.strategy_selector import StrategySelector
+from gxmd.utils import clean_html
+
+STATIC_PAGE = f"<html><body><main><h1>Manga</h1><p>{'Chapter list and synopsis. ' * 10}</p></main></body></html>"
+READER_PAGE = ('<html><body><div class="reader-container">' + ''.join(f'<img src="https://cdn.com/{i}.jpg">'
+                                                                      for i in range(3))
+               + f'</div><p>{"Comments. " * 20}</p></body></html>')
+
+
+class TestDocument(unittest.TestCase):
+    def test_render_detection(self):
+        self.assertFalse(Document(STATIC_PAGE).needs_rendering(False))
+        self.assertFalse(Document(READER_PAGE).needs_rendering(True))
+
+        # Framework signatures, framework attributes and placeholders
+        self.assertTrue(Document(STATIC_PAGE.replace('</body>', '<script src="/React-DOM.min.js"></script></body>'))
+                        .needs_rendering(False))
+        self.assertTrue(Document(STATIC_PAGE.replace('<main>', '<main data-v-7ba5bd90>')).needs_rendering(False))
+        self.assertFalse(Document(STATIC_PAGE.replace('<main>', '<main data-v->')).needs_rendering(False))
+        self.assertTrue(Document(STATIC_PAGE.replace('<h1>Manga', '<h1>Please Wait')).needs_rendering(False))
+        # Mostly markup
+        self.assertTrue(Document(f'<html><body>{"<div></div>" * 100}<p>Text</p></body></html>')
+                        .needs_rendering(False))
+        # A reader without its images
+        empty_reader = READER_PAGE.replace('<img', '<span')
+        self.assertFalse(Document(empty_reader).needs_rendering(False))
+        self.assertTrue(Document(empty_reader).needs_rendering(True))
+
+    def test_script_rendered_images(self):
+        script = '<script>var pages = ["https://cdn.com/1.jpg", "https://cdn.com/5.jpg", "https://cdn.com/6.jpg"];' \
+                 '</script>'
+        document = Document(READER_PAGE.replace('</body>', f'{script}</body>'))
+        self.assertEqual(document.script_image_urls, {f'https://cdn.com/{i}.jpg' for i in (1, 5, 6)})
+        self.assertTrue(document.has_script_rendered_images())
+        self.assertFalse(Document(READER_PAGE).has_script_rendered_images())
+        self.assertFalse(Document(READER_PAGE.replace('</body>', f'{script.replace("5", "0")}</body>'))
+                         .has_script_rendered_images())
+
+    def test_nested_noise_is_cleaned(self):
+        tree = HTMLParser('<html><body><aside><nav><footer>Links</footer></nav></aside><footer><aside>Ad</aside>'
+                          '</footer><div class="ad-top">Ad</div><main><p>Content</p><nav>Pages</nav></main>'
+                          '</body></html>')
+        clean_html(tree)
+        self.assertEqual(tree.body.html, '<body><main><p>Content</p></main></body>')
+
+
+class TestLoadPageParsesOnce(unittest.IsolatedAsyncioTestCase):
+    async def test_page_is_parsed_once(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        selector = StrategySelector(os.path.join(directory.name, 'strategies.json'))
+        with patch('gxmd.parsers.request_parser.strategy_selector', selector), \
+                patch.object(RequestParser.http_fetcher, 'fetch', AsyncMock(return_value=READER_PAGE)), \
+                patch('gxmd.parsers.document.HTMLParser', wraps=HTMLParser) as parser_class:
+            soup, render = await RequestParser().load_page('https://manga.com/chapter-1', True,
+                                                           purpose='chapter_images')
+
+        self.assertFalse(render)
+        self.assertEqual(len(soup.css('img')), 3)
+        parser_class.assert_called_once_with(READER_PAGE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,21 @@
 import os
 import shutil
+import tempfile
+import time
 import unittest
 from concurrent.futures import Future, wait, ALL_COMPLETED
+from email.utils import formatdate
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import patch, AsyncMock
 
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from gxmd.services.blob_store import BlobStore
 from gxmd.services.download_manager import DownloadManager
+from gxmd.services.download_manifest import ChapterManifest
+from gxmd.services.exporter import RawExporter
+from gxmd.services.image_capture import ImageCapture, CapturedImage, CaptureBudget
 
 
 class TestDownloadManager(unittest.TestCase):
@@ -50,5 +60,173 @@ class TestDownloadManager(unittest.TestCase):
             self.assertTrue(os.path.exists('downloads/file.txt'))
 
 
+class TestChapterManifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'Chapter 1', 'manifest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_saves_are_debounced(self):
+        manifest = ChapterManifest(self.path, save_interval=60)
+        with patch.object(manifest, 'save', wraps=manifest.save) as save:
+            for i in range(10):
+                manifest.update(f'{i}.jpg', f'https://cdn.com/{i}.jpg', size=3)
+                manifest.update(f'{i}.jpg', f'https://cdn.com/{i}.jpg', completed=True)
+            self.assertEqual(save.call_count, 1)
+            self.assertEqual(len(ChapterManifest.load(self.path).entries), 1)
+
+            manifest.flush()
+            manifest.flush()
+            self.assertEqual(save.call_count, 2)
+        self.assertEqual(ChapterManifest.load(self.path).failed, [])
+        self.assertEqual(len(ChapterManifest.load(self.path).entries), 10)
+
+
+class TestDownloadManagerResume(unittest.IsolatedAsyncioTestCase):
+    image = bytes(range(256)) * 64
+
+    async def asyncSetUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.image_path = image_path = os.path.join(self.directory, 'image.jpg')
+        with open(image_path, 'wb') as f:
+            f.write(self.image)
+
+        self.requests = []
+        self.cookies = []
+
+        async def handler(request):
+            self.requests.append(request.headers.get('Range'))
+            self.cookies.append(request.headers.get('Cookie'))
+            return web.FileResponse(image_path)
+
+        app = web.Application()
+        app.router.add_get('/image.jpg', handler)
+        app.router.add_get('/image2.jpg', handler)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.link = str(self.server.make_url('/image.jpg'))
+
+        self.download_manager = DownloadManager(self.directory, number_of_connections=2,
+                                                limits_file=os.path.join(self.directory, 'limits.json'))
+        self.exporter = RawExporter(os.path.join(self.directory, 'Manga'))
+
+    async def asyncTearDown(self):
+        await self.download_manager.close()
+        await self.server.close()
+        shutil.rmtree(self.directory)
+
+    def read_image(self):
+        with open(os.path.join(self.exporter.path, 'Chapter 1', '1.jpg'), 'rb') as f:
+            return f.read()
+
+    def write_partial(self, size: int, **kwargs) -> str:
+        manifest = ChapterManifest.load(self.exporter.get_manifest_path('Chapter 1'))
+        manifest.update('1.jpg', self.link, size=len(self.image), **kwargs)
+        part_path = self.exporter.get_part_path('Chapter 1', '1.jpg')
+        with open(part_path, 'wb') as f:
+            f.write(self.image[:size])
+        return part_path
+
+    async def test_resume_partial_download(self):
+        last_modified = formatdate(os.path.getmtime(self.image_path), usegmt=True)
+        part_path = self.write_partial(1000, last_modified=last_modified)
+
+        failed = await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+
+        self.assertEqual(failed, [])
+        self.assertEqual(self.requests, ['bytes=1000-'])
+        self.assertEqual(self.read_image(), self.image)
+        self.assertFalse(os.path.exists(part_path))
+
+    async def test_partial_download_without_validator_restarts(self):
+        self.write_partial(1000, etag='W/"weak"')
+
+        failed = await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+
+        self.assertEqual(failed, [])
+        self.assertEqual(self.requests, [None])
+        self.assertEqual(self.read_image(), self.image)
+
+    async def test_unsatisfiable_range_restarts(self):
+        # The file on the server shrank below the partial file
+        part_path = self.write_partial(1000, last_modified=formatdate(time.time() + 3600, usegmt=True))
+        self.image = self.image[:500]
+        with open(self.image_path, 'wb') as f:
+            f.write(self.image)
+
+        failed = await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+
+        self.assertEqual(failed, [])
+        self.assertEqual(self.requests, ['bytes=1000-', None])
+        self.assertEqual(self.read_image(), self.image)
+        self.assertFalse(os.path.exists(part_path))
+        manifest = ChapterManifest.load(self.exporter.get_manifest_path('Chapter 1'))
+        self.assertEqual(manifest.entries['1.jpg'].size, 500)
+
+    async def test_skip_completed_download(self):
+        await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+        await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+
+        self.assertEqual(self.requests, [None])
+        self.assertEqual(self.read_image(), self.image)
+        manifest = ChapterManifest.load(self.exporter.get_manifest_path('Chapter 1'))
+        self.assertTrue(manifest.entries['1.jpg'].completed)
+        self.assertEqual(manifest.entries['1.jpg'].size, len(self.image))
+
+    async def test_deduplicate_with_blob_store(self):
+        self.download_manager.blob_store = BlobStore(os.path.join(self.directory, 'blobs'))
+        await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+        await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 2')
+
+        self.assertEqual(self.requests, [None])
+        first = os.stat(os.path.join(self.exporter.path, 'Chapter 1', '1.jpg'))
+        second = os.stat(os.path.join(self.exporter.path, 'Chapter 2', '1.jpg'))
+        self.assertEqual(first.st_size, len(self.image))
+        self.assertEqual(first.st_ino, second.st_ino)
+
+    async def test_export_captured_images(self):
+        capture = ImageCapture(budget=CaptureBudget())
+        capture.images[self.link] = CapturedImage(self.link, {}, b'captured')
+        capture.cookies = [{'name': 'token', 'value': 'abc', 'domain': self.server.host, 'path': '/'}]
+        missed_link = str(self.server.make_url('/image2.jpg'))
+
+        failed = await self.download_manager.download_files_async(self.exporter, [self.link, missed_link],
+                                                                  path='Chapter 1', capture=capture)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(self.read_image(), b'captured')
+        # Only the image missed by the render is downloaded, with the browser cookies
+        self.assertEqual(self.cookies, ['token=abc'])
+        with open(os.path.join(self.exporter.path, 'Chapter 1', '2.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), self.image)
+
+    async def test_open_circuit_skips_only_requests(self):
+        breaker = self.download_manager.get_circuit_breaker(self.link)
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        capture = ImageCapture(budget=CaptureBudget())
+        capture.images[self.link] = CapturedImage(self.link, {}, b'captured')
+        missed_link = str(self.server.make_url('/image2.jpg'))
+
+        failed = await self.download_manager.download_files_async(self.exporter, [self.link, missed_link],
+                                                                  path='Chapter 1', capture=capture)
+
+        # The captured image is exported without contacting the host, which stays open
+        self.assertEqual(failed, ['2.jpg'])
+        self.assertEqual(self.read_image(), b'captured')
+        self.assertEqual(self.requests, [])
+        self.assertEqual(breaker.state, breaker.OPEN)
+
+    async def test_rate_token_is_taken_with_a_slot(self):
+        limiter = self.download_manager.limiters.get(self.link)
+        in_flight = []
+        with patch('gxmd.services.download_manager.rate_limiter') as rate_limiter:
+            rate_limiter.acquire = AsyncMock(side_effect=lambda link: in_flight.append(limiter.in_flight))
+            await self.download_manager.download_files_async(self.exporter, [self.link], path='Chapter 1')
+        self.assertEqual(in_flight, [1])
+
+
 if __name__ == '__main__':
     unittest.main()
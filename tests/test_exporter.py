@@ -0,0 +1,128 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from gxmd.services.exporter import CBZExporter, RawExporter
+from gxmd.services.file_writer import FileWriter
+
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def failing_chunks(*parts: bytes):
+    for part in parts:
+        yield part
+    raise ConnectionResetError("connection lost")
+
+
+class TestExporter(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'Manga')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    async def test_raw_add_image_stream(self):
+        exporter = RawExporter(self.path)
+        await exporter.add_image_stream(chunks(b'abc', b'def'), 'Chapter 1', '1.jpg')
+        exporter.close()
+
+        with open(os.path.join(self.path, 'Chapter 1', '1.jpg'), 'rb') as f:
+            self.assertEqual(f.read(), b'abcdef')
+        self.assertFalse(os.path.exists(exporter.staging_dir))
+
+    async def test_raw_add_image_stream_failure_discards_part(self):
+        exporter = RawExporter(self.path)
+        with self.assertRaises(ConnectionResetError):
+            await exporter.add_image_stream(failing_chunks(b'abc'), 'Chapter 1', '1.jpg')
+
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'Chapter 1', '1.jpg')))
+        self.assertFalse(os.path.exists(exporter.get_part_path('Chapter 1', '1.jpg')))
+
+    async def test_cbz_add_image_stream(self):
+        exporter = CBZExporter(self.path)
+        await exporter.add_image_stream(chunks(b'abc', b'def'), 'Chapter 1', '1.jpg')
+        exporter.close()
+
+        with zipfile.ZipFile(exporter.path) as archive:
+            self.assertEqual(archive.read('Chapter 1/1.jpg'), b'abcdef')
+            self.assertEqual(archive.getinfo('Chapter 1/1.jpg').compress_type, zipfile.ZIP_STORED)
+
+    async def test_cbz_has_image_tracks_exported_images(self):
+        exporter = CBZExporter(self.path)
+        await exporter.add_image_stream(chunks(b'abc'), 'Chapter 1', '1.jpg')
+        await exporter.add_image_async(b'abcd', 'Chapter 1', '2.jpg')
+        self.assertTrue(exporter.has_image('Chapter 1', '1.jpg', 3))
+        self.assertTrue(exporter.has_image('Chapter 1', '2.jpg', 4))
+        self.assertFalse(exporter.has_image('Chapter 1', '2.jpg', 3))
+        await exporter.close_async()
+
+        # A new run finds the images already in the archive
+        exporter = CBZExporter(self.path)
+        self.assertTrue(exporter.has_image('Chapter 1', '1.jpg', 3))
+        self.assertTrue(exporter.has_image('Chapter 1', '2.jpg', 4))
+        await exporter.close_async()
+
+    async def test_cbz_chapter_archives(self):
+        exporter = CBZExporter(self.path, group='chapter', workers=2)
+        for chapter in ('Chapter 1', 'Chapter 2'):
+            await exporter.add_image_stream(chunks(b'abc'), chapter, '1.jpg')
+            await exporter.add_image_stream(chunks(b'def'), chapter, '2.jpg')
+            self.assertTrue(exporter.has_image(chapter, '1.jpg', 3))
+            await exporter.finish_chapter(chapter, 0)
+        exporter.close()
+
+        for chapter in ('Chapter 1', 'Chapter 2'):
+            with zipfile.ZipFile(os.path.join(self.path, f'{chapter}.cbz')) as archive:
+                self.assertEqual(archive.namelist(), ['1.jpg', '2.jpg'])
+        self.assertFalse(os.path.exists(exporter.staging_dir))
+
+        # A new run finds the images in the archives
+        exporter = CBZExporter(self.path, group='chapter')
+        self.assertTrue(exporter.has_image('Chapter 2', '2.jpg', 3))
+        self.assertFalse(exporter.has_image('Chapter 3', '1.jpg'))
+        exporter.close()
+
+    async def test_cbz_volume_archives(self):
+        exporter = CBZExporter(self.path, group='volume', volume_size=2)
+        for index in range(3):
+            await exporter.add_image_stream(chunks(b'abc'), f'Chapter {index + 1}', '1.jpg')
+            await exporter.finish_chapter(f'Chapter {index + 1}', index)
+        exporter.close()
+
+        with zipfile.ZipFile(os.path.join(self.path, 'Volume 1.cbz')) as archive:
+            self.assertEqual(archive.namelist(), ['Chapter 1/1.jpg', 'Chapter 2/1.jpg'])
+        with zipfile.ZipFile(os.path.join(self.path, 'Volume 2.cbz')) as archive:
+            self.assertEqual(archive.namelist(), ['Chapter 3/1.jpg'])
+
+
+class TestFileWriter(unittest.IsolatedAsyncioTestCase):
+    async def test_backpressure(self):
+        writer = FileWriter(max_pending_bytes=10)
+        release = threading.Event()
+        await writer.submit(release.wait, size=8)
+
+        blocked = asyncio.create_task(writer.submit(len, b'abcd', size=4))
+        await asyncio.sleep(0.05)
+        self.assertFalse(blocked.done())
+
+        release.set()
+        self.assertEqual(await (await asyncio.wait_for(blocked, 1)), 4)
+        writer.close()
+
+    async def test_errors_are_raised(self):
+        writer = FileWriter()
+        with self.assertRaises(FileNotFoundError):
+            await writer.call(os.unlink, '/nonexistent/gxmd')
+        writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
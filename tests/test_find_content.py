@@ -0,0 +1,53 @@
+import random
+import unittest
+
+from selectolax.parser import HTMLParser, Node
+
+from gxmd.utils import find_content, get_outermost_divs
+
+
+def find_content_rescan(tree: HTMLParser, to_parse_images: bool = False) -> Node:
+    """The fallback scoring of find_content, walking the subtree of every div"""
+    best_score = 0
+    best_node = tree.body
+    for div in tree.css("div"):
+        text_len = len(div.text(strip=True))
+        child_count = len(div.css('img')) if to_parse_images else len(div.css("li, a"))
+        score = text_len + (child_count * 100)
+        if score > best_score and text_len > 200:
+            best_score = score
+            best_node = div
+    return best_node
+
+
+def create_node(rng: random.Random, depth: int) -> str:
+    if depth == 0 or rng.random() < 0.2:
+        return rng.choice([
+            f'<a href="/c/{rng.randint(1, 99)}">Chapter {rng.randint(1, 99)}</a>',
+            f'<img src="/{rng.randint(1, 99)}.jpg">',
+            ' '.join(['text'] * rng.randint(1, 80)),
+            '  ',
+        ])
+    tag = rng.choice(['div', 'div', 'div', 'section', 'ul', 'li', 'span'])
+    children = ''.join(create_node(rng, depth - 1) for _ in range(rng.randint(0, 5)))
+    return f'<{tag} class="n{rng.randint(1, 9)}">{children}</{tag}>'
+
+
+class TestFindContent(unittest.TestCase):
+    def test_same_container_as_rescans(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            html = f'<html><body>{"".join(create_node(rng, 7) for _ in range(rng.randint(1, 4)))}</body></html>'
+            for to_parse_images in (False, True):
+                expected = find_content_rescan(HTMLParser(html), to_parse_images)
+                node = find_content(HTMLParser(html), to_parse_images)
+                self.assertEqual((node.tag, node.html), (expected.tag, expected.html), html)
+
+    def test_outermost_divs(self):
+        tree = HTMLParser('<html><body><div id="a"><div></div></div><section><ul><li><div id="b"></div></li></ul>'
+                          '</section><p><div id="c"><span><div></div></span></div></p></body></html>')
+        self.assertEqual([div.id for div in get_outermost_divs(tree.root)], ['a', 'b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
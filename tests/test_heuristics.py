@@ -0,0 +1,89 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from selectolax.parser import HTMLParser
+
+from gxmd.parsers.heuristics import parse_manga_info, parse_chapter_images, get_heuristic_scraper
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.code_registry import registry
+
+
+def create_madara_page(chapters) -> str:
+    items = ''.join(f'<li class="wp-manga-chapter"><a href="/manga/solo/chapter-{n}/">Chapter {n} </a>'
+                    f'<span class="chapter-release-date">1 day ago</span></li>' for n in chapters)
+    return (
+        '<html><head><meta property="og:title" content="Solo Leveling - Site"></head><body>'
+        '<div class="site-content"><div class="post-title"><h1> Solo Leveling </h1></div>'
+        '<div class="c-sidebar widget"><ul><li class="wp-manga-chapter"><a href="/other/chapter-99/">Chapter 99</a>'
+        '</li></ul></div>'
+        f'<div class="page-content-listing"><ul class="main version-chap">{items}</ul></div>'
+        '</div></body></html>'
+    )
+
+
+def create_reader_page(count: int, paginated: bool = False) -> str:
+    pages = ''.join(
+        f'<div class="page-break">{f"<span>{i + 1} / {count}</span>" if paginated else ""}'
+        f'<img class="wp-manga-chapter-img" data-src=" https://cdn.manga.com/solo/{i}.jpg?token=a " '
+        f'src="data:image/gif;base64,R0lGOD"></div>'
+        for i in range(count)
+    )
+    return (
+        '<html><body><div class="wrapper"><div class="header"><img class="logo" src="/logo.png"></div>'
+        f'<div class="reading-content">{pages}</div>'
+        '<div class="related"><div><img src="/covers/1.jpg"></div><div><img src="/covers/2.jpg"></div></div>'
+        '</div></body></html>'
+    )
+
+
+class TestHeuristics(unittest.TestCase):
+    def test_parse_madara_manga_info(self):
+        res = parse_manga_info(HTMLParser(create_madara_page([3, 2.5, 2, 1])).body)
+        self.assertEqual(res['manga_name'], 'Solo Leveling')
+        self.assertEqual([chapter['name'] for chapter in res['manga_chapters']],
+                         ['Chapter 1', 'Chapter 2', 'Chapter 2.5', 'Chapter 3'])
+        self.assertEqual(res['manga_chapters'][0]['link'], '/manga/solo/chapter-1/')
+
+    def test_parse_generic_chapter_list(self):
+        links = ''.join(f'<a href="/c/{n}">Ch. {n}</a>' for n in range(5, 0, -1))
+        html = f'<html><head><title>x</title></head><body><main><h1>Manga</h1><nav><a href="/">Home</a></nav>' \
+               f'<div class="chapters">{links}</div></main></body></html>'
+        res = parse_manga_info(HTMLParser(html).body)
+        self.assertEqual([chapter['link'] for chapter in res['manga_chapters']], [f'/c/{n}' for n in range(1, 6)])
+
+    def test_parse_densest_image_container(self):
+        res = parse_chapter_images(HTMLParser(create_reader_page(10)).body)
+        self.assertEqual(res, [f'https://cdn.manga.com/solo/{i}.jpg?token=a' for i in range(10)])
+
+    def test_parse_paginated_images(self):
+        html = create_reader_page(6, paginated=True).replace('</body>', '<div><img src="/ad1.jpg"><img src="/ad2.jpg">'
+                                                                        '<img src="/ad3.jpg"></div></body>')
+        res = parse_chapter_images(HTMLParser(html).body)
+        self.assertEqual(len(res), 6)
+
+    def test_unrecognized_layout_is_rejected(self):
+        soup = HTMLParser('<html><body><p>Nothing to see</p><img src="/1.jpg"></body></html>').body
+        self.assertIsNone(get_heuristic_scraper('manga_info', soup))
+        self.assertIsNone(get_heuristic_scraper('chapter_images', soup))
+        self.assertIs(get_heuristic_scraper('chapter_images', HTMLParser(create_reader_page(4)).body),
+                      parse_chapter_images)
+
+
+class TestHeuristicScraper(unittest.IsolatedAsyncioTestCase):
+    async def test_known_layout_skips_the_code_generator(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        soup = HTMLParser(create_madara_page(range(1, 4))).body
+        with patch.object(registry, 'scrapers_dir', Path(directory.name)), \
+                patch('gxmd.parsers.request_parser.get_code_generator') as get_code_generator:
+            scraper_func = await RequestParser.get_scraper_func('https://madara.com/manga/solo/', soup, 'manga_info')
+            registry.set_scraper_func('madara.com', 'manga_info', None)
+
+        self.assertIs(scraper_func, parse_manga_info)
+        get_code_generator.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
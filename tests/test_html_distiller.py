@@ -0,0 +1,63 @@
+import unittest
+
+from selectolax.parser import HTMLParser
+
+from gxmd.services.code_compiler import CodeCompiler
+from gxmd.services.html_distiller import distill_html, count_tokens
+
+SCRAPER_CODE = '''
+def parse_manga_info(node):
+    chapters = [{'name': a.text(strip=True), 'link': a.attributes['href']}
+                for a in node.css('.page-content-listing li.wp-manga-chapter > a')]
+    return {'manga_name': node.css_first('.post-title h1').text(strip=True), 'manga_chapters': chapters}
+'''
+
+
+def create_page(chapters: int) -> str:
+    items = ''.join(
+        f'<li class="wp-manga-chapter" style="color: red" onclick="track({n})">\n'
+        f'  <a href="/manga/solo/chapter-{n}/" aria-label="Read">Chapter {n}</a>\n'
+        f'  <span class="chapter-release-date">{"Released a long time ago " * 10}</span>\n'
+        f'</li>\n' for n in range(chapters, 0, -1)
+    )
+    return (
+        '<html><body><div class="site-content"><script>var ads = 1;</script><!-- header -->'
+        '<div class="post-title"><h1>Solo  Leveling</h1></div>'
+        f'<div class="page-content-listing"><ul>{items}</ul></div>'
+        '<img class="cover" src="data:image/png;base64,iVBORw0KGgo" width="100"></div></body></html>'
+    )
+
+
+class TestHtmlDistiller(unittest.TestCase):
+    def test_repeated_siblings_are_sampled(self):
+        distilled = distill_html(HTMLParser(create_page(2000)).body)
+        self.assertLess(distilled.tokens_after * 50, distilled.tokens_before)
+        self.assertEqual(distilled.tokens_before, count_tokens(HTMLParser(create_page(2000)).body.html))
+        self.assertEqual(distilled.html.count('class="wp-manga-chapter"'), 3)
+        self.assertIn("<!-- 1997 more <li class='wp-manga-chapter'> -->", distilled.html)
+        # The last item shows the list is in descending order
+        self.assertIn('chapter-2000/', distilled.html)
+        self.assertIn('chapter-1/', distilled.html)
+
+    def test_noise_is_dropped(self):
+        distilled = distill_html(HTMLParser(create_page(3)).body).html
+        for noise in ('<script', 'header', 'style=', 'onclick=', 'aria-label=', 'width=', 'base64'):
+            self.assertNotIn(noise, distilled)
+        # Text nodes keep their spaces, long ones are truncated
+        self.assertIn('<h1>Solo Leveling</h1>', distilled)
+        self.assertIn('<a href="/manga/solo/chapter-3/">Chapter 3</a>', distilled)
+        self.assertNotIn('Released a long time ago ' * 4, distilled)
+        self.assertIn('src="data:…"', distilled)
+
+    def test_scraper_of_distilled_html_works_on_full_page(self):
+        scraper_func = CodeCompiler.compile_code(SCRAPER_CODE, 'manga_info')
+        distilled = HTMLParser(distill_html(HTMLParser(create_page(500)).body).html).body
+        self.assertEqual(len(scraper_func(distilled)['manga_chapters']), 3)
+
+        res = scraper_func(HTMLParser(create_page(500)).body)
+        self.assertEqual(len(res['manga_chapters']), 500)
+        self.assertEqual(res['manga_chapters'][-1], {'name': 'Chapter 1', 'link': '/manga/solo/chapter-1/'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+
+from gxmd.services.image_capture import ImageCapture, CaptureBudget
+
+
+class FakeRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+
+class FakeResponse:
+    def __init__(self, url, body, resource_type='image', ok=True):
+        self.url = url
+        self.request = FakeRequest(resource_type)
+        self.ok = ok
+        self.headers = {'content-type': 'image/jpeg', 'content-length': str(len(body))}
+        self._body = body
+
+    async def body(self):
+        return self._body
+
+
+class FakeContext:
+    async def cookies(self):
+        return [
+            {'name': 'session', 'value': '1', 'domain': '.manga.com', 'path': '/', 'secure': False},
+            {'name': 'secure', 'value': '2', 'domain': 'cdn.manga.com', 'path': '/', 'secure': True},
+            {'name': 'other', 'value': '3', 'domain': 'other.com', 'path': '/', 'secure': False},
+        ]
+
+
+class FakePage:
+    def __init__(self):
+        self.listeners = {}
+
+    def on(self, event, listener):
+        self.listeners[event] = listener
+
+    def remove_listener(self, event, listener):
+        del self.listeners[event]
+
+
+class TestImageCapture(unittest.IsolatedAsyncioTestCase):
+    async def test_capture_image_responses(self):
+        capture = ImageCapture(budget=CaptureBudget(10))
+        page = FakePage()
+        capture.attach(page)
+        page.listeners['response'](FakeResponse('https://cdn.manga.com/1.jpg', b'123456'))
+        page.listeners['response'](FakeResponse('https://cdn.manga.com/2.jpg', b'123456'))
+        page.listeners['response'](FakeResponse('https://manga.com/app.js', b'js', resource_type='script'))
+        page.listeners['response'](FakeResponse('https://cdn.manga.com/3.jpg', b'', ok=False))
+        await capture.detach(page, FakeContext())
+
+        self.assertFalse(page.listeners)
+        self.assertEqual(capture.get('https://cdn.manga.com/1.jpg').body, b'123456')
+        # Over max_bytes, only the URL is recorded
+        self.assertIn('https://cdn.manga.com/2.jpg', capture.images)
+        self.assertIsNone(capture.get('https://cdn.manga.com/2.jpg'))
+        self.assertEqual(list(capture.images), ['https://cdn.manga.com/1.jpg', 'https://cdn.manga.com/2.jpg'])
+
+    async def test_budget_is_shared_by_the_captures(self):
+        budget = CaptureBudget(10)
+        first, second = ImageCapture(budget=budget), ImageCapture(budget=budget)
+        for capture, url in ((first, 'https://cdn.manga.com/1.jpg'), (second, 'https://cdn.manga.com/2.jpg')):
+            page = FakePage()
+            capture.attach(page)
+            page.listeners['response'](FakeResponse(url, b'123456'))
+            await capture.detach(page, FakeContext())
+        self.assertIsNotNone(first.get('https://cdn.manga.com/1.jpg'))
+        self.assertIsNone(second.get('https://cdn.manga.com/2.jpg'))
+
+        # Exported bodies and finished chapters release the budget
+        first.discard('https://cdn.manga.com/1.jpg')
+        self.assertIsNone(first.get('https://cdn.manga.com/1.jpg'))
+        self.assertEqual(budget.size, 0)
+        page = FakePage()
+        second.attach(page)
+        page.listeners['response'](FakeResponse('https://cdn.manga.com/3.jpg', b'123456'))
+        await second.detach(page, FakeContext())
+        self.assertEqual(budget.size, 6)
+        second.close()
+        self.assertEqual(budget.size, 0)
+
+    async def test_cookies(self):
+        capture = ImageCapture()
+        page = FakePage()
+        capture.attach(page)
+        await capture.detach(page, FakeContext())
+        self.assertEqual(capture.get_cookies('https://cdn.manga.com/1.jpg'), {'session': '1', 'secure': '2'})
+        self.assertEqual(capture.get_cookies('http://cdn.manga.com/1.jpg'), {'session': '1'})
+        self.assertEqual(capture.get_cookies('https://example.com/1.jpg'), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
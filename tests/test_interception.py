@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+
+from gxmd.parsers.strategies.interception import InterceptionPolicy, InterceptionStats, get_site
+
+
+class TestInterceptionPolicy(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'interception.json')
+
+    def create_policy(self, config: dict | None = None) -> InterceptionPolicy:
+        if config is not None:
+            with open(self.path, 'w') as f:
+                json.dump(config, f)
+        return InterceptionPolicy(self.path)
+
+    def test_default_rules(self):
+        policy = self.create_policy()
+        reason = policy.get_block_reason
+        self.assertIsNone(reason('https://manga.com/read/1', 'document', False, 'manga.com'))
+        self.assertIsNone(reason('https://manga.com/app.js', 'script', False, 'manga.com'))
+        self.assertIsNone(reason('https://api.manga.com/pages', 'fetch', False, 'manga.com'))
+        self.assertIsNone(reason('https://cdn.jsdelivr.net/vue.js', 'script', False, 'manga.com'))
+        self.assertEqual(reason('https://manga.com/1.jpg', 'image', False, 'manga.com'), 'image')
+        self.assertEqual(reason('https://manga.com/font.woff2', 'font', False, 'manga.com'), 'font')
+        self.assertEqual(reason('https://www.googletagmanager.com/gtm.js', 'script', False, 'manga.com'), 'denylist')
+        self.assertEqual(reason('https://ads.net/frame', 'document', True, 'manga.com'), 'third-party')
+        self.assertIsNone(reason('https://www.manga.com/frame', 'document', True, 'manga.com'))
+
+    def test_site_rules(self):
+        policy = self.create_policy({
+            '*': {'deny': ['tracker.io']},
+            'manga.com': {'allow': ['images.manga.com'], 'deny': ['cdn.jsdelivr.net'], 'block_types': ['font']},
+        })
+        reason = policy.get_block_reason
+        self.assertIsNone(reason('https://images.manga.com/1.jpg', 'image', False, 'read.manga.com'))
+        self.assertIsNone(reason('https://manga.com/1.jpg', 'image', False, 'manga.com'))
+        self.assertEqual(reason('https://cdn.jsdelivr.net/vue.js', 'script', False, 'manga.com'), 'denylist')
+        self.assertEqual(reason('https://tracker.io/t.js', 'script', False, 'manga.com'), 'denylist')
+        self.assertIsNone(reason('https://cdn.jsdelivr.net/vue.js', 'script', False, 'other.com'))
+        self.assertEqual(reason('https://other.com/1.jpg', 'image', False, 'other.com'), 'image')
+
+    def test_get_site(self):
+        self.assertEqual(get_site('a.b.example.com'), 'example.com')
+        self.assertEqual(get_site('read.example.co.uk'), 'example.co.uk')
+
+    def test_stats(self):
+        stats, render_stats = InterceptionStats(), InterceptionStats(allowed=2)
+        render_stats.blocked.update(['image', 'image', 'font'])
+        stats.merge(render_stats)
+        self.assertEqual(str(stats), "2 allowed, 3 blocked (image: 2, font: 1)")
+
+
+if __name__ == '__main__':
+    unittest.main()
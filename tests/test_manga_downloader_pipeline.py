@@ -0,0 +1,92 @@
+import asyncio
+import unittest
+from unittest.mock import patch, Mock, AsyncMock
+
+from gxmd.entities.manga import Manga
+from gxmd.entities.manga_chapter import MangaChapter
+from gxmd.exceptions import GXMDownloaderError
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.download_manager import DownloadManager
+from gxmd.services.manga_downloader import MangaDownloader
+
+
+class TestMangaDownloaderPipeline(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        chapters = [MangaChapter(name=f"Chapter {i}", link=f"http://example.com/chapter{i}") for i in range(1, 7)]
+        self.manga = Manga(title="Test Manga", url="http://example.com/manga", chapters=chapters)
+        self.download_manager = Mock(spec=DownloadManager)
+        self.download_manager.downloads_directory = "/path/to/downloads"
+        self.download_manager.download_files_async = AsyncMock(return_value=[])
+        self.exporter = Mock()
+        self.exporter.finish_chapter = AsyncMock()
+        self.exporter.close_async = AsyncMock()
+        self.manga_downloader = MangaDownloader(self.manga, self.download_manager, Mock(return_value=self.exporter))
+
+    async def test_download_chapters(self):
+        parsed = []
+
+        async def parse_chapter_images(link, capture=None):
+            parsed.append(link)
+            await asyncio.sleep(0)
+            return [f"{link}/1.jpg"]
+
+        job = {'progress': 0}
+        with patch.object(RequestParser, 'parse_chapter_images', side_effect=parse_chapter_images):
+            await self.manga_downloader.download_chapters(2, 5, job=job)
+
+        self.assertEqual(parsed, [f"http://example.com/chapter{i}" for i in range(2, 6)])
+        downloaded = sorted(call.kwargs['path'] for call in self.download_manager.download_files_async.call_args_list)
+        self.assertEqual(downloaded, [f"Chapter {i}" for i in range(2, 6)])
+        self.assertEqual(job['progress'], 4)
+        self.assertEqual(self.exporter.finish_chapter.await_count, 4)
+        self.exporter.close_async.assert_awaited_once()
+
+    async def test_parsing_overlaps_downloads(self):
+        events = []
+
+        async def parse_chapter_images(link, capture=None):
+            events.append(('parsed', link.removeprefix("http://example.com/chapter")))
+            return [f"{link}/1.jpg"]
+
+        async def download_files_async(exporter, links, path, **kwargs):
+            events.append(('download', path.removeprefix("Chapter ")))
+            await asyncio.sleep(0.01)
+            events.append(('downloaded', path.removeprefix("Chapter ")))
+            return []
+
+        self.download_manager.download_files_async = AsyncMock(side_effect=download_files_async)
+        with patch.object(RequestParser, 'parse_chapter_images', side_effect=parse_chapter_images):
+            await self.manga_downloader.download_chapters()
+
+        for chapter in range(1, 6):
+            # Chapter N+1 is parsed while chapter N is downloaded
+            self.assertLess(events.index(('parsed', str(chapter + 1))), events.index(('downloaded', str(chapter))))
+            self.assertLess(events.index(('download', str(chapter))), events.index(('downloaded', str(chapter))))
+
+    async def test_download_chapters_failure(self):
+        with patch.object(RequestParser, 'parse_chapter_images', side_effect=GXMDownloaderError("not supported")):
+            with self.assertRaises(GXMDownloaderError):
+                await self.manga_downloader.download_chapters()
+        self.exporter.close_async.assert_awaited_once()
+
+    async def test_download_failure_frees_parsed_captures(self):
+        captures = []
+
+        def image_capture():
+            captures.append(Mock())
+            return captures[-1]
+
+        self.download_manager.download_files_async = AsyncMock(side_effect=GXMDownloaderError("disk full"))
+        with patch('gxmd.services.manga_downloader.ImageCapture', side_effect=image_capture), \
+                patch.object(RequestParser, 'parse_chapter_images', AsyncMock(return_value=["http://cdn.com/1.jpg"])):
+            with self.assertRaises(GXMDownloaderError):
+                await self.manga_downloader.download_chapters()
+
+        self.assertGreater(len(captures), 1)
+        for capture in captures:
+            capture.close.assert_called_once()
+        self.exporter.close_async.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
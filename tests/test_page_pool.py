@@ -0,0 +1,78 @@
+import asyncio
+import unittest
+
+from gxmd.parsers.strategies.page_pool import PagePool
+from tests.fakes import FakeBrowser
+
+
+class TestPagePool(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.browser = FakeBrowser()
+
+    async def test_pages_are_reset_and_recycled(self):
+        pool = PagePool(max_pages=2)
+        async with pool.page(self.browser, 'https://a.com/1') as page:
+            await page.goto('https://a.com/1')
+        self.assertEqual(page.url, 'about:blank')
+
+        async with pool.page(self.browser, 'https://a.com/2') as second_page:
+            pass
+        self.assertIs(page, second_page)
+        self.assertEqual(len(self.browser.contexts), 1)
+
+    async def test_context_affinity(self):
+        pool = PagePool(max_pages=4)
+        async with pool.page(self.browser, 'https://a.com/1') as a_page:
+            pass
+        async with pool.page(self.browser, 'https://b.com/1') as b_page:
+            pass
+        self.assertIsNot(a_page.context, b_page.context)
+
+        pool = PagePool(max_pages=4, affinity=False)
+        async with pool.page(self.browser, 'https://a.com/1') as a_page:
+            pass
+        async with pool.page(self.browser, 'https://b.com/1') as b_page:
+            pass
+        self.assertIs(a_page.context, b_page.context)
+
+    async def test_context_is_recycled_after_max_uses(self):
+        pool = PagePool(max_pages=2, max_context_uses=2)
+        for _ in range(3):
+            async with pool.page(self.browser, 'https://a.com') as page:
+                pass
+        self.assertEqual(len(self.browser.contexts), 2)
+        self.assertTrue(self.browser.contexts[0].closed)
+        self.assertFalse(page.context.closed)
+
+    async def test_open_pages_are_bounded(self):
+        pool = PagePool(max_pages=2)
+        running = 0
+        max_running = 0
+
+        async def render(url):
+            nonlocal running, max_running
+            async with pool.page(self.browser, url):
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        await asyncio.gather(*(render(f'https://site{i % 3}.com') for i in range(9)))
+        open_pages = [page for context in self.browser.contexts for page in context.pages if not page.is_closed()]
+        self.assertEqual(max_running, 2)
+        self.assertLessEqual(len(open_pages), 2)
+
+    async def test_unhealthy_page_is_replaced(self):
+        pool = PagePool(max_pages=2)
+        async with pool.page(self.browser, 'https://a.com') as page:
+            await page.close()
+        async with pool.page(self.browser, 'https://a.com') as second_page:
+            pass
+        self.assertIsNot(page, second_page)
+
+        await pool.close()
+        self.assertTrue(all(context.closed for context in self.browser.contexts))
+
+
+if __name__ == '__main__':
+    unittest.main()
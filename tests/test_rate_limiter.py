@@ -0,0 +1,50 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from gxmd.services.rate_limiter import TokenBucket, RateLimiter
+
+
+class TestTokenBucket(unittest.TestCase):
+    @patch('gxmd.services.rate_limiter.time.monotonic', return_value=100.0)
+    def test_burst_then_rate(self, monotonic):
+        bucket = TokenBucket(rate=2, burst=3)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertEqual(bucket.reserve(), 0.5)
+        self.assertEqual(bucket.reserve(), 1.0)
+
+        monotonic.return_value = 102.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'rate_limits.json')
+        with open(self.path, 'w') as f:
+            json.dump({"example.com": {"rate": 1, "burst": 2}}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_domain_limits(self):
+        limiter = RateLimiter(self.path)
+        bucket = limiter.get_bucket('https://example.com/manga')
+        self.assertEqual((bucket.rate, bucket.burst), (1, 2))
+        # Subdomains share the domain's bucket
+        self.assertIs(limiter.get_bucket('https://cdn.example.com/1.jpg'), bucket)
+        self.assertIsNone(limiter.get_bucket('https://other.com/manga'))
+
+    def test_default_limit(self):
+        limiter = RateLimiter(self.path)
+        limiter.configure(5, 10)
+        bucket = limiter.get_bucket('https://other.com/manga')
+        self.assertEqual((bucket.rate, bucket.burst), (5, 10))
+        self.assertIsNot(limiter.get_bucket('https://another.com/manga'), bucket)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from playwright.async_api import Error
+
+from gxmd.parsers.strategies.readiness import (ReadinessDetector, OBSERVE_MUTATIONS_JS, DOM_IDLE_JS,
+                                               FIND_READER_SELECTOR_JS)
+
+
+class FakeRequest:
+    resource_type = 'fetch'
+
+
+class FakePage:
+    """Simulates a page whose DOM mutates until `settle_at` and whose reader appears at `reader_at`"""
+
+    def __init__(self, settle_at: float, reader_at: float | None = None, redirect_until: float = 0):
+        self.start = time.monotonic()
+        self.settle_at = settle_at
+        self.reader_at = reader_at
+        self.redirect_until = redirect_until  # The page is navigating until then
+        self.listeners = {}
+        self.observed = False
+
+    def on(self, event, listener):
+        self.listeners[event] = listener
+
+    def remove_listener(self, event, listener):
+        del self.listeners[event]
+
+    async def evaluate(self, script, *args):
+        elapsed = time.monotonic() - self.start
+        if elapsed < self.redirect_until:
+            self.observed = False
+            raise Error('Execution context was destroyed, most likely because of a navigation')
+        if script == OBSERVE_MUTATIONS_JS:
+            self.observed = True
+        elif script == DOM_IDLE_JS:
+            return max(elapsed - self.settle_at, 0) if self.observed else None
+        elif script == FIND_READER_SELECTOR_JS:
+            return '#reader img[src]'
+
+    async def wait_for_load_state(self, state):
+        pass
+
+    async def wait_for_selector(self, selector, **kwargs):
+        if self.reader_at is None:
+            await asyncio.Future()
+        await asyncio.sleep(self.reader_at - (time.monotonic() - self.start))
+
+
+class TestReadinessDetector(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'readiness.json')
+        self.detector = ReadinessDetector(self.path, timeout=2, quiet_window=0.1)
+
+    async def test_waits_for_quiescence_and_learns_selector(self):
+        page = FakePage(settle_at=0.2)
+        latency = await self.detector.wait(page, 'https://manga.com/1', self.detector.track(page), 'chapter_images')
+
+        self.assertGreaterEqual(latency, 0.25)
+        self.assertLess(latency, 1)
+        self.assertEqual(self.detector.domains['manga.com']['reader_selector'], '#reader img[src]')
+
+    async def test_selector_is_learned_on_chapter_pages_only(self):
+        page = FakePage(settle_at=0.1)
+        await self.detector.wait(page, 'https://manga.com/manga', self.detector.track(page), 'manga_info')
+        self.assertNotIn('reader_selector', self.detector.domains['manga.com'])
+
+        # Nor used as the ready signal of the other pages
+        self.detector.domains['manga.com']['reader_selector'] = '#reader img[src]'
+        page = FakePage(settle_at=0.3, reader_at=0)
+        latency = await self.detector.wait(page, 'https://manga.com/manga', self.detector.track(page), 'manga_info')
+        self.assertGreaterEqual(latency, 0.35)
+
+    async def test_redirect_keeps_waiting(self):
+        page = FakePage(settle_at=0.3, redirect_until=0.2)
+        latency = await self.detector.wait(page, 'https://manga.com/1', self.detector.track(page))
+        self.assertGreaterEqual(latency, 0.35)
+        self.assertTrue(page.observed)
+
+    async def test_pending_requests_delay_readiness(self):
+        page = FakePage(settle_at=0)
+        tracker = self.detector.track(page)
+        request = FakeRequest()
+        page.listeners['request'](request)
+        asyncio.get_running_loop().call_later(0.3, page.listeners['requestfinished'], request)
+
+        latency = await self.detector.wait(page, 'https://manga.com/1', tracker)
+        self.assertGreaterEqual(latency, 0.35)
+        tracker.close()
+        self.assertFalse(page.listeners)
+
+    async def test_learned_selector_short_circuits(self):
+        self.detector.domains['manga.com'] = {'reader_selector': '#reader img[src]'}
+        page = FakePage(settle_at=5, reader_at=0.1)
+        latency = await self.detector.wait(page, 'https://manga.com/1', self.detector.track(page), 'chapter_images')
+        self.assertLess(latency, 0.5)
+
+    async def test_ceiling_and_persisted_latencies(self):
+        page = FakePage(settle_at=60)
+        latency = await self.detector.wait(page, 'https://slow.com/1', self.detector.track(page))
+        self.assertLess(latency, 2.5)
+        self.assertNotIn('reader_selector', self.detector.domains['slow.com'])
+
+        self.detector.save()
+        detector = ReadinessDetector(self.path)
+        self.assertAlmostEqual(detector.get_latency('slow.com'), latency, places=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
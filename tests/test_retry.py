@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+
+import aiohttp
+from multidict import CIMultiDict
+
+from gxmd.exceptions import GXMCircuitOpenError
+from gxmd.services.retry import RetryPolicy, CircuitBreaker, is_host_failure
+
+
+def response_error(status: int, headers: dict = None) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(None, (), status=status, headers=CIMultiDict(headers or {}))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(base_delay=1.0, max_delay=10.0, jitter=0.0)
+
+    def test_exponential_backoff(self):
+        self.assertEqual([self.policy.get_delay(attempt) for attempt in range(1, 6)], [1.0, 2.0, 4.0, 8.0, 10.0])
+
+    def test_jitter_stays_within_delay(self):
+        policy = RetryPolicy(base_delay=1.0, jitter=1.0)
+        for _ in range(100):
+            self.assertTrue(0.0 <= policy.get_delay(3) <= 4.0)
+
+    def test_retry_after(self):
+        self.assertEqual(self.policy.get_delay(1, response_error(429, {'Retry-After': '7'})), 7.0)
+        self.assertEqual(self.policy.get_delay(1, response_error(503, {'Retry-After': '120'})), 10.0)
+        self.assertEqual(self.policy.get_delay(1, response_error(503, {'Retry-After': 'Thu, 01 Jan 1970 00:00:00 GMT'})),
+                         0.0)
+
+    def test_is_retryable(self):
+        self.assertTrue(self.policy.is_retryable(asyncio.TimeoutError()))
+        self.assertTrue(self.policy.is_retryable(aiohttp.ClientConnectionError()))
+        self.assertTrue(self.policy.is_retryable(response_error(429)))
+        self.assertTrue(self.policy.is_retryable(response_error(502)))
+        self.assertFalse(self.policy.is_retryable(response_error(404)))
+        self.assertFalse(self.policy.is_retryable(GXMCircuitOpenError()))
+        self.assertFalse(self.policy.is_retryable(PermissionError()))
+
+    def test_is_host_failure(self):
+        self.assertTrue(is_host_failure(asyncio.TimeoutError()))
+        self.assertTrue(is_host_failure(response_error(500)))
+        self.assertFalse(is_host_failure(response_error(404)))
+        self.assertFalse(is_host_failure(response_error(429)))
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())  # The probe
+        self.assertFalse(breaker.allow())  # Only one probe
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestCircuitBreakerProbe(unittest.IsolatedAsyncioTestCase):
+    async def test_requests_wait_for_the_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(await breaker.wait_allowed())  # The probe
+        waiters = [asyncio.create_task(breaker.wait_allowed()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        self.assertFalse(any(waiter.done() for waiter in waiters))
+
+        breaker.record_success()
+        self.assertEqual(await asyncio.gather(*waiters), [True, True, True])
+
+    async def test_failed_probe_fails_the_waiters(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        breaker.opened_at -= 60
+        self.assertTrue(await breaker.wait_allowed())
+        waiter = asyncio.create_task(breaker.wait_allowed())
+        await asyncio.sleep(0.01)
+        breaker.record_failure()
+        self.assertFalse(await waiter)
+
+    async def test_lost_probe_is_replaced(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, probe_timeout=0.05)
+        breaker.record_failure()
+        self.assertTrue(await breaker.wait_allowed())
+        # The probe never reports, a waiter becomes the next probe
+        self.assertTrue(await asyncio.wait_for(breaker.wait_allowed(), 1))
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import asyncio
+import time
+import unittest
+
+from selectolax.parser import HTMLParser
+
+from gxmd.exceptions import GXMScraperError
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.code_compiler import CodeCompiler
+from gxmd.services.scraper_pool import ScraperPool
+
+IMAGES_SCRAPER = '''
+def parse_chapter_images(node):
+    return [node.tag, __import__('os').getpid()] + [img.attributes['src'] for img in node.css('img')]
+'''
+LOOPING_SCRAPER = '''
+def parse_chapter_images(node):
+    while True:
+        pass
+'''
+FAILING_SCRAPER = '''
+def parse_chapter_images(node):
+    return node.css_first('.missing').text()
+'''
+
+
+class TestScraperPool(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.pool = ScraperPool(workers=1, timeout=1, cpu_limit=0)
+        self.addCleanup(self.pool.close)
+        tree = HTMLParser('<html><body><nav><img src="/logo.png"></nav>'
+                          '<main class="reader"><img src="/1.jpg"><img src="/2.jpg"></main></body></html>')
+        self.soup = tree.css_first('main')
+
+    async def test_scraper_runs_on_the_serialized_soup(self):
+        scraper = CodeCompiler.compile_code(IMAGES_SCRAPER, 'chapter_images')
+        tag, pid, *images = await self.pool.run(scraper, self.soup)
+        self.assertEqual((tag, images), ('main', ['/1.jpg', '/2.jpg']))
+
+        # The worker is kept warm
+        _, next_pid, *_ = await self.pool.run(scraper, self.soup)
+        self.assertEqual(next_pid, pid)
+
+    async def test_overrunning_worker_is_replaced(self):
+        scraper = CodeCompiler.compile_code(IMAGES_SCRAPER, 'chapter_images')
+        _, pid, *_ = await self.pool.run(scraper, self.soup)
+
+        with self.assertRaises(GXMScraperError) as context:
+            await self.pool.run(CodeCompiler.compile_code(LOOPING_SCRAPER, 'chapter_images'), self.soup, 0.2)
+        self.assertEqual(context.exception.args[1], 504)
+
+        _, next_pid, *images = await self.pool.run(scraper, self.soup)
+        self.assertNotEqual(next_pid, pid)
+        self.assertEqual(images, ['/1.jpg', '/2.jpg'])
+
+    async def test_cpu_limit_kills_the_worker(self):
+        pool = ScraperPool(workers=1, timeout=30, cpu_limit=1)
+        self.addCleanup(pool.close)
+        start = time.monotonic()
+        with self.assertRaisesRegex(GXMScraperError, 'CPU limit'):
+            await pool.run(CodeCompiler.compile_code(LOOPING_SCRAPER, 'chapter_images'), self.soup)
+        self.assertLess(time.monotonic() - start, 10)
+
+    async def test_scraper_errors_are_reported(self):
+        with self.assertRaisesRegex(GXMScraperError, 'AttributeError') as context:
+            await self.pool.run(CodeCompiler.compile_code(FAILING_SCRAPER, 'chapter_images'), self.soup)
+        self.assertEqual(context.exception.args[1], 500)
+
+    async def test_slow_scraper_does_not_block_the_event_loop(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        with self.assertRaises(GXMScraperError):
+            await RequestParser.run_scraper_with_timeout(CodeCompiler.compile_code(LOOPING_SCRAPER, 'chapter_images'),
+                                                         self.soup, 0.5)
+        ticker.cancel()
+        self.assertGreater(ticks, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch, Mock, AsyncMock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from requests.cookies import RequestsCookieJar
+from selectolax.parser import HTMLParser
+
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.parsers.strategies.http_strategy import HttpClientStrategy
+from gxmd.services.code_registry import registry
+from gxmd.services.cookie_store import CookieStore
+from gxmd.services.image_capture import ImageCapture
+from gxmd.services.single_flight import SingleFlight
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_run(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(*(single_flight.do('key', lambda i=i: work(i)) for i in range(3)))
+        self.assertEqual(results, [0, 0, 0])
+        self.assertEqual(calls, [0])
+        self.assertFalse(single_flight.is_running('key'))
+
+        # A later call runs again
+        self.assertEqual(await single_flight.do('key', lambda: work(5)), 5)
+
+    async def test_errors_are_shared(self):
+        single_flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError('failed')
+
+        results = await asyncio.gather(single_flight.do('key', fail), single_flight.do('key', fail),
+                                       return_exceptions=True)
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+
+    async def test_cancelled_waiter_does_not_cancel_the_work(self):
+        single_flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return 'done'
+
+        first = asyncio.create_task(single_flight.do('key', work))
+        second = asyncio.create_task(single_flight.do('key', work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        self.assertEqual(await second, 'done')
+
+
+class TestCoalescedWork(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    async def test_domain_bootstrap_runs_once(self):
+        async def handler(request):
+            return web.Response(text=f'<html>{request.path}</html>')
+
+        app = web.Application()
+        app.router.add_get('/{page}', handler)
+        server = TestServer(app)
+        await server.start_server()
+        self.addAsyncCleanup(server.close)
+
+        def create_scraper():
+            scraper = Mock()
+            scraper.headers = {'User-Agent': 'Mozilla/5.0 (X11)'}
+            scraper.cookies = RequestsCookieJar()
+            scraper.get.side_effect = lambda url, timeout: Mock(text='<html>bootstrap</html>')
+            return scraper
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        strategy = HttpClientStrategy(executor)
+        store = CookieStore(str(Path(self.directory.name, 'cookies.json')))
+        with patch('gxmd.parsers.strategies.http_strategy.cookie_store', store), \
+                patch('gxmd.parsers.strategies.http_strategy.rate_limiter') as rate_limiter, \
+                patch('cloudscraper.create_scraper', side_effect=create_scraper) as scraper_factory:
+            rate_limiter.acquire = AsyncMock()
+            pages = await asyncio.gather(*(strategy.fetch(str(server.make_url(f'/{i}'))) for i in range(3)))
+            await strategy.close()
+
+        scraper_factory.assert_called_once()
+        # One token per page, the followers of the bootstrap do not take another one
+        self.assertEqual(rate_limiter.acquire.await_count, 3)
+        self.assertEqual(sorted(pages), ['<html>/1</html>', '<html>/2</html>', '<html>bootstrap</html>'])
+
+    async def test_capturing_render_is_not_shared(self):
+        async def render(url, capture=None, purpose=None):
+            await asyncio.sleep(0.01)
+            return '<html><body><main><p>' + 'Text. ' * 50 + '</p></main></body></html>'
+
+        capture = ImageCapture()
+        with patch.object(RequestParser.render_fetcher, 'fetch', AsyncMock(side_effect=render)) as fetch:
+            await asyncio.gather(*(RequestParser().load_page('https://manga.com/1', render=True) for _ in range(2)))
+            self.assertEqual(fetch.await_count, 1)
+
+            fetch.reset_mock()
+            await asyncio.gather(RequestParser().load_page('https://manga.com/1', render=True),
+                                 RequestParser().load_page('https://manga.com/1', render=True, capture=capture))
+            self.assertEqual(fetch.await_count, 2)
+            self.assertIn(capture, [call.kwargs.get('capture') for call in fetch.await_args_list])
+
+    async def test_scraper_generation_runs_once(self):
+        async def generate(purpose, html, url):
+            await asyncio.sleep(0.01)
+            return 'def parse(soup): return []'
+
+        soup = HTMLParser('<html><body></body></html>').body
+        with patch.object(registry, 'scrapers_dir', Path(self.directory.name)), \
+                patch('gxmd.parsers.request_parser.get_code_generator') as get_code_generator, \
+                patch('gxmd.parsers.request_parser.CodeCompiler.compile_code', return_value=list):
+            generate_manga_code = get_code_generator.return_value.generate_manga_code = AsyncMock(side_effect=generate)
+            funcs = await asyncio.gather(*(RequestParser.get_scraper_func(f'https://manga.com/{i}', soup,
+                                                                          'chapter_images') for i in range(3)))
+            # The compiled scraper is cached per domain
+            self.assertIs(registry.get_scraper_func('manga.com', 'chapter_images'), list)
+            registry.set_scraper_func('manga.com', 'chapter_images', None)
+
+        generate_manga_code.assert_awaited_once()
+        self.assertEqual(funcs, [list, list, list])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from gxmd.cli import prompt
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.code_registry import registry
+from gxmd.services.strategy_selector import StrategySelector
+
+MANGA_PAGE = (
+    '<html><body><main><h2>Manga</h2><p>' + 'A long synopsis of the manga. ' * 10 + '</p><ol>'
+    + ''.join(f'<li><a href="/read/{n}">Read {n}</a></li>' for n in range(1, 4)) + '</ol></main></body></html>'
+)
+CHAPTER_PAGE = '<html><body><main><p>' + 'Chapter text. ' * 20 + '</p><img src="/1.png"><img src="/2.png"></main>' \
+                                                                   '</body></html>'
+MANGA_SCRAPER = '''
+def parse_manga_info(node):
+    return {'manga_name': 'Manga', 'manga_chapters': [{'name': a.text(), 'link': a.attributes['href']}
+                                                      for a in node.css('ol a')]}
+'''
+CHAPTER_SCRAPER = '''
+def parse_chapter_images(node):
+    return [img.attributes['src'] for img in node.css('img')]
+'''
+
+
+class TestSpeculativeScraper(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        selector = StrategySelector(os.path.join(self.directory.name, 'strategies.json'))
+        patch('gxmd.parsers.request_parser.strategy_selector', selector).start()
+        patch.object(registry, 'scrapers_dir', Path(self.directory.name)).start()
+        fetch = AsyncMock(side_effect=lambda url, **kwargs: CHAPTER_PAGE if '/read/' in url else MANGA_PAGE)
+        patch.object(RequestParser.http_fetcher, 'fetch', fetch).start()
+        patch.object(RequestParser.render_fetcher, 'fetch', fetch).start()
+        self.get_code_generator = patch('gxmd.parsers.request_parser.get_code_generator').start()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(registry.set_scraper_func, 'manga.com', 'manga_info', None)
+        self.addCleanup(registry.set_scraper_func, 'manga.com', 'chapter_images', None)
+
+        self.generated = []
+
+        async def generate(purpose, html, url):
+            self.generated.append(purpose)
+            await asyncio.sleep(0.05)
+            return MANGA_SCRAPER if purpose == 'manga_info' else CHAPTER_SCRAPER
+
+        self.get_code_generator.return_value.generate_manga_code = AsyncMock(side_effect=generate)
+
+    async def test_chapter_scraper_is_generated_with_manga_info(self):
+        parser = RequestParser()
+        _, chapters = await parser.parse_manga_info('https://manga.com/manga')
+        self.assertEqual(chapters[0].link, 'https://manga.com/read/1')
+        await asyncio.sleep(0.01)
+        # The chapter scraper is generating before any chapter is parsed
+        self.assertEqual(self.generated, ['manga_info', 'chapter_images'])
+
+        images = await parser.parse_chapter_images(chapters[1].link)
+        self.assertEqual(images, ['/1.png', '/2.png'])
+        self.assertEqual(self.generated, ['manga_info', 'chapter_images'])
+
+    async def test_known_chapter_scraper_is_not_speculated(self):
+        parser = RequestParser()
+        parser.speculate = False
+        await parser.parse_manga_info('https://manga.com/manga')
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.generated, ['manga_info'])
+
+        registry.set_scraper_func('manga.com', 'chapter_images', list)
+        self.assertIsNone(RequestParser().speculate_chapter_scraper('https://manga.com/read/1'))
+
+    async def test_first_requested_chapter_is_speculated(self):
+        parser = RequestParser()
+        with patch.object(parser, 'speculate_chapter_scraper') as speculate_chapter_scraper:
+            await parser.parse_manga_info('https://manga.com/manga', first_chapter=3)
+            await parser.parse_manga_info('https://manga.com/manga', first_chapter=30)
+        self.assertEqual([call.args[0] for call in speculate_chapter_scraper.call_args_list],
+                         ['https://manga.com/read/3', 'https://manga.com/read/1'])
+
+    async def test_speculation_runs_during_the_prompts(self):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        def slow_input(message):
+            time.sleep(0.3)
+            return '2'
+
+        ticker = asyncio.create_task(tick())
+        with patch('builtins.input', slow_input):
+            self.assertEqual(await prompt('Starting index: '), '2')
+        ticker.cancel()
+        self.assertGreater(ticks, 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
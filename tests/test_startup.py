@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from selectolax.parser import HTMLParser
+
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.code_registry import registry
+
+HEAVY_MODULES = ('langchain_core', 'langchain_openai', 'playwright', 'cloudscraper')
+STARTUP_BUDGET = float(os.environ.get('GXMD_STARTUP_BUDGET', 1.0))  # Seconds, generous for slow CI machines
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60)
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_dependencies_are_not_imported(self):
+        result = run_python(
+            'import sys, gxmd, gxmd.cli, gxmd.services.manga_downloader\n'
+            f'print(",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '')
+
+    def test_import_time_budget(self):
+        code = 'import time; start = time.perf_counter(); import gxmd.cli; print(time.perf_counter() - start)'
+        elapsed = min(float(run_python(code).stdout) for _ in range(3))
+        self.assertLess(elapsed, STARTUP_BUDGET)
+
+    def test_help_does_not_load_the_services(self):
+        result = run_python(
+            'import sys\n'
+            'sys.argv = ["gxmd", "--help"]\n'
+            'from gxmd.cli import main_cli\n'
+            'try:\n'
+            '    main_cli()\n'
+            'except SystemExit:\n'
+            '    pass\n'
+            'print("gxmd.services.manga_downloader" in sys.modules, file=sys.stderr)'
+        )
+        self.assertIn('usage:', result.stdout)
+        self.assertEqual(result.stderr.strip(), 'False')
+
+
+class TestCachedScraper(unittest.IsolatedAsyncioTestCase):
+    async def test_cached_scraper_skips_the_code_generator(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        soup = HTMLParser('<html><body></body></html>').body
+        with patch.object(registry, 'scrapers_dir', Path(directory.name)), \
+                patch('gxmd.parsers.request_parser.get_code_generator') as get_code_generator:
+            scraper_file, _ = registry.get_scraper_file('cached.com', 'chapter_images')
+            registry.set_scraper_file(scraper_file, 'def parse_chapter_images(soup): return ["1.jpg"]')
+            scraper_func = await RequestParser.get_scraper_func('https://cached.com/1', soup, 'chapter_images')
+            registry.set_scraper_func('cached.com', 'chapter_images', None)
+
+        self.assertEqual(scraper_func(soup), ['1.jpg'])
+        get_code_generator.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
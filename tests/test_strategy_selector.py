@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from gxmd.exceptions import GXMNetworkError, GXMTimeoutError
+from gxmd.parsers.request_parser import RequestParser
+from gxmd.services.code_registry import registry
+from gxmd.services.strategy_selector import StrategySelector
+
+STATIC_PAGE = f"<html><body><main><h1>Manga</h1><p>{'Chapter list and synopsis. ' * 10}</p></main></body></html>"
+SPA_PAGE = '<html><body><div id="root"></div><script src="/static/js/main.js"></script></body></html>'
+READER_PAGE = '<html><body><main class="reader"><p>' + 'Chapter text. ' * 20 + '</p>{}</main></body></html>'
+IMAGES_SCRAPER = '''
+def parse_chapter_images(node):
+    return [img.attributes['src'] for img in node.css('img')]
+'''
+
+
+class TestStrategySelector(unittest.TestCase):
+    def test_verdicts_are_persisted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'strategies.json')
+            selector = StrategySelector(path)
+            self.assertIsNone(selector.needs_render('example.com', 'chapter_images'))
+
+            selector.set_verdict('example.com', 'chapter_images', True)
+            selector.set_verdict('example.com', 'manga_info', False)
+
+            selector = StrategySelector(path)
+            self.assertTrue(selector.needs_render('example.com', 'chapter_images'))
+            self.assertFalse(selector.needs_render('example.com', 'manga_info'))
+
+
+class TestLoadPage(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.selector = StrategySelector(os.path.join(self.directory.name, 'strategies.json'))
+        patcher = patch('gxmd.parsers.request_parser.strategy_selector', self.selector)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+        self.parser = RequestParser()
+        self.http_fetch = patch.object(RequestParser.http_fetcher, 'fetch', new_callable=AsyncMock).start()
+        self.render_fetch = patch.object(RequestParser.render_fetcher, 'fetch', new_callable=AsyncMock).start()
+        self.addCleanup(patch.stopall)
+
+    async def test_static_page_uses_http(self):
+        self.http_fetch.return_value = STATIC_PAGE
+        _, render = await self.parser.load_page('https://example.com/manga')
+
+        self.assertFalse(render)
+        self.render_fetch.assert_not_called()
+        self.assertFalse(self.selector.needs_render('example.com', 'manga_info'))
+
+    async def test_script_rendered_page_escalates_once(self):
+        self.http_fetch.return_value = SPA_PAGE
+        self.render_fetch.return_value = STATIC_PAGE
+        _, render = await self.parser.load_page('https://example.com/manga')
+
+        self.assertTrue(render)
+        self.assertTrue(self.selector.needs_render('example.com', 'manga_info'))
+
+        # The next page goes straight to the browser
+        self.http_fetch.reset_mock()
+        await self.parser.load_page('https://example.com/manga/2')
+        self.http_fetch.assert_not_called()
+
+    async def test_transient_error_is_not_learned(self):
+        self.render_fetch.return_value = STATIC_PAGE
+        for error in (GXMTimeoutError("Timed out", 504), GXMNetworkError("HTTP 502 error", 502)):
+            self.http_fetch.side_effect = error
+            _, render = await self.parser.load_page('https://example.com/manga')
+            self.assertTrue(render)
+            self.assertIsNone(self.selector.needs_render('example.com', 'manga_info'))
+
+        # The next page tries HTTP again
+        self.http_fetch.side_effect = None
+        self.http_fetch.return_value = STATIC_PAGE
+        _, render = await self.parser.load_page('https://example.com/manga')
+        self.assertFalse(render)
+
+    async def test_challenge_is_learned(self):
+        self.http_fetch.side_effect = GXMNetworkError("HTTP 403 error", 403)
+        self.render_fetch.return_value = STATIC_PAGE
+        await self.parser.load_page('https://example.com/manga')
+        self.assertTrue(self.selector.needs_render('example.com', 'manga_info'))
+
+
+class TestScraperEscalation(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        selector = StrategySelector(os.path.join(self.directory.name, 'strategies.json'))
+        patch('gxmd.parsers.request_parser.strategy_selector', selector).start()
+        patch.object(registry, 'scrapers_dir', Path(self.directory.name)).start()
+        # The static reader has a placeholder, the images only load in the browser
+        patch.object(RequestParser.http_fetcher, 'fetch',
+                     AsyncMock(return_value=READER_PAGE.format('<img src="/spinner.gif">'))).start()
+        patch.object(RequestParser.render_fetcher, 'fetch',
+                     AsyncMock(return_value=READER_PAGE.format('<img src="/1.png"><img src="/2.png">'))).start()
+        patch('gxmd.parsers.request_parser.get_heuristic_scraper', return_value=None).start()
+        self.generate = patch('gxmd.parsers.request_parser.get_code_generator').start() \
+            .return_value.generate_manga_code = AsyncMock()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(registry.set_scraper_func, 'example.com', 'chapter_images', None)
+        self.scraper_file, _ = registry.get_scraper_file('example.com', 'chapter_images')
+
+    async def test_scraper_without_data_is_regenerated_on_the_render(self):
+        empty_scraper = 'def parse_chapter_images(node):\n    return []\n'
+        self.generate.side_effect = [empty_scraper, IMAGES_SCRAPER]
+        images = await RequestParser().parse_chapter_images('https://example.com/chapter-1')
+
+        self.assertEqual(images, ['/1.png', '/2.png'])
+        self.assertEqual(self.generate.await_count, 2)
+        self.assertEqual(self.scraper_file.read_text(), IMAGES_SCRAPER)
+
+    async def test_unsupported_static_page_is_rendered(self):
+        self.generate.side_effect = ['No', IMAGES_SCRAPER]
+        images = await RequestParser().parse_chapter_images('https://example.com/chapter-1')
+        self.assertEqual(images, ['/1.png', '/2.png'])
+        self.assertTrue(self.scraper_file.exists())
+
+
+if __name__ == '__main__':
+    unittest.main()